@@ -59,6 +59,13 @@ else:
     key_path = global_config["key_path"]
 key_path = os.path.expanduser(key_path)
 
+# on-disk location for derived data (baked audio probes, processed meshes, graphs) that is safe to delete
+if "IGIBSON_CACHE_PATH" in os.environ:
+    cache_path = os.environ["IGIBSON_CACHE_PATH"]
+else:
+    cache_path = global_config.get("cache_path", "~/.cache/igibson")
+cache_path = os.path.expanduser(cache_path)
+
 root_path = os.path.dirname(os.path.realpath(__file__))
 
 if not os.path.isabs(assets_path):
@@ -73,6 +80,8 @@ if not os.path.isabs(cubicasa_dataset_path):
     cubicasa_dataset_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), cubicasa_dataset_path)
 if not os.path.isabs(key_path):
     key_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), key_path)
+if not os.path.isabs(cache_path):
+    cache_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), cache_path)
 
 if log.isEnabledFor(logging.INFO):
     print(__logo__)
@@ -84,6 +93,7 @@ log.debug("iG Dataset path: {}".format(ig_dataset_path))
 log.debug("3D-FRONT Dataset path: {}".format(threedfront_dataset_path))
 log.debug("CubiCasa5K Dataset path: {}".format(cubicasa_dataset_path))
 log.debug("iGibson Key path: {}".format(key_path))
+log.debug("iGibson cache path: {}".format(cache_path))
 
 
 def get_version(dataset_path):
@@ -0,0 +1,128 @@
+import logging
+
+import numpy as np
+import pybullet as p
+from scipy.ndimage import uniform_filter
+
+from igibson.audio import audio
+
+log = logging.getLogger(__name__)
+
+
+class AudioFieldRenderer(object):
+    """
+    Offline renderer of audio fields (sound intensity, occlusion) over many listener positions.
+    Listener positions are evaluated in batches directly through ResonanceAudio, without stepping physics or the
+    renderer: the sources are assumed static, their audio is read once and reused at every position, occluders of
+    all (position, source) segments of a batch are counted together, and closest reverb probes are looked up with a
+    single vectorized query. Results can be rasterized into grids aligned with the traversability map of the scene.
+    """
+
+    def __init__(self, audio_system, num_buffers_per_point=10):
+        """
+        :param audio_system: AudioSystem with the sources to render already registered and enabled
+        :param num_buffers_per_point: number of audio buffers rendered at every position. The first ones let the
+            filters and the reverb tail of the previous position decay, as stepping the simulator at each position did
+        """
+        self.audio_system = audio_system
+        self.num_buffers_per_point = num_buffers_per_point
+
+        self.sources = [source for source, enabled in audio_system.sourceToEnabled.items() if enabled]
+        if len(self.sources) == 0:
+            log.warning("AudioFieldRenderer created without any enabled audio source")
+        self.source_positions = np.array(
+            [p.getBasePositionAndOrientation(source)[0] for source in self.sources], dtype=np.float64
+        ).reshape(-1, 3)
+        for source, source_pos in zip(self.sources, self.source_positions):
+            audio.SetSourcePosition(audio_system.sourceToResonanceID[source], source_pos.tolist())
+
+        # (num_sources, num_buffers, frames) source audio, shared by every listener position
+        self.source_blocks = np.zeros((len(self.sources), num_buffers_per_point, audio_system.framesPerBuf), np.int16)
+        for i, source in enumerate(self.sources):
+            for b in range(num_buffers_per_point):
+                self.source_blocks[i, b] = audio_system.readSourceBlock(source)
+
+    def render(self, positions, orientation=None, batch_size=256):
+        """
+        Render the audio field at many listener positions
+
+        :param positions: (N, 3) listener positions
+        :param orientation: listener orientation quaternion [x, y, z, w], defaults to the current one of the system
+        :param batch_size: number of positions whose occlusion is resolved together
+        :return: (N,) sound intensity, the RMS of every rendered buffer summed over buffers and channels, and
+            (N,) occlusion intensity summed over the sources
+        """
+        audio_system = self.audio_system
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if orientation is None:
+            orientation = audio_system.get_ori()
+        num_sources, frames = len(self.sources), audio_system.framesPerBuf
+        resonance_ids = [audio_system.sourceToResonanceID[source] for source in self.sources]
+
+        probe_keys = [None] * len(positions)
+        if audio_system.reverb:
+            probe_keys = audio_system.getClosestReverbProbes(positions)
+
+        intensity = np.zeros(len(positions))
+        occlusion = np.zeros(len(positions))
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start : start + batch_size]
+            # one ray per (position, source) pair, position-major
+            occl_hits = audio_system.occlusion_engine.count_occluders(
+                self.sources * len(batch),
+                np.tile(self.source_positions, (len(batch), 1)),
+                np.repeat(batch, num_sources, axis=0),
+            )
+            occl_intensity = (occl_hits * audio_system.occl_multiplier).reshape(len(batch), num_sources)
+            occlusion[start : start + len(batch)] = occl_intensity.sum(axis=1)
+
+            for i, listener_pos in enumerate(batch):
+                idx = start + i
+                audio.SetListenerPositionAndRotation(listener_pos, orientation)
+                if probe_keys[idx] is not None and probe_keys[idx] != audio_system.current_probe_key:
+                    audio.SetRoomPropertiesFromProbe(probe_keys[idx])
+                    audio_system.current_probe_key = probe_keys[idx]
+                for j, resonance_id in enumerate(resonance_ids):
+                    audio.SetSourceOcclusion(resonance_id, occl_intensity[i, j])
+
+                for b in range(self.num_buffers_per_point):
+                    for j, resonance_id in enumerate(resonance_ids):
+                        audio.ProcessSource(resonance_id, frames, self.source_blocks[j, b])
+                    output = np.asarray(audio.ProcessListener(frames), dtype=np.float32) / 32768.0
+                    output = output.reshape(frames, 2)
+                    intensity[idx] += np.sqrt(np.mean(np.square(output), axis=0)).sum()
+
+        return intensity, occlusion
+
+    def rasterize(self, positions, values, radius=0.3):
+        """
+        Splat per-position values into a grid aligned with the traversability maps of the scene (same size,
+        resolution and orientation as scene.floor_map). Every position covers a square of the given radius;
+        where squares overlap, the values are averaged. Cells covered by no position are 0.
+
+        :param positions: (N, 3) or (N, 2) world positions
+        :param values: (N,) values
+        :param radius: half side of the square covered by each position, in meters
+        :return: (trav_map_size, trav_map_size) float array
+        """
+        scene = self.audio_system.scene
+        size = scene.trav_map_size
+        positions = np.asarray(positions, dtype=np.float64).reshape(len(values), -1)
+        # vectorized scene.world_to_map
+        cells = np.flip(positions[:, :2] / scene.trav_map_resolution + size / 2.0, axis=1).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < size), axis=1)
+        cells, values = cells[inside], np.asarray(values, dtype=np.float64)[inside]
+
+        value_sum = np.zeros((size, size))
+        count = np.zeros((size, size))
+        np.add.at(value_sum, (cells[:, 0], cells[:, 1]), values)
+        np.add.at(count, (cells[:, 0], cells[:, 1]), 1)
+
+        # box filters of the sums and counts average all the squares overlapping a cell
+        side = 2 * int(round(radius / scene.trav_map_resolution)) + 1
+        value_sum = uniform_filter(value_sum, size=side, mode="constant")
+        count = uniform_filter(count, size=side, mode="constant")
+        grid = np.zeros((size, size))
+        covered = count > 0.5 / side ** 2
+        grid[covered] = value_sum[covered] / count[covered]
+        return grid
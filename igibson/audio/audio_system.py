@@ -1,18 +1,21 @@
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
 from igibson.render.mesh_renderer.instances import InstanceGroup
-from igibson.utils.utils import l2_distance
 from igibson.objects import cube
 
 import igibson.audio.default_config as config
+from igibson.audio.audio_writer import StreamingAudioWriter
+from igibson.audio.clip_pool import AudioClipReader, get_clip_pool
+from igibson.audio.occlusion import OcclusionEngine
+from igibson.audio.probe_cache import ReverbProbeCache
+from igibson.audio.probe_index import ReverbProbeIndex
+from igibson.audio.streaming_spectrogram import StreamingSpectrogram
 # import igibson.audio as audio
 from igibson.audio import audio
 import librosa
 
 from skimage.measure import block_reduce
-import wave
 import numpy as np
 import pybullet as p
-from scipy.io.wavfile import write
 import scipy.io.wavfile as wavfile
 import transforms3d as tf3d
 
@@ -48,6 +51,12 @@ class AudioSystem(object):
                  stream_audio=False,
                  stream_input=False,
                  is_Sim2Real = False,
+                 use_probe_cache=True,
+                 streaming_spectrogram=True,
+                 hop_aligned_spectrogram=False,
+                 probe_hysteresis=config.REV_PROBE_HYSTERESIS,
+                 audio_file_format="WAV",
+                 rotate_audio_files=False,
                  ):
         """
         :param scene: iGibson scene
@@ -57,6 +66,12 @@ class AudioSystem(object):
         :param mesh: AudioMesh object, populated by caller. This mesh is primarily used for reverb/reflection baking.
         :param SR: ResonanceAudio sample rate
         :param num_probes: Determines number of reverb/reflections probes in the scene. Actual number is num_probes ^ 2
+        :param use_probe_cache: Load baked reverb/reflection probes from the on-disk cache when available, and store them after baking
+        :param streaming_spectrogram: Compute the spectrogram of all channels in one vectorized FFT over a sliding window, same output as the full recompute
+        :param hop_aligned_spectrogram: Opt-in approximation of streaming_spectrogram: end the window at the last whole STFT hop so that columns are reused on every step, lagging the latest sample by less than one hop
+        :param probe_hysteresis: Distance (meters) another probe must be closer by before the room properties switch to it
+        :param audio_file_format: Format of the files written with writeToFile, "WAV" or "FLAC"
+        :param rotate_audio_files: Write every episode to its own file (writeToFile_<episode>) instead of overwriting writeToFile
         """
         self.scene = simulator.scene
         self.SR = SR
@@ -66,6 +81,7 @@ class AudioSystem(object):
         self.renderAmbisonics = renderAmbisonics
         self.reverb = renderReverbReflections
         self.occl_multiplier = occl_multiplier
+        self.probe_hysteresis = probe_hysteresis
         self.occl_intensity = -1
         self.num_ambisonic_channels = 4
         # audio type float32
@@ -73,47 +89,7 @@ class AudioSystem(object):
         if self.is_Sim2Real:
             _, self.bg_noise = wavfile.read("igibson/audio/background_noise.wav")
 
-        def getViewerOrientation():
-            #from numpy-quaternion github
-            ct = np.cos(self.listener.theta / 2.0)
-            cp = np.cos(self.listener.phi / 2.0)
-            st = np.sin(self.listener.theta / 2.0)
-            sp = np.sin(self.listener.phi / 2.0)
-            return [-1*sp*st, st*cp, sp*ct, cp*ct]
-
-        if is_Viewer:
-            self.get_pos = lambda: [self.listener.px, self.listener.py, self.listener.pz]
-            self.get_ori = getViewerOrientation 
-        elif is_VR_Viewer:
-            self.get_pos = lambda: self.s.get_data_for_vr_device("hmd")[1]
-            self.get_ori = lambda: self.s.get_data_for_vr_device("hmd")[2]
-        else:
-            # NOTICE: coordinate direction in Resonance audio is quite different with pybullet
-            # need to do some rotation to align these coodinates, but still z axis is opposite
-            def get_pos():
-                pos = np.zeros((3,))
-                pos[:2] = self.listener.eyes.get_position()[:2]
-                pos[2] = 0.73
-                return pos
-            if self.is_Sim2Real:
-                self.get_pos = get_pos
-            else:
-                # Adjust the microphone position on the real robot accordingly
-                self.get_pos = self.listener.eyes.get_position
-
-            def get_ori():
-                lis_ori = self.listener.eyes.get_orientation()
-                # convert to [w,x,y,z]
-                start = [lis_ori[3], lis_ori[0],lis_ori[1],lis_ori[2]]
-                # rotate along y axis
-                delta = tf3d.quaternions.axangle2quat([0, 1, 0], np.pi/2)
-                final = tf3d.quaternions.qmult(start, delta)
-                # rotate along z axis
-                delta2 = tf3d.quaternions.axangle2quat([0, 0, 1], -np.pi/2)
-                final = tf3d.quaternions.qmult(final, delta2)
-                final = [final[1], final[2],final[3],final[0]]
-                return final
-            self.get_ori = get_ori
+        self.get_pos, self.get_ori = self.getListenerPoseFunctions(listener, is_Viewer, is_VR_Viewer)
 
         self.framesPerBuf =  int(SR / (1 / self.s.render_timestep))
         # spectrogram taken over longer time windows
@@ -123,16 +99,21 @@ class AudioSystem(object):
         else:
             self.curr_audio_by_channel = np.zeros((2, self.framesPerBuf))
             self.window_by_channel = np.zeros((2, int(SR * spectrogram_window_len)))
+        self.streaming_spectrogram = None
+        if streaming_spectrogram:
+            self.streaming_spectrogram = StreamingSpectrogram(
+                self.window_by_channel.shape[0], self.window_by_channel.shape[1], hop_aligned=hop_aligned_spectrogram
+            )
+            self.window_by_channel = self.streaming_spectrogram.window
 
         audio.InitializeSystem(self.framesPerBuf, SR)
 
         #Get reverb and reflection properties at equally spaced point in grid along traversible map
-        self.probe_key_to_pos_by_floor, self.current_probe_key = [], None
+        self.probe_key_to_pos_by_floor, self.current_probe_key, self.probe_index = [], None, None
         if self.reverb:
             if acousticMesh.faces is None or acousticMesh.verts is None or acousticMesh.materials is None:
                 raise ValueError('Invalid audioMesh')
-            #Load scene mesh without dynamic objects
-            audio.LoadMesh(int(acousticMesh.verts.size / 3), int(acousticMesh.faces.size / 3), acousticMesh.verts, acousticMesh.faces, acousticMesh.materials, 0.9) #Scattering coefficient needs tuning?
+            probe_keys, probe_positions = [], []
             points_grid = self.scene.get_points_grid(num_probes)
             for floor in points_grid.keys():
                 self.probe_key_to_pos_by_floor.append({})
@@ -143,13 +124,27 @@ class AudioSystem(object):
                         sample_position[2] += 1.7
                     else:
                         sample_position[2] += self.get_pos()[2]
-                    audio.RegisterReverbProbe(key, sample_position, *config.REV_PROBE_PARAMS)
+                    probe_keys.append(key)
+                    probe_positions.append(sample_position)
                     self.probe_key_to_pos_by_floor[floor][key] = sample_position[:2]
 
+            probe_cache = None
+            if use_probe_cache:
+                probe_cache = ReverbProbeCache(getattr(self.scene, "scene_id", None), acousticMesh, probe_positions)
+            # A warm start registers the cached probes and skips ray-tracing (and loading the mesh) entirely
+            if probe_cache is None or not probe_cache.load(probe_keys):
+                #Load scene mesh without dynamic objects
+                audio.LoadMesh(int(acousticMesh.verts.size / 3), int(acousticMesh.faces.size / 3), acousticMesh.verts, acousticMesh.faces, acousticMesh.materials, config.REV_PROBE_SCATTERING_COEFFICIENT) #Scattering coefficient needs tuning?
+                for key, sample_position in zip(probe_keys, probe_positions):
+                    audio.RegisterReverbProbe(key, sample_position, *config.REV_PROBE_PARAMS)
+                # Save some memory
+                audio.DeleteMesh()
+                if probe_cache is not None:
+                    probe_cache.save(probe_keys)
+
+            self.probe_index = ReverbProbeIndex(self.scene.floor_heights, self.probe_key_to_pos_by_floor)
             self.current_probe_key = self.getClosestReverbProbe(self.get_pos())
             audio.SetRoomPropertiesFromProbe(self.current_probe_key)
-            # Save some memory
-            audio.DeleteMesh()
         else:
             audio.DisableRoomEffects()
 
@@ -160,10 +155,20 @@ class AudioSystem(object):
             #Since the walls are all assigned one obj_id, we need to make sure not to automatically skip counting duplicate collisions with these ids
             for category in ["walls", "floors", "ceilings"]:
                 for obj in self.s.scene.objects_by_category[category]: 
-                    self.alwaysCountCollisionIDs.add(obj)
+                    self.alwaysCountCollisionIDs.update(obj.get_body_ids())
+        self.occlusion_engine = OcclusionEngine(self.alwaysCountCollisionIDs, self.single_occl_hit_per_obj)
 
         self.sourceToEnabled, self.sourceToBuffer, self.sourceToRepeat,  self.sourceToResonanceID = {}, {}, {}, {}
-        self.current_output, self.complete_output = [0]*(4*self.framesPerBuf), []
+        self.sourceToOcclusion, self.sourceToParams, self.sourceToListenerResonanceIDs = {}, {}, {}
+        self.current_output = [0]*(4*self.framesPerBuf)
+        # Rendered audio is streamed to disk by a background thread, one file per episode
+        self.audio_writer, self.audio_file_episode = None, 0
+        self.audio_file_format, self.rotate_audio_files = audio_file_format, rotate_audio_files
+        if self.writeToFile:
+            self.audio_writer = StreamingAudioWriter(self.SR, 2, self.framesPerBuf, file_format=audio_file_format)
+        # Listeners added with addListener, each rendered by its own ResonanceAudio system
+        self.extraListenerPoses, self.extraListenerProbeKeys = [], []
+        self.listener_outputs = None
 
         # Try to stream audio live
         if stream_audio or stream_input:
@@ -179,22 +184,68 @@ class AudioSystem(object):
             if stream_input:
                 in_stream = pyaud.open(rate=self.SR, frames_per_buffer=self.framesPerBuf, format=pyaudio.paInt16, channels=1, input=True, stream_callback=pyaudInputCallback)
             
-    def getClosestReverbProbe(self, pos):
-        floor = 0
-        for i in range(len(self.scene.floor_heights)):
-            if self.scene.floor_heights[i] > pos[2]:
-                floor = i - 1
-                break
-        if floor < 0:
-            print("Floor height error, cannot match closest reverb probe")
-        min_dist, min_probe = np.inf, None
-        #TODO: This is very inefficient
-        for probe_key, probe_pos in self.probe_key_to_pos_by_floor[floor].items():
-            dist = l2_distance(probe_pos, pos[:2])
-            if dist < min_dist:
-                min_dist = dist
-                min_probe = probe_key
-        return min_probe
+    def getListenerPoseFunctions(self, listener, is_Viewer=False, is_VR_Viewer=False):
+        """
+        :param listener: Audio receiver, either a Viewer object or any subclass of BaseRobot
+        :param is_Viewer: whether the listener is a Viewer
+        :param is_VR_Viewer: whether the listener is the VR headset
+        :return: functions returning the position and the orientation [x, y, z, w] of the listener
+        """
+        def getViewerOrientation():
+            #from numpy-quaternion github
+            ct = np.cos(listener.theta / 2.0)
+            cp = np.cos(listener.phi / 2.0)
+            st = np.sin(listener.theta / 2.0)
+            sp = np.sin(listener.phi / 2.0)
+            return [-1*sp*st, st*cp, sp*ct, cp*ct]
+
+        if is_Viewer:
+            return (lambda: [listener.px, listener.py, listener.pz]), getViewerOrientation
+        if is_VR_Viewer:
+            return (lambda: self.s.get_data_for_vr_device("hmd")[1]), (lambda: self.s.get_data_for_vr_device("hmd")[2])
+
+        # NOTICE: coordinate direction in Resonance audio is quite different with pybullet
+        # need to do some rotation to align these coodinates, but still z axis is opposite
+        def get_pos():
+            pos = np.zeros((3,))
+            pos[:2] = listener.eyes.get_position()[:2]
+            pos[2] = 0.73
+            return pos
+
+        def get_ori():
+            lis_ori = listener.eyes.get_orientation()
+            # convert to [w,x,y,z]
+            start = [lis_ori[3], lis_ori[0],lis_ori[1],lis_ori[2]]
+            # rotate along y axis
+            delta = tf3d.quaternions.axangle2quat([0, 1, 0], np.pi/2)
+            final = tf3d.quaternions.qmult(start, delta)
+            # rotate along z axis
+            delta2 = tf3d.quaternions.axangle2quat([0, 0, 1], -np.pi/2)
+            final = tf3d.quaternions.qmult(final, delta2)
+            final = [final[1], final[2],final[3],final[0]]
+            return final
+
+        if self.is_Sim2Real:
+            return get_pos, get_ori
+        # Adjust the microphone position on the real robot accordingly
+        return listener.eyes.get_position, get_ori
+
+    def getClosestReverbProbe(self, pos, hysteresis=0.0):
+        """
+        :param pos: listener position [x, y, z]
+        :param hysteresis: keep the current probe unless another one is closer by more than this margin (meters)
+        :return: key of the closest reverb probe on the floor of pos
+        """
+        return self.probe_index.get_closest_probe(pos, self.current_probe_key, hysteresis)
+
+    def getClosestReverbProbes(self, positions):
+        """
+        Vectorized closest reverb probe lookup, e.g. for rendering many listener positions
+
+        :param positions: (N, 3) array of listener positions
+        :return: list of N probe keys
+        """
+        return self.probe_index.get_closest_probes(positions)
 
     def registerSource(self,
                        source_obj_id,
@@ -215,13 +266,21 @@ class AudioSystem(object):
         source_id = audio.InitializeSource(source_pos, min_distance, max_distance, source_gain, near_field_gain, reverb_gain)
         buffer = None
         if audio_fname:
-            buffer =  wave.open(audio_fname, 'rb')
-            if buffer.getframerate() != self.SR:
-                raise Exception('Object {} with source {} has SR {}, which does not match the system SR of {}.'.format(source_obj_id, audio_fname, buffer.getframerate(),self.SR))
-            if buffer.getnchannels() != 1:
-                raise Exception('Source {} has {} channels, 1 expected.'.format(audio_fname, buffer.getnchannels()))
+            # the clip is decoded once and shared by every source (and episode) playing the same file
+            clip = get_clip_pool().get(audio_fname)
+            if clip.sample_rate != self.SR:
+                raise Exception('Object {} with source {} has SR {}, which does not match the system SR of {}.'.format(source_obj_id, audio_fname, clip.sample_rate, self.SR))
+            if clip.num_channels != 1:
+                raise Exception('Source {} has {} channels, 1 expected.'.format(audio_fname, clip.num_channels))
+            buffer = AudioClipReader(clip)
 
         self.sourceToResonanceID[source_obj_id] = source_id
+        self.sourceToParams[source_obj_id] = [min_distance, max_distance, source_gain, near_field_gain, reverb_gain]
+        self.sourceToListenerResonanceIDs[source_obj_id] = []
+        for listener_idx in range(len(self.extraListenerPoses)):
+            audio.SelectListenerSystem(listener_idx + 1)
+            self.sourceToListenerResonanceIDs[source_obj_id].append(self.initializeResonanceSource(source_obj_id))
+            audio.SelectListenerSystem(0)
         self.sourceToEnabled[source_obj_id] = enabled
         self.sourceToRepeat[source_obj_id] = repeat
         self.sourceToBuffer[source_obj_id] = buffer
@@ -234,85 +293,198 @@ class AudioSystem(object):
         self.sourceToRepeat[source_obj_id] = repeat
 
     def setSourceNearFieldEffectGain(self, source_obj_id, gain):
+        self.sourceToParams[source_obj_id][3] = gain
         audio.SetNearFieldEffectGain(self.sourceToResonanceID[source_obj_id], gain)
+        for listener_idx, resonance_id in enumerate(self.sourceToListenerResonanceIDs[source_obj_id]):
+            audio.SelectListenerSystem(listener_idx + 1)
+            audio.SetNearFieldEffectGain(resonance_id, gain)
+            audio.SelectListenerSystem(0)
+
+    def initializeResonanceSource(self, source_obj_id):
+        """
+        Create a source in the selected ResonanceAudio system, with the parameters it was registered with
+        """
+        source_pos,_ = p.getBasePositionAndOrientation(source_obj_id)
+        source_id = audio.InitializeSource(source_pos, *self.sourceToParams[source_obj_id])
+        audio.SetSourceOcclusion(source_id, 0)
+        return source_id
+
+    def addListener(self, listener, is_Viewer=False, is_VR_Viewer=False):
+        """
+        Render the scene for one more listener, e.g. another robot or a candidate pose.
+        Every listener gets its own ResonanceAudio system (sources, filters and room properties), while the source
+        audio and the occlusion queries of a step are shared by all listeners.
+
+        :param listener: Audio receiver, either a Viewer object or any subclass of BaseRobot
+        :param is_Viewer: whether the listener is a Viewer
+        :param is_VR_Viewer: whether the listener is the VR headset
+        :return: index of the listener in the output of step
+        """
+        get_pos, get_ori = self.getListenerPoseFunctions(listener, is_Viewer, is_VR_Viewer)
+        listener_idx = audio.AddListenerSystem()
+        audio.SelectListenerSystem(listener_idx)
+        probe_key = None
+        if self.reverb:
+            probe_key = self.probe_index.get_closest_probe(get_pos())
+            audio.SetRoomPropertiesFromProbe(probe_key)
+        else:
+            audio.DisableRoomEffects()
+        for source in self.sourceToBuffer.keys():
+            self.sourceToListenerResonanceIDs[source].append(self.initializeResonanceSource(source))
+        audio.SelectListenerSystem(0)
+
+        self.extraListenerPoses.append((get_pos, get_ori))
+        self.extraListenerProbeKeys.append(probe_key)
+        return listener_idx
+
+    def getListenerResonanceIDs(self, listener_idx):
+        """
+        :param listener_idx: index of the listener, 0 for the main one
+        :return: dict from source object id to its id in the ResonanceAudio system of the listener
+        """
+        if listener_idx == 0:
+            return self.sourceToResonanceID
+        return {source: ids[listener_idx - 1] for source, ids in self.sourceToListenerResonanceIDs.items()}
 
     def readSource(self, source, nframes):
-        #This conversion to numpy is inefficient and unnecessary
         #TODO: is np.int16 limiting?
         buffer = self.sourceToBuffer[source]
         if buffer is None:
             # streaming input
             return np.frombuffer(self.streaming_input, dtype=np.int16)
-        return np.frombuffer(buffer.readframes(nframes), dtype=np.int16)
+        return buffer.read(nframes)
+
+    def readSourceBlock(self, source):
+        """
+        Read the next framesPerBuf samples of a source. Repeating sources wrap around, other sources are zero-padded
+        and disabled once their audio runs out.
+        """
+        buffer = self.sourceToBuffer[source]
+        if self.sourceToRepeat[source] and buffer is not None:
+            return buffer.read_looped(self.framesPerBuf)
+        source_audio = self.readSource(source, self.framesPerBuf)
+        if source_audio.size < self.framesPerBuf:
+            num_pad = self.framesPerBuf - source_audio.size
+            source_audio = np.pad(source_audio, (0, num_pad), 'constant')
+            self.setSourceEnabled(source, enabled=False)
+        return source_audio
 
     def step(self):
-        listener_pos = self.get_pos()
-        for source, buffer in self.sourceToBuffer.items():
+        """
+        Render the next audio buffer for every listener
+
+        :return: (num_listeners, channels, frames) int16 array of the binaural output of every listener
+        """
+        listener_poses = [(self.get_pos, self.get_ori)] + self.extraListenerPoses
+        listener_positions = np.array([get_pos() for get_pos, _ in listener_poses], dtype=np.float64).reshape(-1, 3)
+        num_listeners = len(listener_poses)
+
+        # Source audio is read once and shared by all listeners
+        enabled_sources, source_positions, source_blocks, disabled_sources = [], [], [], []
+        for source in self.sourceToBuffer.keys():
             if self.sourceToEnabled[source]:
-                source_audio = self.readSource(source, self.framesPerBuf)
-                if source_audio.size < self.framesPerBuf:
-                    if self.sourceToRepeat[source] and buffer is not None:
-                        buffer.rewind()
-                        audio_to_append = self.readSource(source, self.framesPerBuf - source_audio.size)
-                        source_audio = np.append(source_audio, audio_to_append)
-                    else:
-                        num_pad = self.framesPerBuf - source_audio.size
-                        source_audio = np.pad(source_audio, (0, num_pad), 'constant')
-                        self.setSourceEnabled(source, enabled=False)
+                source_audio = self.readSourceBlock(source)
                 #TODO: Source orientation!
                 source_pos,_ = p.getBasePositionAndOrientation(source)
-                audio.SetSourcePosition(self.sourceToResonanceID[source], [source_pos[0], source_pos[1], source_pos[2]])
-                occl_hits, hit_num = 0, 0
-                hit_objects = set()
-                while hit_num < 12:
-                    rayHit = p.rayTestBatch([source_pos], [listener_pos], reportHitNumber=hit_num, fractionEpsilon=0.01)
-                    hit_id = rayHit[0][0]
-                    if hit_id == -1: #add collision with listener
-                        break
-                    if hit_id != source:
-                        if hit_id not in hit_objects:
-                            occl_hits += 1
-                        if self.single_occl_hit_per_obj and hit_id not in self.alwaysCountCollisionIDs:
-                            hit_objects.add(hit_id)
-                    hit_num += 1
-                self.occl_intensity = occl_hits*self.occl_multiplier
-                audio.SetSourceOcclusion(self.sourceToResonanceID[source], self.occl_intensity)
-                audio.ProcessSource(self.sourceToResonanceID[source], self.framesPerBuf, source_audio)
+                enabled_sources.append(source)
+                source_positions.append(source_pos)
+                source_blocks.append(source_audio)
             else:
-                audio.ProcessSource(self.sourceToResonanceID[source], self.framesPerBuf, np.zeros(self.framesPerBuf, dtype=np.int16))
+                disabled_sources.append(source)
 
-        audio.SetListenerPositionAndRotation(listener_pos, self.get_ori())
-        if self.reverb:
-            closest_probe_key = self.getClosestReverbProbe(listener_pos)
-            if closest_probe_key != self.current_probe_key:
-                audio.SetRoomPropertiesFromProbe(closest_probe_key)
-                self.current_probe_key = closest_probe_key
+        # Occluders between all enabled sources and all listeners are counted with one batched query
+        source_positions = np.array(source_positions, dtype=np.float64).reshape(-1, 3)
+        occl_hits = self.occlusion_engine.count_occluders(
+            enabled_sources * num_listeners,
+            np.tile(source_positions, (num_listeners, 1)),
+            np.repeat(listener_positions, len(enabled_sources), axis=0),
+        ).reshape(num_listeners, len(enabled_sources))
 
-        self.current_output = audio.ProcessListener(self.framesPerBuf)
+        listener_outputs = []
+        for listener_idx, (_, get_ori) in enumerate(listener_poses):
+            if num_listeners > 1:
+                audio.SelectListenerSystem(listener_idx)
+            source_to_resonance_id = self.getListenerResonanceIDs(listener_idx)
+            for source in disabled_sources:
+                audio.ProcessSource(source_to_resonance_id[source], self.framesPerBuf, np.zeros(self.framesPerBuf, dtype=np.int16))
+            for source, source_pos, source_audio, source_occl_hits in zip(enabled_sources, source_positions, source_blocks, occl_hits[listener_idx]):
+                occl_intensity = source_occl_hits*self.occl_multiplier
+                if listener_idx == 0:
+                    self.occl_intensity = occl_intensity
+                    self.sourceToOcclusion[source] = occl_intensity
+                audio.SetSourcePosition(source_to_resonance_id[source], source_pos.tolist())
+                audio.SetSourceOcclusion(source_to_resonance_id[source], occl_intensity)
+                audio.ProcessSource(source_to_resonance_id[source], self.framesPerBuf, source_audio)
 
+            listener_pos = listener_positions[listener_idx]
+            audio.SetListenerPositionAndRotation(listener_pos, get_ori())
+            if self.reverb:
+                # room properties only change when the listener moves into the cell of another probe
+                current_probe_key = self.current_probe_key if listener_idx == 0 else self.extraListenerProbeKeys[listener_idx - 1]
+                closest_probe_key = self.probe_index.get_closest_probe(listener_pos, current_probe_key, self.probe_hysteresis)
+                if closest_probe_key != current_probe_key:
+                    audio.SetRoomPropertiesFromProbe(closest_probe_key)
+                    if listener_idx == 0:
+                        self.current_probe_key = closest_probe_key
+                    else:
+                        self.extraListenerProbeKeys[listener_idx - 1] = closest_probe_key
+
+            listener_outputs.append(audio.ProcessListener(self.framesPerBuf))
+            if listener_idx == 0 and self.renderAmbisonics:
+                self.ambisonic_output = audio.RenderAmbisonics(self.framesPerBuf)
+        if num_listeners > 1:
+            audio.SelectListenerSystem(0)
+
+        self.current_output = listener_outputs[0]
         if self.renderAmbisonics:
-            self.ambisonic_output = audio.RenderAmbisonics(self.framesPerBuf)
             self.curr_audio_by_channel = np.array(self.ambisonic_output[:self.num_ambisonic_channels])
         else:
             self.curr_audio_by_channel[0] = np.array(self.current_output[::2], dtype=np.float32, order='C') / 32768.0
             self.curr_audio_by_channel[1] = np.array(self.current_output[1::2], dtype=np.float32, order='C') / 32768.0
 
-        if self.writeToFile != "":
-            self.complete_output.extend(self.current_output)
-    
+        if self.audio_writer is not None:
+            if not self.audio_writer.is_open:
+                self.audio_writer.open(self.getAudioFilePath())
+            self.audio_writer.write(self.current_output)
+
+        # interleaved stereo -> (listeners, channels, frames)
+        self.listener_outputs = np.array(listener_outputs, dtype=np.int16).reshape(num_listeners, self.framesPerBuf, 2).transpose(0, 2, 1)
+        return self.listener_outputs
+
     def reset(self):
-        self.save_audio()
+        # the file is finished in the background, nothing is written at reset
+        self.save_audio(wait=False)
+        self.audio_file_episode += 1
         
         for source, _ in self.sourceToBuffer.items():
             audio.DestroySource(self.sourceToResonanceID[source])
+            for listener_idx, resonance_id in enumerate(self.sourceToListenerResonanceIDs[source]):
+                audio.SelectListenerSystem(listener_idx + 1)
+                audio.DestroySource(resonance_id)
+                audio.SelectListenerSystem(0)
 
         self.sourceToEnabled, self.sourceToBuffer, self.sourceToRepeat,  self.sourceToResonanceID = {}, {}, {}, {}
-        self.current_output, self.complete_output = [], []
-    
-    def save_audio(self):
-        if self.writeToFile != "":
-            deinterleaved_audio = np.array([self.complete_output[::2], self.complete_output[1::2]], dtype=np.int16).T
-            write(self.writeToFile + '.wav', self.SR, deinterleaved_audio)
+        self.sourceToOcclusion, self.sourceToParams, self.sourceToListenerResonanceIDs = {}, {}, {}
+        self.current_output = []
+
+    def getAudioFilePath(self):
+        """
+        :return: path of the audio file of the current episode
+        """
+        extension = self.audio_file_format.lower()
+        if self.rotate_audio_files:
+            return "{}_{:05d}.{}".format(self.writeToFile, self.audio_file_episode, extension)
+        return "{}.{}".format(self.writeToFile, extension)
+
+    def save_audio(self, wait=True):
+        """
+        Finish the audio file of the current episode, the next step starts a new one
+
+        :param wait: block until the file (or the one finished last, if it was already finished in the background) is
+            completely written, e.g. to read it right away
+        """
+        if self.audio_writer is not None:
+            self.audio_writer.close_file(wait=wait)
     
     def get_spectrogram(self):
         def compute_stft(signal):
@@ -323,19 +495,33 @@ class AudioSystem(object):
             stft = block_reduce(stft, block_size=(2, 2), func=np.mean)
             return stft
 
+        def add_noise(mono_idx):
+            self.window_by_channel[mono_idx] = self.window_by_channel[mono_idx] + noise[mono_idx] * np.random.uniform(0.5, 1.0)
+            self.window_by_channel[mono_idx][self.window_by_channel[mono_idx] > 1.] = 1.
+            self.window_by_channel[mono_idx][self.window_by_channel[mono_idx] < -1.] = -1.
+
         # adding noise
         if self.is_Sim2Real:
             start_idx = int(np.random.choice(int(self.bg_noise.shape[0] - self.window_by_channel.shape[1]), 1)[0])
             left_noise = self.bg_noise[start_idx:(start_idx + self.window_by_channel.shape[1]), 0]
             right_noise = self.bg_noise[start_idx:(start_idx + self.window_by_channel.shape[1]), 1]
             noise = np.stack((left_noise,right_noise), axis=0)
+
+        if self.streaming_spectrogram is not None:
+            self.streaming_spectrogram.push(self.curr_audio_by_channel)
+            self.window_by_channel = self.streaming_spectrogram.window
+            if self.is_Sim2Real:
+                for mono_idx in range(self.curr_audio_by_channel.shape[0]):
+                    add_noise(mono_idx)
+                # the noise changes the whole window, so no STFT column can be reused
+                self.streaming_spectrogram.invalidate()
+            return self.streaming_spectrogram.compute()
+
         spectrogram_per_channel = []
         for mono_idx in range(self.curr_audio_by_channel.shape[0]):
             self.window_by_channel[mono_idx] = np.append(self.window_by_channel[mono_idx,self.framesPerBuf:], self.curr_audio_by_channel[mono_idx])
             if self.is_Sim2Real:
-                self.window_by_channel[mono_idx] = self.window_by_channel[mono_idx] + noise[mono_idx] * np.random.uniform(0.5, 1.0)
-                self.window_by_channel[mono_idx][self.window_by_channel[mono_idx] > 1.] = 1.
-                self.window_by_channel[mono_idx][self.window_by_channel[mono_idx] < -1.] = -1.
+                add_noise(mono_idx)
             spectrogram_per_channel.append(np.log1p(compute_stft(self.window_by_channel[mono_idx])))
 
         spectrogram = np.stack(spectrogram_per_channel, axis=-1)
@@ -343,5 +529,6 @@ class AudioSystem(object):
         return spectrogram
 
     def disconnect(self):
-        self.save_audio()    
+        if self.audio_writer is not None:
+            self.audio_writer.close()
         audio.ShutdownSystem()
\ No newline at end of file
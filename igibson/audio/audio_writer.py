@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+
+import numpy as np
+import soundfile as sf
+
+log = logging.getLogger(__name__)
+
+# Number of preallocated blocks, i.e. how far the simulation can run ahead of the disk
+DEFAULT_NUM_BLOCKS = 256
+
+
+class StreamingAudioWriter(object):
+    """
+    Streams rendered audio to WAV/FLAC files from a background thread.
+    Blocks are copied into a fixed pool of preallocated int16 buffers and written to the current file by a writer
+    thread, so recording uses a constant amount of memory however long an episode is, and finishing a file only
+    costs the blocks not written yet. If the disk falls behind by more than the pool, write() waits for a free block.
+    """
+
+    def __init__(
+        self, sample_rate, num_channels=2, block_frames=1024, num_blocks=DEFAULT_NUM_BLOCKS, file_format="WAV"
+    ):
+        """
+        :param sample_rate: sample rate of the audio
+        :param num_channels: number of interleaved channels of the blocks
+        :param block_frames: maximum number of frames of a block
+        :param num_blocks: number of preallocated blocks
+        :param file_format: soundfile format, "WAV" or "FLAC"
+        """
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.block_frames = block_frames
+        self.file_format = file_format
+        self.is_open = False
+        # set once the file finished last is completely written
+        self.closed = None
+
+        self.free_blocks = queue.Queue()
+        for _ in range(num_blocks):
+            self.free_blocks.put(np.zeros((block_frames, num_channels), dtype=np.int16))
+        self.commands = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def open(self, path):
+        """
+        Start writing to a new file. The previous file, if any, is finished first
+
+        :param path: path of the file
+        """
+        if self.is_open:
+            self.close_file()
+        self.check_error()
+        self.commands.put(("open", path))
+        self.is_open = True
+
+    def write(self, interleaved):
+        """
+        Append a block of audio to the current file
+
+        :param interleaved: interleaved int16 samples, at most block_frames frames
+        """
+        self.check_error()
+        interleaved = np.asarray(interleaved, dtype=np.int16)
+        num_frames = interleaved.size // self.num_channels
+        if num_frames > self.block_frames:
+            raise ValueError("Audio block of {} frames, at most {} expected".format(num_frames, self.block_frames))
+        block = self.free_blocks.get()
+        block[:num_frames] = interleaved.reshape(num_frames, self.num_channels)
+        self.commands.put(("write", (block, num_frames)))
+
+    def close_file(self, wait=False):
+        """
+        Finish the current file
+
+        :param wait: block until the file is completely written, or the file finished last if none is open
+        """
+        if self.is_open:
+            self.closed = threading.Event()
+            self.commands.put(("close", self.closed))
+            self.is_open = False
+        if wait and self.closed is not None:
+            self.closed.wait()
+            self.check_error()
+
+    def close(self):
+        """
+        Finish the current file and stop the writer thread
+        """
+        self.close_file(wait=True)
+        self.commands.put(("stop", None))
+        self.thread.join()
+
+    def check_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("Audio writer failed: {}".format(error))
+
+    def run(self):
+        f = None
+        while True:
+            command, arg = self.commands.get()
+            try:
+                if command == "open":
+                    f = sf.SoundFile(
+                        arg, "w", samplerate=self.sample_rate, channels=self.num_channels, format=self.file_format
+                    )
+                elif command == "write":
+                    block, num_frames = arg
+                    try:
+                        if f is not None:
+                            f.write(block[:num_frames])
+                    finally:
+                        self.free_blocks.put(block)
+                elif command == "close":
+                    if f is not None:
+                        f.close()
+                        f = None
+                    arg.set()
+                elif command == "stop":
+                    return
+            except Exception as e:
+                log.error("Audio writer failed on {}: {}".format(command, e))
+                self.error = e
+                if command == "close":
+                    f = None
+                    arg.set()
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import wave
+
+import numpy as np
+
+from igibson.utils.cache_utils import atomic_save_npy, get_cache_dir, hash_key, load_npy
+
+log = logging.getLogger(__name__)
+
+# Bump whenever the layout of the decoded clips changes
+CLIP_CACHE_VERSION = 1
+
+
+class AudioClip(object):
+    """
+    Decoded mono int16 audio clip
+    """
+
+    def __init__(self, path, samples, sample_rate, num_channels):
+        """
+        :param path: path of the source file
+        :param samples: (num_frames,) int16 array, possibly memory-mapped and read-only
+        :param sample_rate: sample rate of the clip
+        :param num_channels: number of channels of the source file, only mono clips can be played
+        """
+        self.path = path
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+
+class AudioClipPool(object):
+    """
+    Pool of decoded audio clips.
+    Every WAV file is decoded once into an int16 array that is shared by all the sources playing it and survives
+    environment resets. Decoded clips are also written to the iGibson cache as .npy files and memory-mapped, so
+    that the pages of a clip are shared by every process (e.g. parallel environments) playing it.
+    """
+
+    def __init__(self, cache_dir=None, use_disk_cache=True):
+        """
+        :param cache_dir: directory of the decoded clips, defaults to <igibson.cache_path>/audio_clips
+        :param use_disk_cache: store decoded clips on disk and memory-map them
+        """
+        self.cache_dir = cache_dir
+        self.use_disk_cache = use_disk_cache
+        self.clips = {}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """
+        Get the decoded clip of a WAV file, decoding it on first use
+
+        :param path: path of the WAV file
+        :return: AudioClip
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        # a modified file gets a new key and is decoded again
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            clip = self.clips.get(key)
+            if clip is None:
+                clip = self.load(path, key)
+                self.clips[key] = clip
+        return clip
+
+    def load(self, path, key):
+        """
+        Load a clip from the disk cache, or decode it
+
+        :param path: absolute path of the WAV file
+        :param key: (path, mtime, size) of the file
+        :return: AudioClip
+        """
+        with wave.open(path, "rb") as wav:
+            sample_rate, num_channels, num_frames = wav.getframerate(), wav.getnchannels(), wav.getnframes()
+            if not self.use_disk_cache:
+                return AudioClip(path, decode_wav(wav), sample_rate, num_channels)
+
+            cache_dir = self.cache_dir if self.cache_dir is not None else get_cache_dir("audio_clips")
+            cache_path = os.path.join(
+                cache_dir, "{}_{}.npy".format(os.path.basename(path), hash_key(CLIP_CACHE_VERSION, *key))
+            )
+            samples = load_npy(cache_path, mmap_mode="r")
+            if samples is None or samples.dtype != np.int16 or samples.size != num_frames * num_channels:
+                samples = decode_wav(wav)
+                atomic_save_npy(cache_path, samples)
+                if samples.size > 0:
+                    samples = np.load(cache_path, mmap_mode="r")
+        return AudioClip(path, samples, sample_rate, num_channels)
+
+    def clear(self):
+        """
+        Drop all clips from memory
+        """
+        with self.lock:
+            self.clips = {}
+
+
+def decode_wav(wav):
+    """
+    :param wav: open wave.Wave_read
+    :return: all the remaining samples of the file as an int16 array
+    """
+    return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+
+_clip_pool = None
+
+
+def get_clip_pool():
+    """
+    :return: the AudioClipPool shared by every AudioSystem of the process
+    """
+    global _clip_pool
+    if _clip_pool is None:
+        _clip_pool = AudioClipPool()
+    return _clip_pool
+
+
+class AudioClipReader(object):
+    """
+    Playback cursor over a decoded clip. Reads are zero-copy slices of the shared clip, except when a repeating
+    source wraps around the end of the clip.
+    """
+
+    def __init__(self, clip):
+        """
+        :param clip: AudioClip to play
+        """
+        self.clip = clip
+        self.samples = clip.samples
+        self.offset = 0
+
+    def read(self, nframes):
+        """
+        Read up to nframes samples, fewer once the end of the clip is reached
+
+        :param nframes: number of samples
+        :return: int16 array
+        """
+        start = self.offset
+        self.offset = min(start + nframes, self.samples.size)
+        return self.samples[start : self.offset]
+
+    def read_looped(self, nframes):
+        """
+        Read exactly nframes samples, wrapping around the end of the clip
+
+        :param nframes: number of samples
+        :return: (nframes,) int16 array
+        """
+        num_samples = self.samples.size
+        if num_samples == 0:
+            return np.zeros(nframes, dtype=np.int16)
+        start = self.offset
+        self.offset = (start + nframes) % num_samples
+        if start + nframes <= num_samples:
+            return self.samples[start : start + nframes]
+        return np.take(self.samples, np.arange(start, start + nframes) % num_samples)
+
+    def rewind(self):
+        self.offset = 0
@@ -15,6 +15,9 @@ DEFAULT_ROOM_EFFECTS_GAIN = 1.0
 
 
 # Reverb probe ray-tracing fields
+REV_PROBE_SCATTERING_COEFFICIENT = 0.9
+# Another probe must be closer than the current one by this margin (meters) before the listener switches to it
+REV_PROBE_HYSTERESIS = 0.1
 REV_PROBE_SAMPLE_RATE = 48000
 REV_PROBE_NUM_RAYS = 200000
 REV_PROBE_NUM_RAYS_PER_BATCH = 20000
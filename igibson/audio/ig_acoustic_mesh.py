@@ -1,5 +1,8 @@
+import os
+
 from igibson.audio.audio_system import AcousticMesh
 from igibson.audio.acoustic_material_mapping import ResonanceMaterialToId
+from igibson.utils.cache_utils import atomic_save_npz, get_cache_dir, hash_key, load_npz
 import numpy as np
 from igibson.simulator import Simulator
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
@@ -14,51 +17,122 @@ iGibsonToResonanceMaterialMap = {
     "window": "GlassThick"
 }
 
-def dumpFromRenderer(renderer, obj_pb_ids):
-    instances_vertices = []
-    instances_faces = []
-    len_v = 0
+# Bump whenever the layout of the cached meshes or the export changes
+ACOUSTIC_MESH_CACHE_VERSION = 1
+# In-memory cache of exported meshes, shared by repeated env loads of the same scene in a process
+_acoustic_mesh_cache = {}
+
+
+def getInstanceShapes(renderer, instance):
+    """
+    Yield the vertices (in world frame) and faces of every shape of a renderer instance
+
+    :param renderer: MeshRenderer
+    :param instance: InstanceGroup
+    """
+    for i, visual_obj in enumerate(instance.objects):
+        # same transform as transform_vertex, folded into a single affine map
+        transform = instance.poses_rot[i].T.dot(instance.poses_trans[i])
+        for vertex_data_index, face_data_index in zip(visual_obj.vertex_data_indices, visual_obj.face_indices):
+            vertices = renderer.vertex_data[vertex_data_index][:, :3]
+            yield vertices.dot(transform[:3, :3]) + transform[3, :3], renderer.faces[face_data_index]
+
+
+def exportRendererMesh(renderer, body_id_to_label):
+    """
+    Export the meshes of many bodies in a single pass over the renderer instances
+
+    :param renderer: MeshRenderer
+    :param body_id_to_label: dict from pybullet body id to an integer label (e.g. a material id) of its faces
+    :return: (V, 3) float32 vertices, (F, 3) int32 faces and (F,) int32 face labels, with the bodies in instance order
+    """
+    shapes = []
     for instance in renderer.instances:
-        if instance.pybullet_uuid in obj_pb_ids:
-            vertex_info, face_info = instance.dump()
-            for v, f in zip(vertex_info, face_info):
-                instances_vertices.append(v)
-                instances_faces.append(f + len_v)
-                len_v += len(v)
-    instances_vertices = np.concatenate(instances_vertices, axis=0)
-    instances_faces = np.concatenate(instances_faces, axis=0)
-
-    return instances_vertices, instances_faces
-
-def getIgAcousticMesh(simulator):
-    vert, face, mat = [], [], []
-    #For ig_scenes, we only load a mesh of large, static objects for reverb/reflection baking
-    for category in ["walls", "floors", "ceilings", "window"]:
+        label = body_id_to_label.get(instance.pybullet_uuid)
+        if label is not None:
+            shapes.extend((vertices, faces, label) for vertices, faces in getInstanceShapes(renderer, instance))
+
+    num_verts = sum(len(vertices) for vertices, _, _ in shapes)
+    num_faces = sum(len(faces) for _, faces, _ in shapes)
+    verts = np.empty((num_verts, 3), dtype=np.float32)
+    faces = np.empty((num_faces, 3), dtype=np.int32)
+    labels = np.empty((num_faces,), dtype=np.int32)
+    v_start, f_start = 0, 0
+    for shape_vertices, shape_faces, label in shapes:
+        v_end, f_end = v_start + len(shape_vertices), f_start + len(shape_faces)
+        verts[v_start:v_end] = shape_vertices
+        faces[f_start:f_end] = np.reshape(shape_faces, (-1, 3)) + v_start
+        labels[f_start:f_end] = label
+        v_start, f_start = v_end, f_end
+    return verts, faces, labels
+
+
+def dumpFromRenderer(renderer, obj_pb_ids):
+    verts, faces, _ = exportRendererMesh(renderer, {obj_pb_id: 0 for obj_pb_id in obj_pb_ids})
+    return verts, faces
+
+
+def getIgAcousticMeshCacheKey(scene):
+    """
+    Key of the acoustic mesh of an iGibson scene: the scene URDF, the optional pybullet state file and the loaded
+    object set (see InteractiveIndoorScene.get_load_key_parts), which determine the shapes and poses of the exported
+    objects, so the key is computed without walking the renderer
+
+    :param scene: InteractiveIndoorScene
+    :return: hex digest string
+    """
+    return hash_key(
+        ACOUSTIC_MESH_CACHE_VERSION,
+        scene.scene_id,
+        iGibsonToResonanceMaterialMap,
+        *scene.get_load_key_parts(),
+    )
+
+
+def getIgAcousticMesh(simulator, use_cache=True):
+    """
+    Build the acoustic mesh of an iGibson scene from the large, static objects used for reverb/reflection baking
+
+    :param simulator: Simulator with an InteractiveIndoorScene imported
+    :param use_cache: reuse the mesh exported for the same scene in memory or in the iGibson cache
+    :return: AcousticMesh with flat float32 vertices and int32 faces and materials, ready for audio.LoadMesh
+    """
+    body_id_to_category = {}
+    for category in iGibsonToResonanceMaterialMap:
         for obj in simulator.scene.objects_by_category[category]:
-            for id in obj.get_body_ids():
-                obj_verts, obj_faces = dumpFromRenderer(simulator.renderer, [id])
-                mat.extend([ResonanceMaterialToId[iGibsonToResonanceMaterialMap[category]]] * len(obj_faces))
-                vert.extend(obj_verts)
-                face.extend(obj_faces)
-   
-    vert, face = np.asarray(vert), np.asarray(face)
-    vert_flattened = np.empty((vert.size,), dtype=vert.dtype)
-    vert_flattened[0::3] = vert[:,0]
-    vert_flattened[1::3] = vert[:,1]
-    vert_flattened[2::3] = vert[:,2]
-
-    face_flattened = np.empty((face.size,), dtype=face.dtype)
-    face_flattened[0::3] = face[:,0]
-    face_flattened[1::3] = face[:,1]
-    face_flattened[2::3] = face[:,2]
-
-    material_indices = np.asarray(mat)
+            for body_id in obj.get_body_ids():
+                body_id_to_category[body_id] = category
+
+    cache_path, entry = None, None
+    if use_cache:
+        key = getIgAcousticMeshCacheKey(simulator.scene)
+        entry = _acoustic_mesh_cache.get(key)
+        if entry is None:
+            cache_path = os.path.join(
+                get_cache_dir("acoustic_meshes"), "{}_{}.npz".format(simulator.scene.scene_id, key)
+            )
+            entry = load_npz(cache_path)
+            if entry is not None:
+                _acoustic_mesh_cache[key] = entry
+
+    if entry is None:
+        body_id_to_material = {
+            body_id: ResonanceMaterialToId[iGibsonToResonanceMaterialMap[category]]
+            for body_id, category in body_id_to_category.items()
+        }
+        verts, faces, materials = exportRendererMesh(simulator.renderer, body_id_to_material)
+        entry = {"verts": verts.ravel(), "faces": faces.ravel(), "materials": materials}
+        if use_cache:
+            _acoustic_mesh_cache[key] = entry
+            atomic_save_npz(cache_path, **entry)
+
     mesh = AcousticMesh()
-    mesh.faces = face_flattened
-    mesh.verts = vert_flattened
-    mesh.materials = material_indices
+    mesh.faces = entry["faces"]
+    mesh.verts = entry["verts"]
+    mesh.materials = entry["materials"]
     return mesh
 
+
 # Main simply exercises code and puts colored cubes to verify material segmentation
 if __name__=="__main__":
     s = Simulator(mode='iggui', image_width=512, image_height=512)
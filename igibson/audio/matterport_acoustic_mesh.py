@@ -4,10 +4,14 @@ from igibson.simulator import Simulator
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene, StaticIndoorScene
 from PIL import Image
 from igibson.objects import cube
+from igibson.utils.cache_utils import atomic_save_npz, get_cache_dir, hash_key, load_npz
 import csv
+import logging
 import os
 import numpy as np
 
+log = logging.getLogger(__name__)
+
 Image.MAX_IMAGE_PIXELS = 1000000000  
 
 MatterportToResonanceMaterialMap = {
@@ -35,9 +39,15 @@ MatterportToResonanceMaterialMap = {
 	"lighting": "GlassThin",
 }
 
-def buildMatterportCategories():
+# Semantic class id to Matterport category table, bundled with the audio module
+CATEGORY_MAPPING_FN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "category_mapping.tsv")
+# Bump whenever the face classification or the layout of the stored materials changes
+ACOUSTIC_MATERIALS_VERSION = 1
+ACOUSTIC_MATERIALS_FN = "acoustic_materials.npz"
+
+def buildMatterportCategories(mapping_fn=CATEGORY_MAPPING_FN):
     matterportSemanticClassToCategory = {}
-    with open("/viscam/u/li2053/iGibson-dev/igibson/audio/category_mapping.tsv") as fd:
+    with open(mapping_fn) as fd:
         rd = csv.reader(fd, delimiter="\t", quotechar='"')
         for i, row in enumerate(rd):
             if i > 0:
@@ -45,71 +55,125 @@ def buildMatterportCategories():
     return matterportSemanticClassToCategory
 
 def classesToMaterials(classes):
-    materials = []
+    # every category is mapped once, then broadcast to its faces
+    categories, face_category_idx = np.unique(np.asarray(classes), return_inverse=True)
+    num_faces = np.bincount(face_category_idx, minlength=len(categories))
+    category_materials = np.empty(len(categories), dtype=np.int32)
     unknowns = {}
-    mapped_faces = 0
-    for c in classes:
+    for i, c in enumerate(categories):
         if c in MatterportToResonanceMaterialMap:
-            res_material = MatterportToResonanceMaterialMap[c]
-            materials.append(ResonanceMaterialToId[res_material])
-            mapped_faces += 1
+            category_materials[i] = ResonanceMaterialToId[MatterportToResonanceMaterialMap[c]]
         else:
-            materials.append(ResonanceMaterialToId["Uniform"])
-            if c in unknowns:
-                unknowns[c] += 1
-            else:
-                unknowns[c] = 1
+            category_materials[i] = ResonanceMaterialToId["Uniform"]
+            unknowns[str(c)] = int(num_faces[i])
+    mapped_faces = len(face_category_idx) - sum(unknowns.values())
     biggest_unknowns = sorted(unknowns, key=unknowns.get, reverse=True)
-    print("Acoustic mapping successful for {}% of mesh".format(mapped_faces * 100 / len(classes)))
+    print("Acoustic mapping successful for {}% of mesh".format(mapped_faces * 100 / len(face_category_idx)))
     if len(biggest_unknowns) > 0:
         print("Unmapped Matterport classes found, substituting with transparent, printing largest 10")
         for i in range(min(10, len(biggest_unknowns))):
             print("  Class: " + biggest_unknowns[i] + "  Num faces: " + str(unknowns[biggest_unknowns[i]]))
-    return np.asarray(materials)
+    return category_materials[face_category_idx]
+
+def texcoordsToClassIds(sem_map, texcoords):
+    """
+    Decode the semantic class id of many vertices at once
+
+    :param sem_map: (H, W, 3+) semantic texture, already divided by 16
+    :param texcoords: (N, 2) uv coordinates of the vertices
+    :return: (N,) class ids, -1 for uv coordinates outside of the texture
+    """
+    u, v = texcoords[:, 0], texcoords[:, 1]
+    valid = (u >= 0) & (v >= 0) & (u <= 1) & (v <= 1)
+    # Convert uv coordinates to pixel locations, astype truncates towards zero like int()
+    pixel_x = ((1 - v[valid]) * sem_map.shape[1] - 0.1).astype(np.int64)
+    pixel_y = (u[valid] * sem_map.shape[0] - 0.1).astype(np.int64)
+    # Decode pixel rgb to class ID
+    rgb = sem_map[pixel_x, pixel_y, :3].astype(np.int64)
+    class_ids = np.full(len(texcoords), -1, dtype=np.int64)
+    class_ids[valid] = rgb[:, 0] + rgb[:, 1] * 16 + rgb[:, 2] * 16 * 16
+    return class_ids
 
-def getMatterportAcousticMesh(s, sem_map_fn):
-    sem_map_img = Image.open(sem_map_fn)
-    sem_map = np.array(sem_map_img) // 16
+def majorityVote(vertex_classes):
+    """
+    :param vertex_classes: (F, 3) classes of the vertices of every face
+    :return: (F,) class of every face, the one shared by at least two vertices, else the one of the first vertex
+    """
+    face_classes = vertex_classes[:, 0].copy()
+    second_and_third_agree = (vertex_classes[:, 1] == vertex_classes[:, 2]) & (
+        vertex_classes[:, 0] != vertex_classes[:, 1]
+    )
+    face_classes[second_and_third_agree] = vertex_classes[second_and_third_agree, 1]
+    return face_classes
 
+def classifyMatterportFaces(sem_map_fn, texcoords):
+    """
+    Compute the ResonanceAudio material of every face of a Matterport mesh
+
+    :param sem_map_fn: path to the semantic texture of the scene
+    :param texcoords: (3F, 2) uv coordinates of the vertices of the F faces
+    :return: (F,) int32 material ids
+    """
+    sem_map = np.array(Image.open(sem_map_fn)) // 16
     categoryMap = buildMatterportCategories()
-    verts, faces, classes = [], [], []
+    face_class_ids = majorityVote(texcoordsToClassIds(sem_map, texcoords).reshape(-1, 3))
+    # every class id is looked up once
+    class_ids, face_class_idx = np.unique(face_class_ids, return_inverse=True)
+    class_categories = np.array([categoryMap.get(c, "undefined") for c in class_ids.tolist()])
+    return classesToMaterials(class_categories[face_class_idx])
+
+def getMatterportAcousticMesh(s, sem_map_fn, use_cache=True):
+    """
+    Build the acoustic mesh of a Matterport scene, classifying every face with the semantic texture of the scene.
+    The materials are stored next to the semantic texture (or in the iGibson cache if that directory is read-only)
+    and reused as long as the texture, the mesh texture coordinates and the material map are unchanged.
 
+    :param s: Simulator with a StaticIndoorScene imported
+    :param sem_map_fn: path to the semantic texture of the scene
+    :param use_cache: reuse and store the computed materials
+    :return: AcousticMesh
+    """
     #iterate over data already loaded by renderer rather than re-loading all of this
-    for vertex_data in s.renderer.vertex_data:
-        vertex_positions = vertex_data[:,0:3]
-        texcoords = vertex_data[:,6:8]
-        for i in range(0, texcoords.shape[0], 3):
-            classes_for_face = []
-            for offset in range(3):
-                # Convert uv coordinates to pixel location
-                u =  texcoords[i+offset,0]
-                v = texcoords[i+offset,1]
-                if u < 0 or v < 0 or u > 1 or v > 1:
-                    vertex_class = -1
-                else:
-                    pixel_x = int((1-v) * sem_map.shape[1] - 0.1) 
-                    pixel_y = int(u * sem_map.shape[0] - 0.1)
-                    # Get pixel values
-                    vertex_class_rgb = sem_map[pixel_x, pixel_y]
-                    #Decode pixel rgb to class ID
-                    vertex_class = int(np.round(vertex_class_rgb[0]) + \
-                                        np.round(vertex_class_rgb[1]) * 16.0 + \
-                                        np.round(vertex_class_rgb[2] * 16.0 * 16.0))
-                classes_for_face.append(vertex_class)
-            # majority vote for face class from vertex classes
-            face_class = max(set(classes_for_face), key = classes_for_face.count)
-            classes.append(categoryMap.get(face_class, "undefined"))
-        faces.extend(list(range(len(faces), len(faces) + len(vertex_positions))))
-        vert_flattened = np.empty((vertex_positions.size,), dtype=vertex_positions.dtype)
-        vert_flattened[0::3] = vertex_positions[:,0]
-        vert_flattened[1::3] = vertex_positions[:,1]
-        vert_flattened[2::3] = vertex_positions[:,2]
-        verts.extend(vert_flattened)
-    materials = classesToMaterials(classes)
+    vertex_data = np.concatenate(s.renderer.vertex_data, axis=0)
+    verts = np.ascontiguousarray(vertex_data[:, 0:3]).ravel()
+    texcoords = np.ascontiguousarray(vertex_data[:, 6:8])
+    # the renderer mesh is not indexed, every 3 consecutive vertices form a face
+    faces = np.arange(len(vertex_data), dtype=np.int32)
+
+    materials, cache_paths, key = None, [], None
+    if use_cache:
+        sem_map_stat = os.stat(sem_map_fn)
+        key = hash_key(
+            ACOUSTIC_MATERIALS_VERSION,
+            os.path.abspath(sem_map_fn),
+            sem_map_stat.st_mtime_ns,
+            sem_map_stat.st_size,
+            texcoords,
+            sorted(MatterportToResonanceMaterialMap.items()),
+        )
+        cache_paths = [
+            os.path.join(os.path.dirname(os.path.abspath(sem_map_fn)), ACOUSTIC_MATERIALS_FN),
+            os.path.join(get_cache_dir("acoustic_meshes"), "matterport_{}.npz".format(key)),
+        ]
+        for cache_path in cache_paths:
+            entry = load_npz(cache_path)
+            if entry is not None and str(entry["key"]) == key:
+                log.info("Loaded acoustic materials from {}".format(cache_path))
+                materials = entry["materials"]
+                break
+
+    if materials is None:
+        materials = classifyMatterportFaces(sem_map_fn, texcoords)
+        for cache_path in cache_paths:
+            try:
+                atomic_save_npz(cache_path, key=np.array(key), materials=materials)
+                break
+            except OSError as e:
+                log.warning("Cannot store acoustic materials to {}: {}".format(cache_path, e))
 
     mesh = AcousticMesh()
-    mesh.verts = np.asarray(verts)
-    mesh.faces = np.asarray(faces)
+    mesh.verts = verts
+    mesh.faces = faces
     mesh.materials = materials
 
     return mesh
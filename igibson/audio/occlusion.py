@@ -0,0 +1,73 @@
+import numpy as np
+import pybullet as p
+
+# Maximum number of occluders counted along one source->listener segment
+MAX_OCCLUSION_HITS = 12
+
+
+class OcclusionEngine(object):
+    """
+    Counts the occluders between audio sources and listeners.
+    All source->listener segments of a step are resolved together: every pybullet query is one rayTestBatch over
+    all segments that still have hits left, asking for their n-th hit. A step therefore costs at most
+    MAX_OCCLUSION_HITS pybullet round trips (and a single one when nothing is occluded), independently of the
+    number of sources, instead of up to MAX_OCCLUSION_HITS round trips per source.
+    """
+
+    def __init__(
+        self, always_count_ids=(), single_hit_per_obj=False, max_hits=MAX_OCCLUSION_HITS, fraction_epsilon=0.01
+    ):
+        """
+        :param always_count_ids: body ids counted on every hit even with single_hit_per_obj, e.g. walls sharing an id
+        :param single_hit_per_obj: only count the first hit with every other body, to avoid double-counting objects
+        :param max_hits: maximum number of hits queried along each segment
+        :param fraction_epsilon: pybullet fractionEpsilon, merges hits closer than this fraction of the ray length
+        """
+        self.always_count_ids = set(always_count_ids)
+        self.single_hit_per_obj = single_hit_per_obj
+        self.max_hits = max_hits
+        self.fraction_epsilon = fraction_epsilon
+
+    def count_occluders(self, source_ids, source_positions, listener_positions):
+        """
+        Count the occluders between each source and its listener
+
+        :param source_ids: pybullet body ids of the sources, hits with the source itself are ignored
+        :param source_positions: (N, 3) source positions
+        :param listener_positions: (3,) listener position shared by all sources, or (N, 3) one listener per source
+        :return: (N,) integer array of occluder counts
+        """
+        num_rays = len(source_ids)
+        counts = np.zeros(num_rays, dtype=np.int32)
+        if num_rays == 0:
+            return counts
+
+        ray_from = np.asarray(source_positions, dtype=np.float64).reshape(num_rays, 3)
+        ray_to = np.broadcast_to(np.asarray(listener_positions, dtype=np.float64), (num_rays, 3))
+        hit_objects = [set() for _ in range(num_rays)]
+        active = list(range(num_rays))
+
+        for hit_num in range(self.max_hits):
+            results = p.rayTestBatch(
+                ray_from[active].tolist(),
+                ray_to[active].tolist(),
+                reportHitNumber=hit_num,
+                fractionEpsilon=self.fraction_epsilon,
+            )
+            still_active = []
+            for ray, result in zip(active, results):
+                hit_id = result[0]
+                if hit_id == -1:
+                    # no more hits along this segment
+                    continue
+                if hit_id != source_ids[ray]:
+                    if hit_id not in hit_objects[ray]:
+                        counts[ray] += 1
+                    if self.single_hit_per_obj and hit_id not in self.always_count_ids:
+                        hit_objects[ray].add(hit_id)
+                still_active.append(ray)
+            active = still_active
+            if not active:
+                break
+
+        return counts
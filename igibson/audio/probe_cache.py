@@ -0,0 +1,83 @@
+import logging
+import os
+
+import numpy as np
+
+import igibson.audio.default_config as config
+from igibson.audio import audio
+from igibson.utils.cache_utils import atomic_save_npz, get_cache_dir, hash_key, load_npz
+
+log = logging.getLogger(__name__)
+
+# Bump whenever the layout of the cached arrays or the probe baking changes
+PROBE_CACHE_VERSION = 1
+
+
+class ReverbProbeCache(object):
+    """
+    Persistent on-disk cache of baked reverb/reflection probes.
+    An entry stores the reflection and reverb properties ResonanceAudio computed for every probe of a scene, so that
+    a warm start can register the probes directly instead of ray-tracing the acoustic mesh again.
+    Entries are keyed by the scene id, the acoustic mesh (geometry and the per-face ResonanceAudio materials the
+    category-to-material map produced), the probe positions and the ray-tracing parameters, so any change to these
+    invalidates the entry.
+    """
+
+    def __init__(
+        self,
+        scene_id,
+        acoustic_mesh,
+        probe_positions,
+        probe_params=config.REV_PROBE_PARAMS,
+        scattering_coefficient=config.REV_PROBE_SCATTERING_COEFFICIENT,
+        cache_dir=None,
+    ):
+        """
+        :param scene_id: scene id, only used to make cache entries human readable
+        :param acoustic_mesh: AcousticMesh used to bake the probes
+        :param probe_positions: (N, 3) array of probe positions, in registration order
+        :param probe_params: ray-tracing parameters passed to RegisterReverbProbe
+        :param scattering_coefficient: scattering coefficient passed to LoadMesh
+        :param cache_dir: directory of the cache, defaults to <igibson.cache_path>/reverb_probes
+        """
+        if cache_dir is None:
+            cache_dir = get_cache_dir("reverb_probes")
+        self.key = hash_key(
+            PROBE_CACHE_VERSION,
+            str(scene_id),
+            np.asarray(acoustic_mesh.verts),
+            np.asarray(acoustic_mesh.faces),
+            np.asarray(acoustic_mesh.materials),
+            np.asarray(probe_positions, dtype=np.float64),
+            list(probe_params),
+            float(scattering_coefficient),
+        )
+        self.path = os.path.join(cache_dir, "{}_{}.npz".format(scene_id, self.key))
+
+    def load(self, probe_keys):
+        """
+        Register all probes from the cache
+
+        :param probe_keys: probe names, in registration order
+        :return: whether the cache entry existed and all probes were registered from it
+        """
+        entry = load_npz(self.path)
+        if entry is None:
+            return False
+        if list(entry["keys"]) != list(probe_keys):
+            log.warning("Reverb probe cache entry {} does not match the requested probes, rebaking".format(self.path))
+            return False
+        for key, properties in zip(probe_keys, entry["properties"]):
+            audio.SetReverbProbe(key, properties.tolist())
+        log.info("Loaded {} reverb probes from {}".format(len(probe_keys), self.path))
+        return True
+
+    def save(self, probe_keys):
+        """
+        Store the properties of the already registered probes
+
+        :param probe_keys: probe names, in registration order
+        """
+        properties = np.array([audio.GetReverbProbe(key) for key in probe_keys], dtype=np.float32)
+        atomic_save_npz(self.path, keys=np.array(probe_keys), properties=properties)
+        log.info("Saved {} reverb probes to {}".format(len(probe_keys), self.path))
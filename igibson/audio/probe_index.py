@@ -0,0 +1,100 @@
+import logging
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+log = logging.getLogger(__name__)
+
+
+class ReverbProbeIndex(object):
+    """
+    Spatial index of the reverb/reflection probes of a scene.
+    Probes are grouped by floor and every floor gets a KD-tree over the 2D probe positions, built once when the probes
+    are registered, so that finding the closest probe does not scan every probe of the floor.
+    """
+
+    def __init__(self, floor_heights, probe_key_to_pos_by_floor):
+        """
+        :param floor_heights: heights of the floors of the scene, in increasing order
+        :param probe_key_to_pos_by_floor: list with, for every floor, a dict from probe key to its 2D position
+        """
+        self.floor_heights = np.asarray(floor_heights, dtype=np.float64)
+        self.keys_by_floor, self.positions_by_floor, self.trees = [], [], []
+        self.key_to_floor_and_index = {}
+        for floor, probe_key_to_pos in enumerate(probe_key_to_pos_by_floor):
+            keys = list(probe_key_to_pos.keys())
+            for i, key in enumerate(keys):
+                self.key_to_floor_and_index[key] = (floor, i)
+            positions = np.array([probe_key_to_pos[key][:2] for key in keys], dtype=np.float64).reshape(-1, 2)
+            self.keys_by_floor.append(keys)
+            self.positions_by_floor.append(positions)
+            self.trees.append(cKDTree(positions) if len(keys) > 0 else None)
+
+    def get_floors(self, z):
+        """
+        Get the floor of each height: the highest floor whose height is not above it
+
+        :param z: height or array of heights
+        :return: floor number or array of floor numbers
+        """
+        floors = np.searchsorted(self.floor_heights, z, side="right") - 1
+        if np.any(floors < 0):
+            log.warning("Floor height error, cannot match closest reverb probe")
+        return np.clip(floors, 0, len(self.trees) - 1)
+
+    def query(self, positions):
+        """
+        Find the closest probe of many positions at once
+
+        :param positions: (N, 3) array of positions
+        :return: (N,) floor numbers, (N,) index of the closest probe in its floor, (N,) distance to that probe
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        floors = self.get_floors(positions[:, 2])
+        probe_idx = np.full(len(positions), -1, dtype=np.int64)
+        dists = np.full(len(positions), np.inf)
+        for floor in np.unique(floors):
+            if self.trees[floor] is None:
+                continue
+            on_floor = floors == floor
+            dists[on_floor], probe_idx[on_floor] = self.trees[floor].query(positions[on_floor, :2])
+        return floors, probe_idx, dists
+
+    def get_closest_probes(self, positions):
+        """
+        Get the key of the closest probe of many positions at once
+
+        :param positions: (N, 3) array of positions
+        :return: list of N probe keys (None where the floor has no probes)
+        """
+        floors, probe_idx, _ = self.query(positions)
+        keys = []
+        for floor, idx in zip(floors.tolist(), probe_idx.tolist()):
+            keys.append(self.keys_by_floor[floor][idx] if idx >= 0 else None)
+        return keys
+
+    def get_closest_probe(self, pos, current_key=None, hysteresis=0.0):
+        """
+        Get the key of the closest probe of one position.
+        With a current probe and a hysteresis margin, the current probe is kept until another probe of the same
+        floor is closer by more than the margin, so that a listener standing on a cell boundary does not keep
+        switching room properties back and forth.
+
+        :param pos: position [x, y, z]
+        :param current_key: key of the probe currently in use
+        :param hysteresis: margin in meters
+        :return: probe key
+        """
+        floors, probe_idx, dists = self.query(pos)
+        floor, idx, dist = floors[0], probe_idx[0], dists[0]
+        if idx < 0:
+            return None
+        closest_key = self.keys_by_floor[floor][idx]
+        if current_key is None or current_key == closest_key or hysteresis <= 0:
+            return closest_key
+        current_floor, current_idx = self.key_to_floor_and_index.get(current_key, (None, None))
+        if current_floor == floor:
+            current_pos = self.positions_by_floor[floor][current_idx]
+            if np.linalg.norm(current_pos - np.asarray(pos[:2], dtype=np.float64)) <= dist + hysteresis:
+                return current_key
+        return closest_key
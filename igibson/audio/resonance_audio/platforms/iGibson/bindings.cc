@@ -21,6 +21,9 @@
 #include <iostream>
 #include <fstream>
 #include <chrono>
+#include <stdexcept>
+#include <string>
+#include <vector>
 
 #include "utils/wav.h"
 
@@ -180,8 +183,35 @@ namespace igibson {
         return output_py; 
     }
 
+    // ResonanceAudio systems rendering the same scene for different listeners. Every system has its own sources,
+    // listener pose and room properties; all the other bindings act on the selected one, |resonance_audio|.
+    std::vector<std::shared_ptr<ResonanceAudioSystem>> listener_systems;
+    int system_sample_rate = 0;
+    int system_frames_per_buffer = 0;
+
     void InitializeSystem(int frames_per_buffer, int sample_rate) {
         Initialize(sample_rate, 2, frames_per_buffer);
+        system_sample_rate = sample_rate;
+        system_frames_per_buffer = frames_per_buffer;
+        listener_systems.assign(1, resonance_audio);
+    }
+
+    int AddListenerSystem() {
+        if (listener_systems.empty()) {
+            throw std::runtime_error("InitializeSystem must be called before AddListenerSystem");
+        }
+        auto system = std::make_shared<ResonanceAudioSystem>(system_sample_rate, kNumOutputChannels, system_frames_per_buffer);
+        // Baked probes are shared by all listeners of the scene
+        system->room_to_reflection_and_reverb = listener_systems[0]->room_to_reflection_and_reverb;
+        listener_systems.push_back(system);
+        return static_cast<int>(listener_systems.size()) - 1;
+    }
+
+    void SelectListenerSystem(int index) {
+        if (index < 0 || index >= static_cast<int>(listener_systems.size())) {
+            throw std::out_of_range("Invalid listener system index " + std::to_string(index));
+        }
+        resonance_audio = listener_systems[index];
     }
 
     void DisableRoomEffects() {
@@ -190,6 +220,7 @@ namespace igibson {
 
     void ShutdownSystem() {
         DeleteSceneManager();
+        listener_systems.clear();
         Shutdown();
     }
 
@@ -263,6 +294,49 @@ namespace igibson {
         SetRoomReflectionAndReverb(reflection_and_reverb.first, reflection_and_reverb.second);
     }
 
+    // Flattens the baked reflection and reverb properties of a probe so that they can be cached on disk.
+    // Layout: room_position[3], room_rotation[4], room_dimensions[3], cutoff_frequency, coefficients[6],
+    // reflection gain, rt60_values[9], reverb gain.
+    std::vector<float> GetReverbProbe(const std::string &room) {
+        const auto &reflection_and_reverb = resonance_audio->room_to_reflection_and_reverb.at(room);
+        const ReflectionProperties &reflection = reflection_and_reverb.first;
+        const ReverbProperties &reverb = reflection_and_reverb.second;
+
+        std::vector<float> properties;
+        properties.reserve(kNumReverbProbeProperties);
+        properties.insert(properties.end(), reflection.room_position, reflection.room_position + 3);
+        properties.insert(properties.end(), reflection.room_rotation, reflection.room_rotation + 4);
+        properties.insert(properties.end(), reflection.room_dimensions, reflection.room_dimensions + 3);
+        properties.push_back(reflection.cutoff_frequency);
+        properties.insert(properties.end(), reflection.coefficients, reflection.coefficients + 6);
+        properties.push_back(reflection.gain);
+        properties.insert(properties.end(), reverb.rt60_values, reverb.rt60_values + 9);
+        properties.push_back(reverb.gain);
+        return properties;
+    }
+
+    // Registers a probe from properties previously returned by GetReverbProbe, skipping the ray-tracing.
+    void SetReverbProbe(const std::string &room, const std::vector<float> &properties) {
+        if (properties.size() != kNumReverbProbeProperties) {
+            throw std::invalid_argument("Reverb probe [" + room + "] expects " +
+                                        std::to_string(kNumReverbProbeProperties) + " properties, got " +
+                                        std::to_string(properties.size()));
+        }
+        ReflectionProperties reflection;
+        ReverbProperties reverb;
+        auto it = properties.begin();
+        std::copy(it, it + 3, reflection.room_position); it += 3;
+        std::copy(it, it + 4, reflection.room_rotation); it += 4;
+        std::copy(it, it + 3, reflection.room_dimensions); it += 3;
+        reflection.cutoff_frequency = *it++;
+        std::copy(it, it + 6, reflection.coefficients); it += 6;
+        reflection.gain = *it++;
+        std::copy(it, it + 9, reverb.rt60_values); it += 9;
+        reverb.gain = *it++;
+
+        resonance_audio->room_to_reflection_and_reverb[room] = std::make_pair(reflection, reverb);
+    }
+
     int InitializeSource(py::array_t<float> source_pos, float min_distance, float max_distance, float source_gain, float near_field_gain, float room_effects_gain) {
         ResonanceAudioApi::SourceId source_id = CreateSoundObject(RenderingMode::kBinauralHighQuality, min_distance, max_distance);
 
@@ -358,6 +432,10 @@ namespace igibson {
 
         m.def("InitializeSystem", &InitializeSystem, py::return_value_policy::automatic, py::call_guard<py::scoped_ostream_redirect,
                 py::scoped_estream_redirect>());
+        m.def("AddListenerSystem", &AddListenerSystem, py::call_guard<py::scoped_ostream_redirect,
+                py::scoped_estream_redirect>());
+        m.def("SelectListenerSystem", &SelectListenerSystem, py::call_guard<py::scoped_ostream_redirect,
+                py::scoped_estream_redirect>());
         m.def("DisableRoomEffects", &DisableRoomEffects, py::return_value_policy::automatic, py::call_guard<py::scoped_ostream_redirect,
                 py::scoped_estream_redirect>());
 
@@ -400,6 +478,10 @@ namespace igibson {
                 py::scoped_estream_redirect>());
         m.def("SetRoomPropertiesFromProbe", &SetRoomPropertiesFromProbe, py::call_guard<py::scoped_ostream_redirect,
                 py::scoped_estream_redirect>());
+        m.def("GetReverbProbe", &GetReverbProbe, py::call_guard<py::scoped_ostream_redirect,
+                py::scoped_estream_redirect>());
+        m.def("SetReverbProbe", &SetReverbProbe, py::call_guard<py::scoped_ostream_redirect,
+                py::scoped_estream_redirect>());
 
         m.def("ProcessSourceAndListener", &ProcessSourceAndListener, py::call_guard<py::scoped_ostream_redirect,
                 py::scoped_estream_redirect>());
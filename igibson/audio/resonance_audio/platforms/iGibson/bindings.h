@@ -22,8 +22,17 @@ py::array_t<int16> InitializeFromMeshAndTest(int num_vertices, int num_triangles
     py::array_t<int> material_indices,
     float scattering_coefficient, const char* fName, py::array_t<float> source_location, py::array_t<float> head_pos);
 
+// Number of floats used to serialize the reflection and reverb properties of one probe.
+const size_t kNumReverbProbeProperties = 28;
+
 void InitializeSystem(int frames_per_buffer, int sample_rate);
 
+// Creates a ResonanceAudio system for one more listener of the scene and returns its index (0 is the first one).
+int AddListenerSystem();
+
+// Makes all the other functions act on the system of the given listener.
+void SelectListenerSystem(int index);
+
 int InitializeSource(py::array_t<float> source_pos, float min_distance, float max_distance, float source_gain, float near_field_gain, float room_effects_gain);
 
 void SetSourcePosition(int source_id, py::array_t<float> source_pos); 
@@ -33,6 +42,10 @@ void SetListenerPosition(py::array_t<float> listener_pos);
 void SetNearFieldEffectGain(int source_id, float gain);
 
 
+std::vector<float> GetReverbProbe(const std::string &room);
+
+void SetReverbProbe(const std::string &room, const std::vector<float> &properties);
+
 py::array_t<int16> ProcessSourceAndListener(int source_id, size_t num_frames, py::array_t<int16> input_arr);
 
 
@@ -17,6 +17,7 @@ from igibson.audio.acoustic_material_mapping import ResonanceMaterialToId
 from igibson.render.viewer import Viewer
 import audio
 import wave
+import soundfile as sf
 import pybullet as p
 import matplotlib.pyplot as plt
 import time
@@ -78,9 +79,10 @@ def renderAndPlot(scene_id, pos, name, reverb_gain, mat_override=None):
     for i in range(int(10.5 / 0.03)):
         s.step()
         audioSystem.step()
-    rendered_audio = audioSystem.complete_output[::2]
-    plotSpectrogram(rendered_audio, name)
     audioSystem.disconnect()
+    # left channel of the recording
+    rendered_audio = sf.read(audioSystem.getAudioFilePath(), dtype='int16')[0][:, 0]
+    plotSpectrogram(rendered_audio, name)
     s.disconnect()
 
     return rendered_audio
@@ -7,7 +7,6 @@ from igibson.objects import cube
 from igibson.utils.utils import parse_config
 from igibson.render.mesh_renderer.mesh_renderer_settings import MeshRendererSettings
 import numpy as np
-import matplotlib.pyplot as plt
 from IPython import embed
 from igibson.utils.mesh_util import ortho
 import cv2
@@ -15,12 +14,8 @@ from igibson.audio.ig_acoustic_mesh import getIgAcousticMesh
 from igibson.audio.matterport_acoustic_mesh import getMatterportAcousticMesh
 from igibson.utils.mesh_util import lookat, mat2xyz, ortho, perspective, quat2rotmat, safemat2quat, xyz2mat, xyzw2wxyz
 from audio_system import AudioSystem
-import librosa
-import librosa.display
+from igibson.audio.audio_field_renderer import AudioFieldRenderer
 
-N_FFT = 512
-librosa_FS = 22050
-freq_bins = np.arange(0, 1 + N_FFT / 2) * librosa_FS / N_FFT
 
 class FakeViewer:
     def __init__(self):
@@ -38,45 +33,32 @@ def pixelToWorld(pxy, map_size, res=0.01):
     x = -1 * (pxy[1] - map_size // 2) * res
     return [x, y]
 
-def compute_stft(signal, signal_sr):
-    hop_length = 160
-    win_length = 400
-    signal_resampled = librosa.resample(signal, signal_sr, librosa_FS)
-    stft = np.abs(librosa.stft(signal_resampled, n_fft=N_FFT, hop_length=hop_length, win_length=win_length))
-    return stft
-    
-def plot_spectrogram(spec, fname="spectrogram.png"):
-    fig, ax = plt.subplots()
-    img = librosa.display.specshow(spec, y_axis='log', x_axis='time', ax=ax, sr=44100, hop_length=160)
-    ax.set_title('Power spectrogram')
-    fig.colorbar(img, ax=ax, format="%+2.0f dB")
-    plt.savefig(fname)
-
-def spec_power(spec):
-    rms = librosa.feature.rms(S=spec, frame_length=512, hop_length=160)
-    avg_rms = np.sum(rms) / np.size(rms)
-    return avg_rms
-
 def img_mtx_to_overlay(overlay):
-    overlay_scaled = overlay.copy()
-    max_val = np.max(overlay[np.nonzero(overlay)])
-    min_val = np.min(overlay[np.nonzero(overlay)])
-    for i in range(overlay_scaled.shape[0]):
-        for j in range(overlay_scaled.shape[1]):
-            if overlay_scaled[i, j] != 0:
-                scaled_val = 255 * (overlay_scaled[i, j] - min_val) / (max_val - min_val)
-                overlay_scaled[i, j] = scaled_val
+    nonzero = overlay != 0
+    max_val = np.max(overlay[nonzero])
+    min_val = np.min(overlay[nonzero])
+    overlay_scaled = np.zeros_like(overlay)
+    overlay_scaled[nonzero] = 255 * (overlay[nonzero] - min_val) / max(max_val - min_val, 1e-12)
 
     overlay_scaled = overlay_scaled.astype(np.uint8)
     overlay_cmap = cv2.applyColorMap(overlay_scaled, cv2.COLORMAP_JET)
     overlay_cmap = cv2.cvtColor(overlay_cmap, cv2.COLOR_RGB2RGBA)
-    for i in range(overlay.shape[0]):
-        for j in range(overlay.shape[1]):
-            if overlay[i, j] == 0:
-                overlay_cmap[i, j] = [0, 0, 0, 0]
+    overlay_cmap[~nonzero] = [0, 0, 0, 0]
 
     return overlay_cmap
 
+def trav_grid_to_image(grid, scene, map_size, res=0.01):
+    # resample a grid aligned with the traversability map into the pixels of the floorplan image (see worldToPixel)
+    pixels = np.arange(map_size) - map_size // 2
+    rows = np.floor(pixels * res / scene.trav_map_resolution + scene.trav_map_size / 2.0).astype(np.int64)
+    cols = np.floor(-pixels * res / scene.trav_map_resolution + scene.trav_map_size / 2.0).astype(np.int64)
+    valid_rows = (rows >= 0) & (rows < scene.trav_map_size)
+    valid_cols = (cols >= 0) & (cols < scene.trav_map_size)
+    img = grid[np.clip(rows, 0, scene.trav_map_size - 1)][:, np.clip(cols, 0, scene.trav_map_size - 1)]
+    img[~valid_rows] = 0
+    img[:, ~valid_cols] = 0
+    return img
+
 def main():
     scene_choices = {
         #"Rs_int": "ig",
@@ -140,42 +122,25 @@ def main():
         frame[depth == 0] = 1.0
         frame = cv2.flip(frame, 0)
         bg = (frame[:, :, 0:3][:, :, ::-1] * 255).astype(np.uint8)
-        overlay = np.zeros((bg.shape[0], bg.shape[1]))
-        occl_overlay = np.zeros((bg.shape[0], bg.shape[1]))
         cv2.imwrite("floorplan/{}.png".format(scene_id), bg)
-        
+
         bg = cv2.cvtColor(bg, cv2.COLOR_RGB2RGBA)
-        max_intensity = -1 * np.inf
-        min_intensity = np.inf
-        max_pt = None
-        for idx, world_point in enumerate(points):
-            fake_viewer.px = world_point[0]
-            fake_viewer.py = world_point[1]
-            fake_viewer.pz = world_point[2] + 0.5
-            intensity = 0
-            for sample in range(10):
-                s.step()
-                audioSystem.step()
-                spectrograms = audioSystem.get_spectrogram()
-                intensity += spec_power(spectrograms[:,:,0])
-                intensity += spec_power(spectrograms[:,:,1])
-            if intensity == 0.0:
-                continue
-
-            if intensity > max_intensity:
-                max_intensity = intensity
-                max_pt = [fake_viewer.px, fake_viewer.py, fake_viewer.pz]
-            min_intensity = min(min_intensity, intensity)
-            px, py = worldToPixel(world_point, map_size, trav_res)
-            square_radius = 30
-            for i in range(-square_radius,square_radius+1):
-                for j in range(-square_radius,square_radius+1):
-                    if overlay[px + i, py + j]:
-                        overlay[px + i, py + j] = (intensity + overlay[px + i, py + j]) / 2
-                        occl_overlay[px + i, py + j] = (occl_overlay[px + i, py + j]+audioSystem.occl_intensity) / 2
-                    else:
-                        overlay[px + i, py + j] = intensity
-                        occl_overlay[px + i, py + j] = audioSystem.occl_intensity
+        listener_points = points.copy()
+        listener_points[:, 2] += 0.5
+        field_renderer = AudioFieldRenderer(audioSystem, num_buffers_per_point=10)
+        intensities, occlusions = field_renderer.render(listener_points)
+        heard = intensities != 0.0
+        listener_points, intensities, occlusions = listener_points[heard], intensities[heard], occlusions[heard]
+
+        max_intensity = np.max(intensities)
+        min_intensity = np.min(intensities)
+        max_pt = listener_points[np.argmax(intensities)].tolist()
+        intensity_grid = field_renderer.rasterize(listener_points, intensities, radius=0.3)
+        occl_grid = field_renderer.rasterize(listener_points, occlusions, radius=0.3)
+        np.save("floorplan/{}_intensity.npy".format(scene_id), intensity_grid)
+        np.save("floorplan/{}_occl.npy".format(scene_id), occl_grid)
+        overlay = trav_grid_to_image(intensity_grid, scene, map_size, trav_res)
+        occl_overlay = trav_grid_to_image(occl_grid, scene, map_size, trav_res)
 
         print("Max RMS = " + str(max_intensity) + " Min RMS = " + str(min_intensity))
         print("Obj 0 at" + str(obj_pos))
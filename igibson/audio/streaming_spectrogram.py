@@ -0,0 +1,192 @@
+import inspect
+
+import librosa
+import numpy as np
+import scipy.signal
+
+# STFT parameters of the audio observation
+N_FFT = 512
+HOP_LENGTH = 160
+WIN_LENGTH = 400
+
+
+def get_stft_window(n_fft=N_FFT, win_length=WIN_LENGTH):
+    """
+    Periodic Hann window zero-padded (centered) to n_fft, as built by librosa.stft
+
+    :param n_fft: FFT size
+    :param win_length: window length
+    :return: (n_fft,) window
+    """
+    window = scipy.signal.get_window("hann", win_length, fftbins=True)
+    lpad = (n_fft - win_length) // 2
+    return np.pad(window, (lpad, n_fft - win_length - lpad), mode="constant")
+
+
+def mean_pool_2x2(x):
+    """
+    2x2 mean pooling over the last two axes, matching skimage.measure.block_reduce(x, (2, 2), np.mean):
+    odd trailing rows/columns are zero-padded and the padding takes part in the mean
+
+    :param x: (..., H, W) array
+    :return: (..., ceil(H / 2), ceil(W / 2)) array
+    """
+    h, w = x.shape[-2:]
+    pad = [(0, 0)] * (x.ndim - 2) + [(0, h % 2), (0, w % 2)]
+    if h % 2 or w % 2:
+        x = np.pad(x, pad, mode="constant")
+    h, w = x.shape[-2:]
+    return x.reshape(x.shape[:-2] + (h // 2, 2, w // 2, 2)).mean(axis=(-3, -1))
+
+
+class StreamingSpectrogram(object):
+    """
+    Sliding-window spectrogram of a multi-channel audio stream: librosa.stft (center=True) of the window of every
+    channel, followed by 2x2 mean pooling and log1p. All channels are transformed in one vectorized FFT call.
+
+    By default the window holds the latest window_len samples pushed, so the output is the same as the full recompute
+    of AudioSystem.get_spectrogram. When the window advanced by a whole number of hops since the last compute(), the
+    STFT columns whose frames lie fully inside both windows are reused and only the columns touching new samples (or
+    the padded edges) are computed; otherwise the whole window is transformed.
+
+    With hop_aligned=True, the window instead ends at the last multiple of hop_length samples pushed so far and the
+    remaining (fewer than hop_length) samples are carried over to the next push. The window then always advances by
+    whole hops, so columns are reused on every push, but it lags the latest sample by up to hop_length - 1 samples
+    and the output differs from the full recompute whenever the pushes are not multiples of hop_length.
+    """
+
+    def __init__(
+        self,
+        num_channels,
+        window_len,
+        n_fft=N_FFT,
+        hop_length=HOP_LENGTH,
+        win_length=WIN_LENGTH,
+        pad_mode=None,
+        hop_aligned=False,
+    ):
+        """
+        :param num_channels: number of audio channels
+        :param window_len: window length in samples
+        :param n_fft: FFT size
+        :param hop_length: hop between STFT frames
+        :param win_length: length of the analysis window
+        :param pad_mode: padding mode of the centered frames, defaults to the one of the installed librosa.stft
+        :param hop_aligned: end the window at the last multiple of hop_length samples pushed, see the class docstring
+        """
+        self.num_channels = num_channels
+        self.window_len = window_len
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.hop_aligned = hop_aligned
+        if pad_mode is None:
+            pad_mode = inspect.signature(librosa.stft).parameters["pad_mode"].default
+        self.pad_mode = pad_mode
+        self.fft_window = get_stft_window(n_fft, win_length)
+
+        pad = n_fft // 2
+        self.num_frames = 1 + window_len // hop_length
+        # frames that do not reach into the centered padding, only these can be reused after a shift
+        self.first_interior_frame = -(-pad // hop_length)
+        self.last_interior_frame = (window_len - pad) // hop_length
+        self.frame_offsets = np.arange(n_fft)
+
+        # samples are appended at the end of the buffer, and the window and the leftover samples are moved back to
+        # the start once it is full, which keeps the window contiguous without shifting it on every push
+        self.buffer = np.zeros((num_channels, 8 * window_len + hop_length))
+        self.end = window_len
+        self.total_samples = 0
+        self.columns = None
+        self.columns_sample = None
+
+    @property
+    def leftover(self):
+        """
+        Number of samples pushed after the end of the window, always less than hop_length and 0 unless hop_aligned
+        """
+        if not self.hop_aligned:
+            return 0
+        return self.total_samples % self.hop_length
+
+    @property
+    def window(self):
+        """
+        (num_channels, window_len) view of the current window. It may be modified in place, in which case
+        invalidate() must be called before the next compute()
+        """
+        window_end = self.end - self.leftover
+        return self.buffer[:, window_end - self.window_len : window_end]
+
+    def push(self, samples):
+        """
+        Append new samples to the stream
+
+        :param samples: (num_channels, n) array
+        """
+        n = samples.shape[1]
+        self.total_samples += n
+        # samples to keep at the end of the buffer: the window and the leftover samples after it
+        need = self.window_len + self.leftover
+        if n >= need:
+            self.buffer[:, :need] = samples[:, -need:]
+            self.end = need
+        else:
+            if self.end + n > self.buffer.shape[1]:
+                keep = need - n
+                self.buffer[:, :keep] = self.buffer[:, self.end - keep : self.end]
+                self.end = keep
+            self.buffer[:, self.end : self.end + n] = samples
+            self.end += n
+
+    def reset(self):
+        """
+        Clear the stream
+        """
+        self.buffer[:] = 0
+        self.end = self.window_len
+        self.total_samples = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop the reusable STFT columns, e.g. after the window was modified in place
+        """
+        self.columns = None
+        self.columns_sample = None
+
+    def compute_stft_magnitude(self):
+        """
+        :return: (num_channels, num_frames, n_fft // 2 + 1) magnitude of the STFT of the current window
+        """
+        window_sample = self.total_samples - self.leftover
+        if self.columns is not None and window_sample == self.columns_sample:
+            return self.columns
+
+        frames = np.arange(self.num_frames)
+        columns = np.empty((self.num_channels, self.num_frames, self.n_fft // 2 + 1))
+        reused = np.zeros(self.num_frames, dtype=bool)
+
+        if self.columns is not None and (window_sample - self.columns_sample) % self.hop_length == 0:
+            k = (window_sample - self.columns_sample) // self.hop_length
+            last_reused_frame = max(self.first_interior_frame - 1, self.last_interior_frame - k)
+            reuse = frames[self.first_interior_frame : last_reused_frame + 1]
+            columns[:, reuse] = self.columns[:, reuse + k]
+            reused[reuse] = True
+
+        to_compute = frames[~reused]
+        if to_compute.size > 0:
+            pad = self.n_fft // 2
+            padded = np.pad(self.window, ((0, 0), (pad, pad)), mode=self.pad_mode)
+            idx = to_compute[:, None] * self.hop_length + self.frame_offsets[None, :]
+            columns[:, to_compute] = np.abs(np.fft.rfft(padded[:, idx] * self.fft_window, axis=-1))
+
+        self.columns = columns
+        self.columns_sample = window_sample
+        return columns
+
+    def compute(self):
+        """
+        :return: (freq, time, num_channels) log1p of the 2x2 mean pooled STFT magnitude of the current window
+        """
+        stft = np.swapaxes(self.compute_stft_magnitude(), 1, 2)
+        return np.moveaxis(np.log1p(mean_pool_2x2(stft)), 0, -1)
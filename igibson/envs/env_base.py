@@ -68,6 +68,7 @@ class BaseEnv(gym.Env):
         self.object_randomization_idx = 0
         self.num_object_randomization_idx = 10
         self.audio_system = None
+        self.dual_resolution_video = self.config.get("dual_resolution_video", False)
 
         default_enable_shadows = False  # What to do if it is not specified in the config file
         enable_shadow = self.config.get("enable_shadow", default_enable_shadows)
@@ -102,13 +103,16 @@ class BaseEnv(gym.Env):
                 use_pb_gui=use_pb_gui,
             )
         else:
+            # with dual resolution video, the simulator renders at policy resolution and switches to the video
+            # resolution only for the frames recorded in videos
+            render_video_resolution = len(self.config["VIDEO_OPTION"]) != 0 and not self.dual_resolution_video
             self.simulator = Simulator(
                 mode=mode,
                 physics_timestep=physics_timestep,
                 render_timestep=action_timestep,
-                image_width=self.config.get("image_width", 128) if len(self.config["VIDEO_OPTION"])==0 \
+                image_width=self.config.get("image_width", 128) if not render_video_resolution \
                                                         else self.config.get("image_width_video", 128),
-                image_height=self.config.get("image_height", 128) if len(self.config["VIDEO_OPTION"])==0 \
+                image_height=self.config.get("image_height", 128) if not render_video_resolution \
                                                         else self.config.get("image_height_video", 128),
                 vertical_fov=self.config.get("vertical_fov", 90),
                 device_idx=device_idx,
@@ -199,6 +203,8 @@ class BaseEnv(gym.Env):
                 merge_fixed_links=self.config.get("merge_fixed_links", True)
                 and not self.config.get("online_sampling", False),
                 include_robots=include_robots,
+                scene_quality_check=self.config.get("scene_quality_check", "cached"),
+                snapshot_path=self.config.get("scene_snapshot_path", None),
             )
             # TODO: Unify the function import_scene and take out of the if-else clauses.
             first_n = self.config.get("_set_first_n_objects", -1)
@@ -259,7 +265,12 @@ class BaseEnv(gym.Env):
                                         is_Viewer=False, writeToFile=self.config.get('AUDIO_DIR', ""), SR = 44100,
                                         occl_multiplier=self.config.get('occl_multiplier', default_audio_config.OCCLUSION_MULTIPLIER),
                                         spectrogram_window_len=self.config.get('spectrogram_window_len', default_audio_config.SPECTROGRAM_WINDOW_LEN),
-                                        renderAmbisonics=self.config.get('ambisonic_sensor', False), stream_input=self.config.get('VR_audio_source', False), is_Sim2Real=self.config.get('is_Sim2Real', False))
+                                        renderAmbisonics=self.config.get('ambisonic_sensor', False), stream_input=self.config.get('VR_audio_source', False), is_Sim2Real=self.config.get('is_Sim2Real', False),
+                                        use_probe_cache=self.config.get('audio_probe_cache', True),
+                                        streaming_spectrogram=self.config.get('streaming_spectrogram', True),
+                                        hop_aligned_spectrogram=self.config.get('hop_aligned_spectrogram', False),
+                                        audio_file_format=self.config.get('audio_file_format', "WAV"),
+                                        rotate_audio_files=self.config.get('rotate_audio_files', False))
 
     def clean(self):
         """
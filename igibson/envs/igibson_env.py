@@ -12,18 +12,17 @@ if ros_path in sys.path:
 import cv2
 sys.path.append('/opt/ros/kinetic/lib/python2.7/dist-packages')
 
-from PIL import Image
 import skimage
 import gym
 import numpy as np
 import pybullet as p
 from transforms3d.euler import euler2quat
-from igibson.utils.mesh_util import ortho
 
 from igibson import object_states
 from igibson.envs.env_base import BaseEnv
 from igibson.robots.robot_base import BaseRobot
 from igibson.sensors.bump_sensor import BumpSensor
+from igibson.sensors.map_sensor import MapSensor
 from igibson.sensors.scan_sensor import ScanSensor
 from igibson.sensors.vision_sensor import VisionSensor
 from igibson.tasks.behavior_task import BehaviorTask
@@ -37,7 +36,7 @@ from igibson.tasks.reaching_random_task import ReachingRandomTask
 from igibson.tasks.room_rearrangement_task import RoomRearrangementTask
 from igibson.utils.constants import MAX_CLASS_COUNT, MAX_INSTANCE_COUNT
 from igibson.utils.utils import quatToXYZW
-from igibson.agents.savi.utils.dataset import CATEGORIES, CATEGORY_MAP, MAP_SIZE
+from igibson.agents.savi.utils.dataset import CATEGORIES, CATEGORY_MAP
 from igibson.utils.utils import rotate_vector_3d
 from igibson.agents.savi.utils.logs import logger
 log = logging.getLogger(__name__)
@@ -172,6 +171,10 @@ class iGibsonEnv(BaseEnv):
         self.image_height = self.config.get("image_height", 128)
         self.image_width_video = self.config.get("image_width_video", 960)
         self.image_height_video = self.config.get("image_height_video", 960)
+        # recording schedule of dual resolution video: one episode out of video_episode_freq is recorded, one frame
+        # out of video_step_freq of it is rendered at video resolution
+        self.video_episode_freq = self.config.get("video_episode_freq", 1)
+        self.video_step_freq = self.config.get("video_step_freq", 1)
         
         observation_space = OrderedDict()
         sensors = OrderedDict()
@@ -311,6 +314,10 @@ class iGibsonEnv(BaseEnv):
         if len(scan_modalities) > 0:
             sensors["scan_occ"] = ScanSensor(self, scan_modalities)
 
+        map_modalities = [modality for modality in ("top_down", "floorplan_map") if modality in self.output]
+        if len(map_modalities) > 0:
+            sensors["map"] = MapSensor(self, map_modalities)
+
         self.observation_space = gym.spaces.Dict(observation_space)
         self.sensors = sensors
 
@@ -328,6 +335,8 @@ class iGibsonEnv(BaseEnv):
         self.collision_step = 0
         self.current_episode = 0
         self.collision_links = []
+        self.record_video_episode = False
+        self.video_frame = False
 
     def load(self):
         """
@@ -353,7 +362,10 @@ class iGibsonEnv(BaseEnv):
             state["depth_proj"] = np.zeros((100,100, 3))
             for modality in vision_obs:
                 state[modality] = vision_obs[modality]
-            if len(self.config["VIDEO_OPTION"])!=0:
+            if len(self.config["VIDEO_OPTION"])!=0 and self.dual_resolution_video:
+                for modality, obs in self.get_video_vision_obs().items():
+                    state[modality + '_video'] = obs
+            elif len(self.config["VIDEO_OPTION"])!=0:
                 state['depth_video'] = state['depth']
                 state["depth"] = skimage.measure.block_reduce(state["depth"], (10,10,1), np.mean)
                 if "rgb" in state.keys():
@@ -371,20 +383,11 @@ class iGibsonEnv(BaseEnv):
         if 'audio' in self.output:
             state['audio'] = self.audio_system.get_spectrogram()
             
+        # read once for both the top_down and floorplan_map modalities
+        map_obs = self.sensors["map"].get_obs(self) if "map" in self.sensors else {}
         if 'top_down' in self.output:
-            camera_pose = np.array([0, 0, 4.0])
-            view_direction = np.array([0, 0, -1])
-            self.simulator.renderer.set_camera(camera_pose, camera_pose + view_direction, [0, 1, 0])
-            p_range = MAP_SIZE[self.scene_id] / 200.0
-            prevP = self.simulator.renderer.P.copy()
-            self.simulator.renderer.P = ortho(-p_range, p_range, -p_range, p_range, -10, 20.0)
-            frame, three_d = self.simulator.renderer.render(modes=("rgb", "3d"))
-            depth = -three_d[:, :, 2]
-            frame[depth == 0] = 1.0
-            bg = (frame[:, :, 0:3][:, :, ::-1] * 255).astype(np.uint8)
-            state['top_down'] = bg
+            state['top_down'] = map_obs["top_down"]
             state['top_down_video'] = state['top_down']
-            self.simulator.renderer.P = prevP
             
         if 'pose_sensor' in self.output:
             # (x, y, heading, time)
@@ -429,11 +432,33 @@ class iGibsonEnv(BaseEnv):
             state['map_resolution'] = self.scene.trav_map_resolution
             
         if "floorplan_map" in self.output:
-            mapdir = '/viscam/u/wangzz/avGibson/data/ig_dataset/scenes/resized_sem/' + self.scene_id + ".png"
-            state["floorplan_map"] = np.array(Image.open(mapdir))
+            state["floorplan_map"] = map_obs["floorplan_map"]
 
         return state
 
+    def get_video_vision_obs(self):
+        """
+        Get the rgb and depth video frames in dual resolution mode. Frames selected for recording are rendered again
+        at video resolution, the others are blank so that the observations keep their shapes.
+
+        :return: dictionary from modality to video frame
+        """
+        if not self.video_frame:
+            # new arrays every step, consumers may modify or buffer the observations
+            return {
+                modality: np.zeros(self.observation_space[modality + "_video"].shape, dtype=np.float32)
+                for modality in ("rgb", "depth")
+                if modality in self.output
+            }
+
+        renderer = self.simulator.renderer
+        renderer.set_resolution(self.image_width_video, self.image_height_video)
+        try:
+            vision_obs = self.sensors["vision"].get_obs(self)
+        finally:
+            renderer.set_resolution(self.image_width, self.image_height)
+        return {modality: vision_obs[modality] for modality in ("rgb", "depth") if modality in vision_obs}
+
     def run_simulation(self):
         """
         Run simulation for one action timestep (same as one render timestep in Simulator class).
@@ -478,6 +503,8 @@ class iGibsonEnv(BaseEnv):
         """
         info["episode_length"] = self.current_step
         info["collision_step"] = self.collision_step
+        if self.dual_resolution_video:
+            info["video_frame"] = self.video_frame
 
     def step(self, action):
         """
@@ -491,6 +518,7 @@ class iGibsonEnv(BaseEnv):
         :return: info: info dictionary with any useful information
         """
         self.current_step += 1
+        self.video_frame = self.record_video_episode and self.current_step % self.video_step_freq == 0
         if action is not None:
             self.robots[0].apply_action(action)
         collision_links = self.run_simulation()
@@ -505,7 +533,8 @@ class iGibsonEnv(BaseEnv):
         self.populate_info(info)
         
         if done and len(self.config['VIDEO_OPTION'])>0: # generate video
-            self.audio_system.save_audio()
+            # finished in the background, joined at disconnect
+            self.audio_system.save_audio(wait=False)
 
         if done and self.automatic_reset:
             info["last_observation"] = state
@@ -521,13 +550,18 @@ class iGibsonEnv(BaseEnv):
 
         return state, reward, done, info
 
-    def check_collision(self, body_id):
+    def check_collision(self, body_id, step_physics=True, ignore_body_ids=()):
         """
         Check whether the given body_id has collision after one simulator step
 
         :param body_id: pybullet body id
+        :param step_physics: whether to step the simulator and check contact points. Otherwise, the closest points
+            to the bodies overlapping the AABB of body_id are checked in the current state, without simulating
+        :param ignore_body_ids: bodies to ignore when not stepping the simulator, e.g. the other bodies of a robot
         :return: whether the given body_id has collision
         """
+        if not step_physics:
+            return self.check_collision_without_step(body_id, ignore_body_ids)
         self.simulator_step()
         collisions = list(p.getContactPoints(bodyA=body_id))
 
@@ -562,13 +596,33 @@ class iGibsonEnv(BaseEnv):
         # in case the surface is not perfect smooth (has bumps)
         obj.set_position([pos[0], pos[1], stable_z + offset])
 
-    def test_valid_position(self, obj, pos, orn=None):
+    def check_collision_without_step(self, body_id, ignore_body_ids=()):
+        """
+        Check whether the given body_id penetrates or touches another body in the current state, without stepping
+        the simulator
+
+        :param body_id: pybullet body id
+        :param ignore_body_ids: bodies to ignore
+        :return: whether the given body_id has collision
+        """
+        aabbs = np.array([p.getAABB(body_id, link_id) for link_id in range(-1, p.getNumJoints(body_id))])
+        overlapping = p.getOverlappingObjects(aabbs[:, 0].min(axis=0), aabbs[:, 1].max(axis=0)) or []
+        other_body_ids = set(other_id for other_id, _ in overlapping) - set(ignore_body_ids) - {body_id}
+        for other_id in other_body_ids:
+            collisions = p.getClosestPoints(bodyA=body_id, bodyB=other_id, distance=0.0)
+            if len(collisions) > 0:
+                log.debug("bodyA:{}, bodyB:{}, linkA:{}, linkB:{}".format(*collisions[0][1:5]))
+                return True
+        return False
+
+    def test_valid_position(self, obj, pos, orn=None, step_physics=True):
         """
         Test if the robot or the object can be placed with no collision.
 
         :param obj: an instance of robot or object
         :param pos: position
         :param orn: orientation
+        :param step_physics: whether to check collisions by stepping the simulator, see check_collision
         :return: whether the position is valid
         """
         is_robot = isinstance(obj, BaseRobot)
@@ -579,7 +633,10 @@ class iGibsonEnv(BaseEnv):
             obj.reset()
             obj.keep_still()
 
-        has_collision = any(self.check_collision(body_id) for body_id in obj.get_body_ids())
+        body_ids = obj.get_body_ids()
+        has_collision = any(
+            self.check_collision(body_id, step_physics=step_physics, ignore_body_ids=body_ids) for body_id in body_ids
+        )
         return not has_collision
 
     def land(self, obj, pos, orn):
@@ -635,6 +692,8 @@ class iGibsonEnv(BaseEnv):
         if self.texture_randomization_freq is not None:
             if self.current_episode % self.texture_randomization_freq == 0:
                 self.simulator.scene.randomize_texture()
+                if "map" in self.sensors:
+                    self.sensors["map"].invalidate()
 
     def reset(self):
         """
@@ -647,6 +706,12 @@ class iGibsonEnv(BaseEnv):
         self.robots[0].set_position([100.0, 100.0, 100.0])
         self.task.reset(self)
         self.simulator.sync(force_sync=True)
+        self.record_video_episode = (
+            len(self.config["VIDEO_OPTION"]) != 0 and self.current_episode % self.video_episode_freq == 0
+        )
+        self.video_frame = self.record_video_episode
+        if "map" in self.sensors:
+            self.sensors["map"].reset(self)
         state = self.get_state()
         self.reset_variables()
 
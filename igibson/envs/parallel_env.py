@@ -3,13 +3,25 @@ import logging
 import multiprocessing
 import os
 import sys
+import time
 import traceback
+from collections import OrderedDict
+from multiprocessing import connection
 
+import gym
 import numpy as np
 
 import igibson
 from igibson.envs.igibson_env import iGibsonEnv
 
+# Shared memory needs Python 3.8+, observations are sent through the pipes otherwise
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    resource_tracker, shared_memory = None, None
+
+log = logging.getLogger(__name__)
+
 
 class ParallelNavEnv(iGibsonEnv):
     """Batch together environments and simulate them in external processes.
@@ -19,7 +31,9 @@ class ParallelNavEnv(iGibsonEnv):
     access global variables.
     """
 
-    def __init__(self, env_constructors, blocking=False, flatten=False):
+    def __init__(
+        self, env_constructors, blocking=False, flatten=False, use_shared_memory=True, auto_reset=None, min_ready=1.0
+    ):
         """Batch together environments and simulate them in external processes.
         The environments can be different but must use the same action and
         observation specs.
@@ -27,21 +41,47 @@ class ParallelNavEnv(iGibsonEnv):
         :param env_constructors: List of callables that create environments.
         :param blocking: Whether to step environments one after another.
         :param flatten: Boolean, whether to use flatten action and time_steps during
-            communication to reduce overhead.
+            communication to reduce overhead. Unused, kept for compatibility.
+        :param use_shared_memory: Whether workers write the Box entries of their observations into shared memory
+            instead of sending them through the pipe. The observations returned by reset and step are then views
+            of the shared buffers, overwritten by the next reset or step of the same environment. The same goes for
+            info["last_observation"], overwritten by the next episode end of the same environment. Requires Python
+            3.8+, the observations are sent through the pipe on older versions.
+        :param auto_reset: Overrides the automatic_reset of the environments, None to keep their own setting. An
+            environment with automatic_reset resets in its worker as soon as an episode is done, so the step returns
+            the first observation of the next episode, and the last one in info["last_observation"].
+        :param min_ready: Default fraction of the environments step_wait waits for.
         :raise ValueError: If the action or observation specs don't match.
         """
-        self._envs = [ProcessPyEnvironment(ctor, flatten=flatten) for ctor in env_constructors]
+        self._envs = [ProcessPyEnvironment(ctor, flatten=flatten, auto_reset=auto_reset) for ctor in env_constructors]
         self._num_envs = len(env_constructors)
+        self._shared_observations = None
+        self._shared_last_observations = None
+        self._min_ready = min_ready
+        # promises of the environments stepping, by environment index
+        self._pending = OrderedDict()
         self.start()
         self.action_space = self._envs[0].action_space
         self.observation_space = self._envs[0].observation_space
         self._blocking = blocking
         self._flatten = flatten
+        if use_shared_memory and shared_memory is None:
+            log.warning("Shared memory requires Python 3.8+, observations are sent through the pipes")
+            use_shared_memory = False
+        if use_shared_memory:
+            self._shared_observations = SharedObservationBatch(self.observation_space, self._num_envs)
+            self._shared_last_observations = SharedObservationBatch(self.observation_space, self._num_envs)
+            for index, env in enumerate(self._envs):
+                env.share_observations(self._shared_observations, self._shared_last_observations, index)
 
     def start(self):
         """
         Start all children processes
         """
+        # workers share the resource tracker of this process, so that the shared observation buffers they attach
+        # to are not unlinked when a worker exits
+        if resource_tracker is not None:
+            resource_tracker.ensure_running()
         for env in self._envs:
             env.start()
 
@@ -53,6 +93,16 @@ class ParallelNavEnv(iGibsonEnv):
     def batch_size(self):
         return self._num_envs
 
+    @property
+    def observations(self):
+        """Batched observations of the last reset or step of every environment, without copy.
+
+        :return: dictionary of (num_envs, ...) arrays in shared memory, with the Box entries of the observation space
+        """
+        if self._shared_observations is None:
+            return None
+        return self._shared_observations.arrays
+
     @property
     def padded_gt_rt(self):
         batch_gt_rt = list()
@@ -65,6 +115,8 @@ class ParallelNavEnv(iGibsonEnv):
 
         :return: a list of [next_obs, reward, done, info]
         """
+        # results of steps still running are dropped
+        self.step_wait(min_ready=1.0)
         time_steps = [env.reset(self._blocking) for env in self._envs]
         if not self._blocking:
             time_steps = [promise() for promise in time_steps]
@@ -76,16 +128,109 @@ class ParallelNavEnv(iGibsonEnv):
         :param actions: batched action, possibly nested, to apply to the environment.
         :return: a list of [next_obs, reward, done, info]
         """
-        time_steps = [env.step(action, self._blocking) for env, action in zip(self._envs, actions)]
-        # When blocking is False we get promises that need to be called.
-        if not self._blocking:
-            time_steps = [promise() for promise in time_steps]
+        if self._blocking:
+            return [env.step(action, True) for env, action in zip(self._envs, actions)]
+        self.step_async(actions)
+        _, time_steps = self.step_wait(min_ready=1.0)
         return time_steps
 
+    def step_async(self, actions, env_ids=None):
+        """Start stepping some environments without waiting for the results.
+
+        :param actions: actions to apply, one per environment stepped.
+        :param env_ids: indices of the environments to step, all of them by default.
+        :raise RuntimeError: an environment has not returned the result of its previous step yet.
+        """
+        if env_ids is None:
+            env_ids = range(self._num_envs)
+        for env_id, action in zip(env_ids, actions):
+            if env_id in self._pending:
+                raise RuntimeError("Environment {} is still stepping".format(env_id))
+            self._pending[env_id] = self._envs[env_id].step(action, blocking=False)
+
+    def step_wait(self, min_ready=None, timeout=None):
+        """Wait for the results of environments started with step_async.
+        Returns as soon as a fraction of all the environments is ready, together with any other environment already
+        done, so that slow steps and episode resets do not hold back the whole batch. The others keep running and are
+        returned by a later call.
+
+        :param min_ready: fraction of the environments to wait for, defaults to the one given at construction.
+            Capped by the number of environments stepping.
+        :param timeout: maximum time to wait in seconds, None to wait until enough environments are ready.
+        :return: list of indices of the ready environments, and list of their [next_obs, reward, done, info]
+        """
+        if min_ready is None:
+            min_ready = self._min_ready
+        num_ready = min(len(self._pending), max(1, int(np.ceil(min_ready * self._num_envs))))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = {self._envs[env_id].connection: env_id for env_id in self._pending}
+        env_ids = []
+        while len(env_ids) < num_ready:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready = connection.wait(list(waiting), remaining)
+            if not ready:
+                break
+            env_ids += [waiting.pop(conn) for conn in ready]
+        env_ids += [waiting.pop(conn) for conn in connection.wait(list(waiting), 0)]
+        env_ids.sort()
+        return env_ids, [self._pending.pop(env_id)() for env_id in env_ids]
+
     def close(self):
         """Close all external process."""
         for env in self._envs:
             env.close()
+        for shared_observations in [self._shared_observations, self._shared_last_observations]:
+            if shared_observations is not None:
+                shared_observations.close()
+        self._shared_observations = None
+        self._shared_last_observations = None
+
+
+class SharedObservationBatch(object):
+    """Batched observation buffers in shared memory.
+
+    Every Box entry of a Dict observation space gets one (num_envs, ...) array, preallocated from the observation
+    space. Each worker writes its observations in place into its row, so that only small control messages go through
+    the pipes and the parent reads the observations of all environments without unpickling or copying them.
+    """
+
+    def __init__(self, observation_space, num_envs):
+        """
+        :param observation_space: gym.spaces.Dict observation space shared by all environments
+        :param num_envs: number of environments
+        """
+        self.num_envs = num_envs
+        self.shared_memories = {}
+        self.arrays = OrderedDict()
+        for key, space in getattr(observation_space, "spaces", {}).items():
+            if not isinstance(space, gym.spaces.Box):
+                log.debug("Observation {} is not a Box, it is sent through the pipe".format(key))
+                continue
+            shape = (num_envs,) + tuple(space.shape)
+            dtype = np.dtype(space.dtype)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+            self.shared_memories[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def descriptors(self):
+        """
+        :return: dictionary from observation key to (shared memory name, shape, dtype), to attach from the workers
+        """
+        return OrderedDict(
+            (key, (self.shared_memories[key].name, array.shape, array.dtype.str)) for key, array in self.arrays.items()
+        )
+
+    def close(self):
+        """Release the shared memory. Views of the arrays must not be used afterwards."""
+        self.arrays = OrderedDict()
+        for shm in self.shared_memories.values():
+            try:
+                shm.close()
+            except BufferError:
+                # views of the arrays are still referenced, the mapping goes away with them
+                pass
+            shm.unlink()
+        self.shared_memories = {}
 
 
 class ProcessPyEnvironment(object):
@@ -98,8 +243,10 @@ class ProcessPyEnvironment(object):
     _RESULT = 4
     _EXCEPTION = 5
     _CLOSE = 6
+    _SHARE = 7
+    _SHARED_RESULT = 8
 
-    def __init__(self, env_constructor, flatten=False):
+    def __init__(self, env_constructor, flatten=False, auto_reset=None):
         """Step environment in a separate process for lock free paralellism.
 
         The environment is created in an external process by calling the provided
@@ -110,14 +257,20 @@ class ProcessPyEnvironment(object):
         :param env_constructor: callable that creates and returns a Python environment.
         :param flatten: boolean, whether to assume flattened actions and time_steps
         during communication to avoid overhead.
+        :param auto_reset: overrides the automatic_reset of the environment, None to keep its own setting.
         """
         self._env_constructor = env_constructor
         self._flatten = flatten
+        self._auto_reset = auto_reset
+        self._shared_views = {}
+        self._shared_last_views = {}
 
     def start(self):
         """Start the process."""
         self._conn, conn = multiprocessing.Pipe()
-        self._process = multiprocessing.Process(target=self._worker, args=(conn, self._env_constructor, self._flatten))
+        self._process = multiprocessing.Process(
+            target=self._worker, args=(conn, self._env_constructor, self._flatten, self._auto_reset)
+        )
         atexit.register(self.close)
         self._process.start()
         result = self._conn.recv()
@@ -127,6 +280,11 @@ class ProcessPyEnvironment(object):
             raise result
         assert result is self._READY, result
 
+    @property
+    def connection(self):
+        """Connection to the external process, readable when a result is available."""
+        return self._conn
+
     def __getattr__(self, name):
         """Request an attribute from the environment.
         Note that this involves communication with the external process, so it can
@@ -160,6 +318,19 @@ class ProcessPyEnvironment(object):
             pass
         self._process.join(5)
 
+    def share_observations(self, shared_observations, shared_last_observations, index):
+        """Make the external environment write its observations into a row of shared buffers.
+
+        :param shared_observations: SharedObservationBatch of all the environments, for the returned observations
+        :param shared_last_observations: SharedObservationBatch of all the environments, for info["last_observation"]
+        :param index: row of this environment in the batch
+        """
+        descriptors = shared_observations.descriptors(), shared_last_observations.descriptors()
+        self._conn.send((self._SHARE, (descriptors, index)))
+        self._receive()
+        self._shared_views = {key: array[index] for key, array in shared_observations.arrays.items()}
+        self._shared_last_views = {key: array[index] for key, array in shared_last_observations.arrays.items()}
+
     def step(self, action, blocking=True):
         """Step the environment.
 
@@ -200,22 +371,34 @@ class ProcessPyEnvironment(object):
             raise Exception(stacktrace)
         if message == self._RESULT:
             return payload
+        if message == self._SHARED_RESULT:
+            name, result, shared_keys, last_shared_keys = payload
+            obs = result[0] if name == "step" else result
+            for key in shared_keys:
+                obs[key] = self._shared_views[key]
+            for key in last_shared_keys:
+                result[3]["last_observation"][key] = self._shared_last_views[key]
+            return result
         self.close()
         raise KeyError("Received message of unexpected type {}".format(message))
 
-    def _worker(self, conn, env_constructor, flatten=False):
+    def _worker(self, conn, env_constructor, flatten=False, auto_reset=None):
         """The process waits for actions and sends back environment results.
 
         :param conn: connection for communication to the main process.
         :param env_constructor: env_constructor for the OpenAI Gym environment.
         :param flatten: boolean, whether to assume flattened actions and
         time_steps during communication to avoid overhead.
+        :param auto_reset: overrides the automatic_reset of the environment, None to keep its own setting.
 
         :raise KeyError: when receiving a message of unknown type.
         """
+        shared_memories, shared_views, shared_last_views = [], {}, {}
         try:
             np.random.seed()
             env = env_constructor()
+            if auto_reset is not None:
+                env.automatic_reset = auto_reset
             conn.send(self._READY)  # Ready.
             while True:
                 try:
@@ -232,9 +415,31 @@ class ProcessPyEnvironment(object):
                     continue
                 if message == self._CALL:
                     name, args, kwargs = payload
-                    if name == "step" or name == "reset":
-                        result = getattr(env, name)(*args, **kwargs)
-                    conn.send((self._RESULT, result))
+                    result = getattr(env, name)(*args, **kwargs)
+                    if shared_views and name == "reset":
+                        result, shared_keys = self._write_shared_observation(result, shared_views)
+                        conn.send((self._SHARED_RESULT, (name, result, shared_keys, [])))
+                    elif shared_views and name == "step":
+                        obs, reward, done, info = result
+                        obs, shared_keys = self._write_shared_observation(obs, shared_views)
+                        last_shared_keys = []
+                        if isinstance(info, dict) and "last_observation" in info:
+                            # automatic reset: the observation of the terminal step goes into the shared buffers too
+                            info = dict(info)
+                            info["last_observation"], last_shared_keys = self._write_shared_observation(
+                                info["last_observation"], shared_last_views
+                            )
+                        result = (obs, reward, done, info)
+                        conn.send((self._SHARED_RESULT, (name, result, shared_keys, last_shared_keys)))
+                    else:
+                        conn.send((self._RESULT, result))
+                    continue
+                if message == self._SHARE:
+                    (descriptors, last_descriptors), index = payload
+                    shared_memories, shared_views = self._attach_shared_observations(descriptors, index)
+                    last_shared_memories, shared_last_views = self._attach_shared_observations(last_descriptors, index)
+                    shared_memories += last_shared_memories
+                    conn.send((self._RESULT, None))
                     continue
                 if message == self._CLOSE:
                     assert payload is None
@@ -246,8 +451,51 @@ class ProcessPyEnvironment(object):
             message = "Error in environment process: {}".format(stacktrace)
             conn.send((self._EXCEPTION, stacktrace))
         finally:
+            shared_views.clear()
+            shared_last_views.clear()
+            for shm in shared_memories:
+                try:
+                    shm.close()
+                except BufferError:
+                    pass
             conn.close()
 
+    @staticmethod
+    def _attach_shared_observations(descriptors, index):
+        """Attach to the shared observation buffers from the worker process.
+
+        :param descriptors: dictionary from observation key to (shared memory name, shape, dtype)
+        :param index: row of this environment in the batch
+        :return: list of the attached shared memories, dictionary from observation key to the row of this environment
+        """
+        shared_memories, shared_views = [], {}
+        for key, (name, shape, dtype) in descriptors.items():
+            shm = shared_memory.SharedMemory(name=name)
+            shared_memories.append(shm)
+            shared_views[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[index]
+        return shared_memories, shared_views
+
+    @staticmethod
+    def _write_shared_observation(obs, shared_views):
+        """Write the entries of an observation into the shared buffers, in place.
+
+        :param obs: observation dictionary
+        :param shared_views: dictionary from observation key to the row of this environment
+        :return: observation to send through the pipe, with the written entries replaced by None, and their keys
+        """
+        if not isinstance(obs, dict):
+            return obs, []
+        obs = obs.copy()
+        shared_keys = []
+        for key, value in obs.items():
+            view = shared_views.get(key)
+            if view is None or np.shape(value) != view.shape:
+                continue
+            np.copyto(view, value, casting="unsafe")
+            obs[key] = None
+            shared_keys.append(key)
+        return obs, shared_keys
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -4,6 +4,7 @@ import logging
 import math
 import os
 import random
+import tempfile
 import time
 import xml.etree.ElementTree as ET
 
@@ -29,11 +30,15 @@ from igibson.object_states.utils import clear_cached_states
 from igibson.objects.stateful_object import StatefulObject
 from igibson.render.mesh_renderer.materials import ProceduralMaterial, RandomizedMaterial
 from igibson.utils import utils
+from igibson.utils.cache_utils import atomic_publish_dir, get_cache_dir, hash_key
 from igibson.utils.urdf_utils import add_fixed_link, get_base_link_name, round_up, save_urdfs_without_floating_joints
 from igibson.utils.utils import mat_to_quat_pos, rotate_vector_3d
 
 log = logging.getLogger(__name__)
 
+# Bump whenever the processing of the URDFs (scaling, inertial properties, splitting) changes
+URDF_CACHE_VERSION = 1
+
 
 class ArticulatedObject(StatefulObject):
     """
@@ -100,6 +105,7 @@ class URDFObject(StatefulObject):
         bddl_object_scope=None,
         visualize_primitives=False,
         merge_fixed_links=True,
+        use_urdf_cache=True,
         **kwargs,
     ):
         """
@@ -123,6 +129,8 @@ class URDFObject(StatefulObject):
         :param joint_states: joint positions and velocities, keyed by body index and joint name, in the form of
             List[Dict[name, Tuple(position, velocity)]]
         :param merge_fixed_links: whether to merge fixed links when importing to pybullet
+        :param use_urdf_cache: whether to reuse the scaled and split URDFs of a previous instance with the same model,
+            name and size from the iGibson cache, instead of processing the URDF into scene_instance_folder
         """
         super(URDFObject, self).__init__(**kwargs)
 
@@ -261,8 +269,15 @@ class URDFObject(StatefulObject):
         self.meta_links = {}
         self.add_meta_links(meta_links)
 
-        self.scale_object()
-        self.remove_floating_joints(self.scene_instance_folder)
+        if use_urdf_cache:
+            cache_key = self.get_urdf_cache_key(visualize_primitives, meta_json, bbox_json)
+            cache_dir = os.path.join(get_cache_dir("urdf_objects"), "{}_{}".format(self.name, cache_key))
+            if not self.load_urdf_cache(cache_dir):
+                self.scale_object()
+                self.save_urdf_cache(cache_dir)
+        else:
+            self.scale_object()
+            self.remove_floating_joints(self.scene_instance_folder)
         self.prepare_link_based_bounding_boxes()
 
         self.prepare_visual_mesh_to_material()
@@ -615,7 +630,7 @@ class URDFObject(StatefulObject):
                 "scene_instances",
                 "{}_{}_{}".format(timestr, random.getrandbits(64), os.getpid()),
             )
-            os.makedirs(folder, exist_ok=True)
+        os.makedirs(folder, exist_ok=True)
 
         # Deal with floating joints inside the embedded urdf
         file_prefix = os.path.join(folder, self.name)
@@ -632,6 +647,100 @@ class URDFObject(StatefulObject):
             else:
                 self.is_fixed.append(False)
 
+    def get_urdf_cache_key(self, visualize_primitives, meta_json, bbox_json):
+        """
+        Key of the processed URDFs of this object in the cache. The links and joints are renamed after the object, so
+        the name is part of the key, together with the files of the model and everything that changes the processing.
+        The collision meshes are part of the files, since the inertial properties are computed from them.
+
+        :param visualize_primitives: whether geometric primitives are rendered
+        :param meta_json: path of the metadata file of the model
+        :param bbox_json: path of the bounding box file of the model
+        :return: hex digest string
+        """
+        collision_meshes = [
+            mesh.attrib["filename"] for mesh in self.object_tree.findall("link/collision/geometry/mesh")
+        ]
+        files = []
+        for path in [self.filename, meta_json, bbox_json] + collision_meshes:
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        return hash_key(
+            URDF_CACHE_VERSION,
+            files,
+            self.model_path,
+            self.name,
+            self.category,
+            np.asarray(self.scale, dtype=np.float64),
+            None if self.bounding_box is None else np.asarray(self.bounding_box, dtype=np.float64),
+            self.avg_obj_dims,
+            self.overwrite_inertial,
+            visualize_primitives,
+            self.merge_fixed_links,
+        )
+
+    @staticmethod
+    def read_urdf_cache_info(cache_dir):
+        """
+        :param cache_dir: cache directory of an object
+        :return: info of the cache entry, or None if there is no complete entry
+        """
+        info_path = os.path.join(cache_dir, "info.json")
+        if not os.path.isfile(info_path):
+            return None
+        try:
+            with open(info_path, "r") as f:
+                info = json.load(f)
+        except ValueError as e:
+            log.warning("Ignoring corrupted URDF cache entry {}: {}".format(cache_dir, e))
+            return None
+        if not all(os.path.isfile(os.path.join(cache_dir, urdf_file)) for urdf_file in info["urdf_files"]):
+            return None
+        return info
+
+    def load_urdf_cache(self, cache_dir):
+        """
+        Take the sub URDFs, their local transforms and the link scales from the cache
+
+        :param cache_dir: cache directory of this object
+        :return: whether the cache had a complete entry
+        """
+        info = self.read_urdf_cache_info(cache_dir)
+        if info is None:
+            return False
+
+        urdf_paths = [os.path.join(cache_dir, urdf_file) for urdf_file in info["urdf_files"]]
+        self.urdf_paths = urdf_paths
+        self.local_transforms = [(np.array(pos), np.array(orn)) for pos, orn in info["local_transforms"]]
+        self.main_body = info["main_body"]
+        self.is_fixed = [self.fixed_base if i == self.main_body else False for i in range(len(urdf_paths))]
+        self.scales_in_link_frame = {name: np.array(scale) for name, scale in info["scales_in_link_frame"].items()}
+        return True
+
+    def save_urdf_cache(self, cache_dir):
+        """
+        Split the scaled URDF into the cache. The entry is written to a temporary directory and renamed, so that
+        concurrent processes never see a partial entry. A complete entry already in the cache is never replaced,
+        since other processes may be loading it
+
+        :param cache_dir: cache directory of this object
+        """
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(cache_dir), prefix=".tmp_")
+        self.remove_floating_joints(tmp_dir)
+        info = {
+            "urdf_files": [os.path.basename(urdf_path) for urdf_path in self.urdf_paths],
+            "local_transforms": [(list(pos), list(orn)) for pos, orn in self.local_transforms],
+            "main_body": self.main_body,
+            "scales_in_link_frame": {name: list(scale) for name, scale in self.scales_in_link_frame.items()},
+        }
+        with open(os.path.join(tmp_dir, "info.json"), "w") as f:
+            json.dump(info, f)
+
+        # another process may have written the same entry since load_urdf_cache missed it
+        atomic_publish_dir(tmp_dir, cache_dir, is_complete=lambda path: self.read_urdf_cache_info(path) is not None)
+        self.urdf_paths = [os.path.join(cache_dir, os.path.basename(urdf_path)) for urdf_path in self.urdf_paths]
+
     def prepare_visual_mesh_to_material(self):
         # mapping between visual objects and possible textures
         # multiple visual objects can share the same material
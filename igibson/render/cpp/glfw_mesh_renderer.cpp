@@ -153,6 +153,7 @@ PYBIND11_MODULE(GLFWRendererContext, m) {
     pymodule.def("setup_framebuffer_meshrenderer_ms", &GLFWRendererContext::setup_framebuffer_meshrenderer_ms,
                  "setup framebuffer in meshrenderer with MSAA");
     pymodule.def("blit_buffer", &GLFWRendererContext::blit_buffer, "blit buffer");
+    pymodule.def("set_viewport", &GLFWRendererContext::set_viewport, "set the viewport to the size of a framebuffer");
 
     pymodule.def("compile_shader_meshrenderer", &GLFWRendererContext::compile_shader_meshrenderer,
                  "compile vertex and fragment shader");
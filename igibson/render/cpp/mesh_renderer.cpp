@@ -250,6 +250,10 @@ void MeshRendererContext::blit_buffer(int width, int height, GLuint fb1, GLuint
     }
 }
 
+void MeshRendererContext::set_viewport(int width, int height) {
+    glViewport(0, 0, width, height);
+}
+
 py::array_t<float> MeshRendererContext::readbuffer_meshrenderer(char *mode, int width, int height, GLuint fb2) {
     glBindFramebuffer(GL_FRAMEBUFFER, fb2);
     if (!strcmp(mode, "rgb")) {
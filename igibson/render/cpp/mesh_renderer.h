@@ -110,6 +110,8 @@ public:
 
     void blit_buffer(int width, int height, GLuint fb1, GLuint fb2);
 
+    void set_viewport(int width, int height);
+
     py::array_t<float> readbuffer_meshrenderer(char *mode, int width, int height, GLuint fb2);
 
     void clean_meshrenderer(std::vector<GLuint> texture1, std::vector<GLuint> texture2, std::vector<GLuint> fbo,
@@ -846,6 +846,7 @@ PYBIND11_MODULE(VRRendererContext, m) {
 	pymodule.def("setup_framebuffer_meshrenderer_ms", &VRRendererContext::setup_framebuffer_meshrenderer_ms,
 		"setup framebuffer in meshrenderer with MSAA");
 	pymodule.def("blit_buffer", &VRRendererContext::blit_buffer, "blit buffer");
+	pymodule.def("set_viewport", &VRRendererContext::set_viewport, "set the viewport to the size of a framebuffer");
 
 	pymodule.def("compile_shader_meshrenderer", &VRRendererContext::compile_shader_meshrenderer,
 		"compile vertex and fragment shader");
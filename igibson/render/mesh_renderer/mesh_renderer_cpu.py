@@ -20,12 +20,26 @@ from igibson.render.mesh_renderer.visual_object import VisualObject
 from igibson.robots.robot_base import BaseRobot
 from igibson.utils.constants import AVAILABLE_MODALITIES, MAX_CLASS_COUNT, MAX_INSTANCE_COUNT, ShadowPass
 from igibson.utils.mesh_util import lookat, mat2xyz, ortho, perspective, quat2rotmat, safemat2quat, xyz2mat, xyzw2wxyz
+from igibson.utils.scene_snapshot import get_mesh_key
 
 log = logging.getLogger(__name__)
 
 Image.MAX_IMAGE_PIXELS = None
 NO_MATERIAL_DEFINED_IN_SHAPE_AND_NO_OVERWRITE_SUPPLIED = -1
 
+# Attributes holding the framebuffer of the renderer output and its textures
+FRAMEBUFFER_ATTRIBUTES = (
+    "fbo",
+    "color_tex_rgb",
+    "color_tex_normal",
+    "color_tex_semantics",
+    "color_tex_ins_seg",
+    "color_tex_3d",
+    "color_tex_scene_flow",
+    "color_tex_optical_flow",
+    "depth_tex",
+)
+
 
 class MeshRenderer(object):
     """
@@ -66,8 +80,14 @@ class MeshRenderer(object):
         self.visual_objects = []
         self.vertex_data = []
         self.shapes = []
+        # scene snapshot to take the vertex data of the meshes from, and the meshes loaded so far to save one. Both
+        # are only set while a scene with a snapshot path is loading, see InteractiveIndoorScene._load
+        self.mesh_snapshot = None
+        self.mesh_records = None
         self.width = width
         self.height = height
+        # framebuffers of the other resolutions the renderer was set to, see set_resolution
+        self.inactive_framebuffers = {}
         self.faces = []
         self.instances = []
         self.update_instance_id_to_pb_id_map()
@@ -327,6 +347,39 @@ class MeshRenderer(object):
 
         self.depth_tex_shadow = self.r.allocateTexture(self.width, self.height)
 
+    def get_framebuffer_attributes(self):
+        """
+        :return: dictionary from attribute name to the framebuffers and textures of the current resolution
+        """
+        names = list(FRAMEBUFFER_ATTRIBUTES) + ["depth_tex_shadow"]
+        if self.msaa:
+            names += [name + "_ms" for name in FRAMEBUFFER_ATTRIBUTES]
+        return {name: getattr(self, name) for name in names}
+
+    def set_resolution(self, width, height):
+        """
+        Change the resolution of the renderer output, e.g. to render a few frames for videos at a higher resolution.
+        The framebuffers of every resolution are allocated on first use and kept, so switching back and forth only
+        binds them again. The projection matrix is kept, so the resolutions should have the same aspect ratio.
+
+        :param width: width of the renderer output
+        :param height: height of the renderer output
+        """
+        if (width, height) == (self.width, self.height):
+            return
+        if self.optimized and self.enable_shadow:
+            # the shadow map of the optimized renderer is bound once, at the resolution it was created with
+            raise ValueError("The resolution of the optimized renderer cannot be changed with shadows enabled")
+        self.inactive_framebuffers[(self.width, self.height)] = self.get_framebuffer_attributes()
+        self.width, self.height = width, height
+        framebuffers = self.inactive_framebuffers.pop((width, height), None)
+        if framebuffers is None:
+            self.setup_framebuffer()
+        else:
+            for name, value in framebuffers.items():
+                setattr(self, name, value)
+            self.r.set_viewport(width, height)
+
     def load_texture_file(self, tex_filename, texture_scale):
         """
         Load the texture file into the renderer.
@@ -397,32 +450,18 @@ class MeshRenderer(object):
                 material.material_ids[material_class].append(material_id_instance)
         material.randomize()
 
-    def load_object(
-        self,
-        obj_path,
-        scale=np.array([1, 1, 1]),
-        transform_orn=None,
-        transform_pos=None,
-        input_kd=None,
-        texture_scale=1.0,
-        overwrite_material=None,
-    ):
+    def parse_object(self, obj_path, scale=np.array([1, 1, 1]), transform_orn=None, transform_pos=None):
         """
-        Load a wavefront obj file into the renderer and create a VisualObject to manage it.
+        Parse a wavefront obj file into packed vertex data, scaled and transformed, with tangent space vectors.
 
         :param obj_path: path of obj file
         :param scale: scale, default 1
         :param transform_orn: rotation quaternion, convention xyzw
         :param transform_pos: translation for loading, it is a list of length 3
-        :param input_kd: if loading material fails, use this default material. input_kd should be a list of length 3
-        :param texture_scale: texture scale for the object, downsample to save memory
-        :param overwrite_material: whether to overwrite the default Material (usually with a RandomizedMaterial for material randomization)
-        :return: VAO_ids
+        :return: materials of the obj file, as dictionaries with the name, diffuse color and texture file names, and
+            shapes, as dictionaries with the name, the material id in the obj file (-1 if none), the float32 vertex data
+            and the tinyobjloader shape
         """
-        if self.optimization_process_executed and self.optimized:
-            log.error("Using optimized renderer and optimization process is already excuted, cannot add new objects")
-            return
-
         reader = tinyobjloader.ObjReader()
         log.debug("Loading {}".format(obj_path))
         if obj_path.endswith("encrypted.obj"):
@@ -433,8 +472,6 @@ class MeshRenderer(object):
             ret = reader.ParseFromFileWithKey(obj_path, igibson.key_path)
         else:
             ret = reader.ParseFromFile(obj_path)
-        vertex_data_indices = []
-        face_indices = []
         if not ret:
             log.error("Warning: {}".format(reader.Warning()))
             log.error("Error: {}".format(reader.Error()))
@@ -457,93 +494,31 @@ class MeshRenderer(object):
                 log.debug("Material name: {}".format(m.name))
                 log.debug("Material diffuse: {}".format(m.diffuse))
 
+        materials = [
+            {
+                "name": item.name,
+                "diffuse": list(item.diffuse),
+                "diffuse_texname": item.diffuse_texname,
+                "metallic_texname": item.metallic_texname,
+                "roughness_texname": item.roughness_texname,
+                "bump_texname": item.bump_texname,
+            }
+            for item in materials
+        ]
+
         shapes = reader.GetShapes()
         log.debug("Num shapes: {}".format(len(shapes)))
 
-        if overwrite_material is not None and len(materials) > 1:
-            log.warning("passed in one material ends up overwriting multiple materials")
-
-        # set the default values of variable before being modified later.
-        num_existing_mats = len(self.material_idx_to_material_instance_mapping)  # Number of current Material elements
-
-        # No MTL is supplied, or MTL is empty
-        if len(materials) == 0:
-            # Case when mesh obj is without mtl file but overwrite material is specified.
-            if overwrite_material is not None:
-                self.material_idx_to_material_instance_mapping[num_existing_mats] = overwrite_material
-                num_added_materials = 1
-            else:
-                num_added_materials = 0
-        else:
-            # Deparse the materials in the obj file by loading textures into the renderer's memory and creating a
-            # Material element for them
-            num_added_materials = len(materials)
-            for i, item in enumerate(materials):
-                if overwrite_material is not None:
-                    material = overwrite_material
-                elif item.diffuse_texname != "" and self.rendering_settings.load_textures:
-                    obj_dir = os.path.dirname(obj_path)
-                    texture = self.load_texture_file(os.path.join(obj_dir, item.diffuse_texname), texture_scale)
-                    texture_metallic = self.load_texture_file(
-                        os.path.join(obj_dir, item.metallic_texname), texture_scale
-                    )
-                    texture_roughness = self.load_texture_file(
-                        os.path.join(obj_dir, item.roughness_texname), texture_scale
-                    )
-                    texture_normal = self.load_texture_file(os.path.join(obj_dir, item.bump_texname), texture_scale)
-                    material = Material(
-                        "texture",
-                        texture_id=texture,
-                        metallic_texture_id=texture_metallic,
-                        roughness_texture_id=texture_roughness,
-                        normal_texture_id=texture_normal,
-                    )
-                else:
-                    if input_kd is not None and len(input_kd) == 4 and input_kd[3] != 1:
-                        # This applies to an object with RGBA channels in input k_d color.
-                        # Translucent object is not supported in iG renderer right now, it uses pink color instead.
-                        material = Material("color", kd=[1, 0, 1, 1])
-                    else:
-                        material = Material("color", kd=item.diffuse)
-                self.material_idx_to_material_instance_mapping[num_existing_mats + i] = material
-
-        # material index = num_existing_mats ... num_existing_mats + num_added_materials - 1 (inclusive) are using
-        # materials from mesh or from overwrite_material
-        # material index = num_existing_mats + num_added_materials is a fail-safe default material
-
-        idx_of_failsafe_material = num_existing_mats + num_added_materials
-
-        if input_kd is not None:  # append the default material in the end, in case material loading fails
-            self.material_idx_to_material_instance_mapping[idx_of_failsafe_material] = Material(
-                "color", kd=input_kd, texture_id=-1
-            )
-        else:
-            self.material_idx_to_material_instance_mapping[idx_of_failsafe_material] = Material(
-                "color", kd=[0.5, 0.5, 0.5], texture_id=-1
-            )
-
-        VAO_ids = []
-
         vertex_position = np.array(attrib.vertices).reshape((len(attrib.vertices) // 3, 3))
         vertex_normal = np.array(attrib.normals).reshape((len(attrib.normals) // 3, 3))
         vertex_texcoord = np.array(attrib.texcoords).reshape((len(attrib.texcoords) // 2, 2))
 
+        parsed_shapes = []
         for shape in shapes:
             log.debug("Shape name: {}".format(shape.name))
-            if len(shape.mesh.material_ids) == 0 or shape.mesh.material_ids[0] == -1:
-                # material not found, or invalid material, as defined here
-                # https://github.com/tinyobjloader/tinyobjloader/blob/master/tiny_obj_loader.h#L2997
-                if overwrite_material is not None:
-                    material_id = 0
-                    # shape don't have material id, use material 0, which is the overwrite material
-                else:
-                    material_id = NO_MATERIAL_DEFINED_IN_SHAPE_AND_NO_OVERWRITE_SUPPLIED
-                    # if no material and no overwrite material is supplied
-            else:
-                material_id = shape.mesh.material_ids[0]
-                # assumption: each shape only have one material
+            # assumption: each shape only have one material
+            material_id = shape.mesh.material_ids[0] if len(shape.mesh.material_ids) > 0 else -1
 
-            log.debug("material_id = {}".format(material_id))
             log.debug("num_indices = {}".format(len(shape.mesh.indices)))
             n_indices = len(shape.mesh.indices)
             np_indices = shape.mesh.numpy_indices().reshape((n_indices, 3))
@@ -608,8 +583,142 @@ class MeshRenderer(object):
             bitangent = bitangent.repeat(3, axis=0)
 
             vertices = np.concatenate([shape_vertex, shape_normal, shape_texcoord, tangent, bitangent], axis=-1)
-            faces = np.array(range(len(vertices))).reshape((len(vertices) // 3, 3))
-            vertexData = vertices.astype(np.float32)
+            parsed_shapes.append(
+                {
+                    "name": shape.name,
+                    "material_id": material_id,
+                    "vertex_data": vertices.astype(np.float32),
+                    "shape": shape,
+                }
+            )
+        return materials, parsed_shapes
+
+    def load_object(
+        self,
+        obj_path,
+        scale=np.array([1, 1, 1]),
+        transform_orn=None,
+        transform_pos=None,
+        input_kd=None,
+        texture_scale=1.0,
+        overwrite_material=None,
+        use_snapshot=True,
+    ):
+        """
+        Load a wavefront obj file into the renderer and create a VisualObject to manage it.
+
+        :param obj_path: path of obj file
+        :param scale: scale, default 1
+        :param transform_orn: rotation quaternion, convention xyzw
+        :param transform_pos: translation for loading, it is a list of length 3
+        :param input_kd: if loading material fails, use this default material. input_kd should be a list of length 3
+        :param texture_scale: texture scale for the object, downsample to save memory
+        :param overwrite_material: whether to overwrite the default Material (usually with a RandomizedMaterial for material randomization)
+        :param use_snapshot: whether the vertex data can be taken from and recorded for a scene snapshot. Soft bodies
+            need the tinyobjloader shapes and encrypted meshes are never stored decrypted, so they are always parsed
+        :return: VAO_ids
+        """
+        if self.optimization_process_executed and self.optimized:
+            log.error("Using optimized renderer and optimization process is already excuted, cannot add new objects")
+            return
+
+        mesh = None
+        mesh_key = None
+        if (
+            use_snapshot
+            and (self.mesh_snapshot is not None or self.mesh_records is not None)
+            and not obj_path.endswith("encrypted.obj")
+            and os.path.isfile(obj_path)
+        ):
+            mesh_key = get_mesh_key(obj_path, scale, transform_orn, transform_pos)
+            if self.mesh_snapshot is not None:
+                mesh = self.mesh_snapshot.get_mesh(mesh_key)
+        if mesh is None:
+            mesh = self.parse_object(obj_path, scale, transform_orn, transform_pos)
+        materials, shapes = mesh
+        vertex_data_indices = []
+        face_indices = []
+
+        if overwrite_material is not None and len(materials) > 1:
+            log.warning("passed in one material ends up overwriting multiple materials")
+
+        # set the default values of variable before being modified later.
+        num_existing_mats = len(self.material_idx_to_material_instance_mapping)  # Number of current Material elements
+
+        # No MTL is supplied, or MTL is empty
+        if len(materials) == 0:
+            # Case when mesh obj is without mtl file but overwrite material is specified.
+            if overwrite_material is not None:
+                self.material_idx_to_material_instance_mapping[num_existing_mats] = overwrite_material
+                num_added_materials = 1
+            else:
+                num_added_materials = 0
+        else:
+            # Deparse the materials in the obj file by loading textures into the renderer's memory and creating a
+            # Material element for them
+            num_added_materials = len(materials)
+            for i, item in enumerate(materials):
+                if overwrite_material is not None:
+                    material = overwrite_material
+                elif item["diffuse_texname"] != "" and self.rendering_settings.load_textures:
+                    obj_dir = os.path.dirname(obj_path)
+                    texture = self.load_texture_file(os.path.join(obj_dir, item["diffuse_texname"]), texture_scale)
+                    texture_metallic = self.load_texture_file(
+                        os.path.join(obj_dir, item["metallic_texname"]), texture_scale
+                    )
+                    texture_roughness = self.load_texture_file(
+                        os.path.join(obj_dir, item["roughness_texname"]), texture_scale
+                    )
+                    texture_normal = self.load_texture_file(os.path.join(obj_dir, item["bump_texname"]), texture_scale)
+                    material = Material(
+                        "texture",
+                        texture_id=texture,
+                        metallic_texture_id=texture_metallic,
+                        roughness_texture_id=texture_roughness,
+                        normal_texture_id=texture_normal,
+                    )
+                else:
+                    if input_kd is not None and len(input_kd) == 4 and input_kd[3] != 1:
+                        # This applies to an object with RGBA channels in input k_d color.
+                        # Translucent object is not supported in iG renderer right now, it uses pink color instead.
+                        material = Material("color", kd=[1, 0, 1, 1])
+                    else:
+                        material = Material("color", kd=item["diffuse"])
+                self.material_idx_to_material_instance_mapping[num_existing_mats + i] = material
+
+        # material index = num_existing_mats ... num_existing_mats + num_added_materials - 1 (inclusive) are using
+        # materials from mesh or from overwrite_material
+        # material index = num_existing_mats + num_added_materials is a fail-safe default material
+
+        idx_of_failsafe_material = num_existing_mats + num_added_materials
+
+        if input_kd is not None:  # append the default material in the end, in case material loading fails
+            self.material_idx_to_material_instance_mapping[idx_of_failsafe_material] = Material(
+                "color", kd=input_kd, texture_id=-1
+            )
+        else:
+            self.material_idx_to_material_instance_mapping[idx_of_failsafe_material] = Material(
+                "color", kd=[0.5, 0.5, 0.5], texture_id=-1
+            )
+
+        VAO_ids = []
+
+        for shape in shapes:
+            if shape["material_id"] == -1:
+                # material not found, or invalid material, as defined here
+                # https://github.com/tinyobjloader/tinyobjloader/blob/master/tiny_obj_loader.h#L2997
+                if overwrite_material is not None:
+                    material_id = 0
+                    # shape don't have material id, use material 0, which is the overwrite material
+                else:
+                    material_id = NO_MATERIAL_DEFINED_IN_SHAPE_AND_NO_OVERWRITE_SUPPLIED
+                    # if no material and no overwrite material is supplied
+            else:
+                material_id = shape["material_id"]
+
+            log.debug("material_id = {}".format(material_id))
+            vertexData = shape["vertex_data"]
+            faces = np.array(range(len(vertexData))).reshape((len(vertexData) // 3, 3))
             [VAO, VBO] = self.r.load_object_meshrenderer(self.shaderProgram, vertexData)
             self.VAOs.append(VAO)
             self.VBOs.append(VBO)
@@ -618,7 +727,7 @@ class MeshRenderer(object):
             self.objects.append(obj_path)
             vertex_data_indices.append(len(self.vertex_data))
             self.vertex_data.append(vertexData)
-            self.shapes.append(shape)
+            self.shapes.append(shape["shape"])
             # if material loading fails, use the default material
             if material_id == NO_MATERIAL_DEFINED_IN_SHAPE_AND_NO_OVERWRITE_SUPPLIED:
                 # use fall back material
@@ -629,6 +738,18 @@ class MeshRenderer(object):
             log.debug("shape_material_idx: {}".format(self.shape_material_idx))
             VAO_ids.append(self.get_num_objects() - 1)
 
+        if mesh_key is not None and self.mesh_records is not None:
+            self.mesh_records.append(
+                {
+                    "key": mesh_key,
+                    "materials": materials,
+                    "shapes": [
+                        (shape["name"], shape["material_id"], vertex_data_index)
+                        for shape, vertex_data_index in zip(shapes, vertex_data_indices)
+                    ],
+                }
+            )
+
         new_obj = VisualObject(
             obj_path,
             VAO_ids=VAO_ids,
@@ -1133,6 +1254,11 @@ class MeshRenderer(object):
             ]
             fbo_list += [self.fbo_ms]
 
+        for framebuffers in self.inactive_framebuffers.values():
+            fbo_list += [value for name, value in framebuffers.items() if name.startswith("fbo")]
+            clean_list += [value for name, value in framebuffers.items() if not name.startswith("fbo")]
+        self.inactive_framebuffers = {}
+
         text_vaos = [t.VAO for t in self.texts]
         text_vbos = [t.VBO for t in self.texts]
 
@@ -1167,6 +1293,8 @@ class MeshRenderer(object):
         self.update_instance_id_to_pb_id_map()
         self.vertex_data = []
         self.shapes = []
+        self.mesh_snapshot = None
+        self.mesh_records = None
         save_path = os.path.join(igibson.ig_dataset_path, "tmp")
         if os.path.isdir(save_path):
             shutil.rmtree(save_path)
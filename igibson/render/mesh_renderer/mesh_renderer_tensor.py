@@ -42,6 +42,10 @@ try:
                 self.optical_flow_tensor = torch.cuda.FloatTensor(height, width, 4).cuda()
                 self.scene_flow_tensor = torch.cuda.FloatTensor(height, width, 4).cuda()
 
+        def set_resolution(self, width, height):
+            if (width, height) != (self.width, self.height):
+                raise NotImplementedError("The resolution cannot be changed when rendering to pytorch tensors")
+
         def readbuffer_to_tensor(self, modes=AVAILABLE_MODALITIES):
             results = []
 
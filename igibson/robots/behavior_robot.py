@@ -287,6 +287,7 @@ class BehaviorRobot(ManipulationRobot, LocomotionRobot, ActiveCameraRobot):
         self._parts["eye"].set_position_orientation(eye_pos, eye_orn)
 
         clear_cached_states(self)
+        self._invalidate_joint_state()
 
     def set_poses(self, poses):
         assert len(poses) == len(self._parts), "Number of poses (%d) does not match number of parts (%d)" % (
@@ -300,6 +301,7 @@ class BehaviorRobot(ManipulationRobot, LocomotionRobot, ActiveCameraRobot):
             self._parts[part_name].set_position_orientation(*part_pose)
 
         clear_cached_states(self)
+        self._invalidate_joint_state()
 
     def reset(self):
         # Move the constraint for each part to the default position.
@@ -801,6 +801,7 @@ class ManipulationRobot(BaseRobot):
         for joint_name, j_val in self._ag_freeze_joint_pos[arm].items():
             joint = self._joints[joint_name]
             p.resetJointState(joint.body_id, joint.joint_id, targetValue=j_val, targetVelocity=0.0)
+        self._invalidate_joint_state()
 
     @property
     def _default_arm_joint_controller_configs(self):
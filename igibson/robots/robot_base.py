@@ -14,7 +14,7 @@ from igibson.external.pybullet_tools.utils import get_joint_info
 from igibson.object_states.utils import clear_cached_states
 from igibson.objects.stateful_object import StatefulObject
 from igibson.utils.python_utils import assert_valid_key, merge_nested_dicts
-from igibson.utils.utils import rotate_vector_3d
+from igibson.utils.utils import get_pybullet_state_version, rotate_vector_3d
 
 log = logging.getLogger(__name__)
 
@@ -129,6 +129,14 @@ class BaseRobot(StatefulObject):
             },
             "at_limits": None,
         }
+        # Pybullet state version at which self._joint_state was last read, and the raw values returned by
+        # self.update_state()
+        self._joint_state_version = None
+        self._joint_state_raw = None
+        # Joint references and limits as arrays, filled in by self._setup_joint_arrays()
+        self._joint_groups = None
+        self._virtual_joint_idx = None
+        self._joint_limits = None
 
     def _load(self, simulator):
         """
@@ -272,6 +280,7 @@ class BaseRobot(StatefulObject):
         self._joints.update(virtual_joints)
 
         # Populate the joint states
+        self._setup_joint_arrays()
         self.update_state()
 
         # Update the configs
@@ -300,17 +309,92 @@ class BaseRobot(StatefulObject):
         """
         pass
 
+    def _setup_joint_arrays(self):
+        """
+        Group the physical joints by body and cache the joint limits as arrays, so that joint states are read and
+        joint motors are commanded with one pybullet call per body instead of one per joint
+        """
+        joints = list(self._joints.values())
+        groups = OrderedDict()
+        self._virtual_joint_idx = []
+        for i, joint in enumerate(joints):
+            if isinstance(joint, PhysicalJoint):
+                joint_ids, idx = groups.setdefault(joint.body_id, ([], []))
+                joint_ids.append(joint.joint_id)
+                idx.append(i)
+            else:
+                self._virtual_joint_idx.append(i)
+        self._joint_groups = [(body_id, joint_ids, np.array(idx)) for body_id, (joint_ids, idx) in groups.items()]
+
+        is_physical = np.array([isinstance(joint, PhysicalJoint) for joint in joints], dtype=bool)
+        has_limit = np.array([joint.has_limit for joint in joints], dtype=bool)
+        lower = np.array([joint.lower_limit for joint in joints], dtype=np.float64)
+        upper = np.array([joint.upper_limit for joint in joints], dtype=np.float64)
+        # virtual joints have no velocity and torque limits, and their normalized velocity and torque are 0
+        max_velocity = np.full(len(joints), np.inf)
+        max_torque = np.full(len(joints), np.inf)
+        for i, joint in enumerate(joints):
+            if isinstance(joint, PhysicalJoint):
+                max_velocity[i], max_torque[i] = joint.max_velocity, joint.max_torque
+        self._joint_limits = {
+            "has_limit": has_limit,
+            # only physical joints clip position commands, virtual joints pass them to their callbacks as is
+            "clip_position": has_limit & is_physical,
+            "lower": lower,
+            "upper": upper,
+            "mean": np.where(has_limit, (lower + upper) / 2.0, 0.0),
+            "magnitude": np.where(has_limit, (upper - lower) / 2.0, 1.0),
+            "max_velocity": max_velocity,
+            "max_torque": max_torque,
+        }
+
+    def _read_joint_states(self):
+        """
+        Read the states of all joints, with one pybullet call per body for the physical joints
+
+        :return Tuple[Array[float], Array[float], Array[float]]: n-DOF length arrays of joint positions, velocities and
+            torques
+        """
+        pos, vel, trq = np.zeros(self.n_joints), np.zeros(self.n_joints), np.zeros(self.n_joints)
+        for body_id, joint_ids, idx in self._joint_groups:
+            states = p.getJointStates(body_id, joint_ids)
+            pos[idx] = [state[0] for state in states]
+            vel[idx] = [state[1] for state in states]
+            trq[idx] = [state[3] for state in states]
+        joints = list(self._joints.values())
+        for i in self._virtual_joint_idx:
+            pos[i], vel[i], trq[i] = joints[i].get_state()
+        return pos, vel, trq
+
+    def _invalidate_joint_state(self):
+        """
+        Force the next self.update_state() to read the joint states again, after they were changed by the robot
+        itself, e.g. through the callbacks of virtual joints
+        """
+        self._joint_state_version = None
+
     def update_state(self):
         """
-        Updates the internal proprioceptive state of this robot, and returns the raw values
+        Updates the internal proprioceptive state of this robot, and returns the raw values.
+        Joint states are read again only when the pybullet state changed since the last reading, see
+        igibson.utils.utils.get_pybullet_state_version.
 
         :return Tuple[Array[float], Array[float]]: The raw joint states, normalized joint states
             for this robot
         """
+        state_version = get_pybullet_state_version()
+        if state_version == self._joint_state_version:
+            return self._joint_state_raw
+
         # Grab raw values
-        joint_states = np.array([j.get_state() for j in self._joints.values()]).astype(np.float32).flatten()
+        pos, vel, trq = self._read_joint_states()
+        limits = self._joint_limits
+        pos_normalized = np.where(limits["has_limit"], (pos - limits["mean"]) / limits["magnitude"], pos)
+        joint_states = np.stack([pos, vel, trq], axis=1).astype(np.float32).flatten()
         joint_states_normalized = (
-            np.array([j.get_relative_state() for j in self._joints.values()]).astype(np.float32).flatten()
+            np.stack([pos_normalized, vel / limits["max_velocity"], trq / limits["max_torque"]], axis=1)
+            .astype(np.float32)
+            .flatten()
         )
 
         # Get raw joint values and normalized versions
@@ -324,6 +408,9 @@ class BaseRobot(StatefulObject):
         # Infer whether joints are at their limits
         self._joint_state["at_limits"] = 1.0 * (np.abs(self.joint_positions_normalized) > 0.99)
 
+        self._joint_state_version = state_version
+        self._joint_state_raw = (joint_states, joint_states_normalized)
+
         # Return the raw joint states
         return joint_states, joint_states_normalized
 
@@ -369,6 +456,7 @@ class BaseRobot(StatefulObject):
         """
         for joint, joint_pos in zip(self._joints.values(), self.reset_joint_pos):
             joint.reset_state(joint_pos, 0.0)
+        self._invalidate_joint_state()
 
         for controller in self._controllers.values():
             controller.reset()
@@ -487,22 +575,59 @@ class BaseRobot(StatefulObject):
         :param control_type: Array[ControlType], control types for each joint
         """
         # Run sanity check
-        joints = self._joints.values()
+        joints = list(self._joints.values())
         assert len(control) == len(control_type) == len(joints), (
             "Control signals, control types, and number of joints should all be the same!"
             "Got {}, {}, and {} respectively.".format(len(control), len(control_type), len(joints))
         )
 
-        # Loop through all control / types, and deploy the signal
-        for joint, ctrl, ctrl_type in zip(joints, control, control_type):
+        control = np.asarray(control, dtype=np.float64)
+        control_type = np.asarray(control_type)
+        invalid = ~np.isin(control_type, list(ControlType.VALID_TYPES))
+        if np.any(invalid):
+            raise ValueError("Invalid control type specified: {}".format(control_type[invalid][0]))
+
+        # Clip to the joint limits, as the joints do
+        limits = self._joint_limits
+        control = np.where(
+            (control_type == ControlType.POSITION) & limits["clip_position"],
+            np.clip(control, limits["lower"], limits["upper"]),
+            control,
+        )
+        control = np.where(
+            control_type == ControlType.VELOCITY,
+            np.clip(control, -limits["max_velocity"], limits["max_velocity"]),
+            control,
+        )
+        control = np.where(
+            control_type == ControlType.TORQUE, np.clip(control, -limits["max_torque"], limits["max_torque"]), control
+        )
+
+        # Physical joints: one motor command per body and control type
+        for body_id, joint_ids, idx in self._joint_groups:
+            body_control, body_control_type = control[idx], control_type[idx]
+            for ctrl_type in ControlType.VALID_TYPES:
+                mask = body_control_type == ctrl_type
+                if not np.any(mask):
+                    continue
+                ids = [joint_id for joint_id, m in zip(joint_ids, mask) if m]
+                values = body_control[mask].tolist()
+                if ctrl_type == ControlType.POSITION:
+                    p.setJointMotorControlArray(body_id, ids, p.POSITION_CONTROL, targetPositions=values)
+                elif ctrl_type == ControlType.VELOCITY:
+                    p.setJointMotorControlArray(body_id, ids, p.VELOCITY_CONTROL, targetVelocities=values)
+                else:
+                    p.setJointMotorControlArray(body_id, ids, p.TORQUE_CONTROL, forces=values)
+
+        # Virtual joints are commanded through their callbacks
+        for i in self._virtual_joint_idx:
+            joint, ctrl, ctrl_type = joints[i], control[i], control_type[i]
             if ctrl_type == ControlType.TORQUE:
                 joint.set_torque(ctrl)
             elif ctrl_type == ControlType.VELOCITY:
                 joint.set_vel(ctrl)
-            elif ctrl_type == ControlType.POSITION:
-                joint.set_pos(ctrl)
             else:
-                raise ValueError("Invalid control type specified: {}".format(ctrl_type))
+                joint.set_pos(ctrl)
 
     def get_proprioception(self):
         """
@@ -530,12 +655,14 @@ class BaseRobot(StatefulObject):
         """Set this robot's joint positions, where @joint_positions is an array"""
         for joint, joint_pos in zip(self._joints.values(), joint_positions):
             joint.reset_state(pos=joint_pos, vel=0.0)
+        self._invalidate_joint_state()
 
     def set_joint_states(self, joint_states):
         """Set this robot's joint states in the format of Dict[String: (q, q_dot)]]"""
         for joint_name, joint in self._joints.items():
             joint_position, joint_velocity = joint_states[joint_name]
             joint.reset_state(pos=joint_position, vel=joint_velocity)
+        self._invalidate_joint_state()
 
     def get_joint_states(self):
         """Get this robot's joint states in the format of Dict[String: (q, q_dot)]]"""
@@ -570,6 +697,7 @@ class BaseRobot(StatefulObject):
         """
         p.resetBasePositionAndOrientation(self.base_link.body_id, pos, quat)
         clear_cached_states(self)
+        self._invalidate_joint_state()
 
     def set_base_link_position_orientation(self, pos, orn):
         """Set object base link position and orientation in the format of Tuple[Array[x, y, z], Array[x, y, z, w]]"""
@@ -639,6 +767,7 @@ class BaseRobot(StatefulObject):
     def load_state(self, dump):
         """Dump the state of the object other than what's not included in pybullet state."""
         super(BaseRobot, self).load_state(dump["parent_state"])
+        self._invalidate_joint_state()
 
         controller_dump = dump["controllers"]
         for controller_name, controller in self._controllers.items():
@@ -1001,8 +1130,8 @@ class BaseRobot(StatefulObject):
         """
         Keep the robot still. Apply zero velocity to all joints.
         """
-        for joint in self._joints.values():
-            joint.set_vel(0.0)
+        for body_id, joint_ids, _ in self._joint_groups:
+            p.setJointMotorControlArray(body_id, joint_ids, p.VELOCITY_CONTROL, targetVelocities=[0.0] * len(joint_ids))
 
 
 class RobotLink:
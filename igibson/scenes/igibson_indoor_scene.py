@@ -1,5 +1,6 @@
 import json
 import logging
+import multiprocessing
 import os
 import random
 import time
@@ -27,10 +28,18 @@ from igibson.utils.assets_utils import (
     get_ig_model_path,
     get_ig_scene_path,
 )
+from igibson.utils.cache_utils import atomic_save_json, get_cache_dir, hash_key, load_json
+from igibson.utils.collision_utils import CollisionGroupManager
+from igibson.utils.scene_snapshot import SCENE_SNAPSHOT_VERSION, SceneSnapshot
+from igibson.utils.seg_map_utils import LabelMapIndex
 from igibson.utils.semantics_utils import ROOM_NAME_TO_ROOM_ID
 from igibson.utils.utils import NumpyEncoder, restoreState, rotate_vector_3d
 
 SCENE_SOURCE = ["IG", "CUBICASA", "THREEDFRONT"]
+SCENE_QUALITY_CHECK_MODES = ["sync", "cached", "background", "off"]
+
+# Bump to invalidate the cached scene quality check results
+SCENE_QUALITY_CACHE_VERSION = 1
 
 log = logging.getLogger(__name__)
 
@@ -70,6 +79,8 @@ class InteractiveIndoorScene(StaticIndoorScene):
         merge_fixed_links=True,
         rendering_params=None,
         include_robots=True,
+        scene_quality_check="cached",
+        snapshot_path=None,
     ):
         """
         :param scene_id: Scene id
@@ -96,6 +107,11 @@ class InteractiveIndoorScene(StaticIndoorScene):
         :param merge_fixed_links: whether to merge fixed links in pybullet
         :param rendering_params: additional rendering params to be passed into object initializers (e.g. texture scale)
         :param include_robots: whether to also include the robot(s) defined in the scene
+        :param scene_quality_check: how to run the scene quality check at loading, among sync (always run it),
+            cached (reuse the result of a previous load of the same scene and objects), background (on a cache miss,
+            run it in a background process that only logs warnings) and off
+        :param snapshot_path: directory of a scene snapshot to load the scene faster from, written after a cold load
+            if it does not hold a snapshot of this scene yet
         """
 
         super(InteractiveIndoorScene, self).__init__(
@@ -112,6 +128,11 @@ class InteractiveIndoorScene(StaticIndoorScene):
         self.should_open_all_doors = should_open_all_doors
         if scene_source not in SCENE_SOURCE:
             raise ValueError("Unsupported scene source: {}".format(scene_source))
+        if scene_quality_check not in SCENE_QUALITY_CHECK_MODES:
+            raise ValueError("Unsupported scene quality check mode: {}".format(scene_quality_check))
+        self.scene_quality_check = scene_quality_check
+        self.scene_quality_process = None
+        self.snapshot_path = snapshot_path
         if scene_source == "IG":
             scene_dir = get_ig_scene_path(scene_id)
         elif scene_source == "CUBICASA":
@@ -154,11 +175,10 @@ class InteractiveIndoorScene(StaticIndoorScene):
 
         # Current time string to use to save the temporal urdfs
         timestr = time.strftime("%Y%m%d-%H%M%S")
-        # Create the subfolder
+        # Subfolder of the urdfs of the objects that are not taken from the URDF cache, created on first use
         self.scene_instance_folder = os.path.join(
             igibson.ig_dataset_path, "scene_instances", "{}_{}_{}".format(timestr, random.getrandbits(64), os.getpid())
         )
-        os.makedirs(self.scene_instance_folder, exist_ok=True)
 
         # Load room semantic and instance segmentation map
         self.load_room_sem_ins_seg_map(seg_map_resolution)
@@ -448,14 +468,17 @@ class InteractiveIndoorScene(StaticIndoorScene):
 
         room_cats = list(ROOM_NAME_TO_ROOM_ID.keys())
 
+        # pixels and AABBs of every room, for the room queries
+        self.room_ins_index = LabelMapIndex(img_ins)
+        self.room_sem_index = LabelMapIndex(img_sem)
+
         sem_id_to_ins_id = {}
-        unique_ins_ids = np.unique(img_ins)
-        unique_ins_ids = np.delete(unique_ins_ids, 0)
+        unique_ins_ids = np.delete(self.room_ins_index.labels, 0)
         for ins_id in unique_ins_ids:
             # find one pixel for each ins id
-            x, y = np.where(img_ins == ins_id)
+            x, y = self.room_ins_index.get_pixels(ins_id)[0]
             # retrieve the correspounding sem id
-            sem_id = img_sem[x[0], y[0]]
+            sem_id = img_sem[x, y]
             if sem_id not in sem_id_to_ins_id:
                 sem_id_to_ins_id[sem_id] = []
             sem_id_to_ins_id[sem_id].append(ins_id)
@@ -565,21 +588,108 @@ class InteractiveIndoorScene(StaticIndoorScene):
         """
         Helper function to check for collision for scene quality
         """
-        if body_b is None:
-            assert link_a is not None
-            pts = p.getContactPoints(bodyA=body_a, linkIndexA=link_a)
-        else:
-            assert body_b is not None
-            pts = p.getContactPoints(bodyA=body_a, bodyB=body_b)
+        return _check_collision(body_a, body_b=body_b, link_a=link_a, fixed_body_ids=fixed_body_ids)
 
-        # contactDistance < 0 means actual penetration
-        pts = [elem for elem in pts if elem[8] < 0.0]
+    def get_load_key_parts(self):
+        """
+        Inputs that determine the loaded scene: the scene URDF, the optional pybullet state file and the loaded object
+        set, so filtering categories or rooms gives different keys
 
-        # only count collision with fixed body ids if provided
-        if fixed_body_ids is not None:
-            pts = [elem for elem in pts if elem[2] in fixed_body_ids]
+        :return: list of JSON serializable key parts
+        """
+        files = []
+        for path in [self.scene_file, self.pybullet_filename]:
+            if path is not None and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        objects = []
+        for name in sorted(self.objects_by_name):
+            obj = self.objects_by_name[name]
+            objects.append(
+                (
+                    name,
+                    type(obj).__name__,
+                    getattr(obj, "category", None),
+                    getattr(obj, "filename", None),
+                    np.asarray(getattr(obj, "scale", 1.0), dtype=np.float64).tolist(),
+                    list(getattr(obj, "is_fixed", [])),
+                )
+            )
+        return [files, objects]
+
+    def get_scene_quality_cache_path(self, body_ids, fixed_body_ids):
+        """
+        Path of the cached quality check result of the loaded scene
 
-        return len(pts) > 0
+        :param body_ids: body ids of all scene objects
+        :param fixed_body_ids: body ids of all fixed scene objects
+        :return: path of the .json cache entry
+        """
+        key = hash_key(
+            SCENE_QUALITY_CACHE_VERSION,
+            *self.get_load_key_parts(),
+            len(body_ids),
+            len(fixed_body_ids),
+            self.link_collision_tolerance,
+            self.merge_fixed_links,
+        )
+        return os.path.join(get_cache_dir("scene_quality"), "{}_{}.json".format(self.scene_id, key))
+
+    def get_snapshot_key(self):
+        """
+        :return: key of the loaded scene in a scene snapshot
+        """
+        return hash_key(
+            SCENE_SNAPSHOT_VERSION, *self.get_load_key_parts(), self.merge_fixed_links, igibson.ignore_visual_shape
+        )
+
+    def get_snapshot_objects(self):
+        """
+        :return: body ids of every loaded object, by object name, to check that a snapshot state can be restored
+        """
+        return {name: list(obj.get_body_ids()) for name, obj in self.objects_by_name.items() if obj.loaded}
+
+    def get_scene_quality_snapshot(self, body_ids):
+        """
+        Describe the URDF objects of the scene so that a separate pybullet client can load them in their current state
+
+        :param body_ids: body ids of all scene objects
+        :return: list of dictionaries with the body id, URDF path, fixed base flag, joint friction, base pose and
+            joint positions of every body loaded from a URDFObject
+        """
+        urdf_objects = []
+        for obj in self.objects_by_name.values():
+            if isinstance(obj, ObjectMultiplexer):
+                for sub_obj in obj._multiplexed_objects:
+                    if isinstance(sub_obj, ObjectGrouper):
+                        urdf_objects.extend(sub_obj.objects)
+                    else:
+                        urdf_objects.append(sub_obj)
+            else:
+                urdf_objects.append(obj)
+
+        body_id_set = set(body_ids)
+        bodies = []
+        for obj in urdf_objects:
+            if not isinstance(obj, URDFObject):
+                continue
+            for body_id, urdf_path, is_fixed in zip(obj.get_body_ids(), obj.urdf_paths, obj.is_fixed):
+                if body_id not in body_id_set:
+                    continue
+                pos, orn = p.getBasePositionAndOrientation(body_id)
+                bodies.append(
+                    {
+                        "body_id": body_id,
+                        "urdf_path": urdf_path,
+                        "is_fixed": bool(is_fixed),
+                        "collision_group": obj.collision_group,
+                        "joint_friction": obj.joint_friction,
+                        "pos": list(pos),
+                        "orn": list(orn),
+                        "joint_positions": [p.getJointState(body_id, j)[0] for j in range(p.getNumJoints(body_id))],
+                    }
+                )
+        return bodies
 
     def check_scene_quality(self, body_ids, fixed_body_ids):
         """
@@ -587,15 +697,15 @@ class InteractiveIndoorScene(StaticIndoorScene):
         1) Objects should have no collision with each other.
         2) Fixed, articulated objects that cannot fully extend their joints should be less than self.link_collision_tolerance
 
+        The check steps physics for every joint of every fixed articulated object, so depending on
+        self.scene_quality_check the result is taken from the cache ("cached"), computed in a background process that
+        only logs the warnings and fills the cache ("background"), always computed ("sync") or skipped ("off").
+        self.quality_check is None when the result is not known after loading.
+
         :param body_ids: body ids of all scene objects
         :param fixed_body_ids: body ids of all fixed scene objects
-        :return: whether scene passes quality check
+        :return: whether scene passes quality check, None if it is not known yet
         """
-        quality_check = True
-
-        body_body_collision = []
-        body_link_collision = []
-
         # build mapping from body_id to object name for debugging
         body_id_to_name = {}
         for name in self.objects_by_name:
@@ -603,6 +713,18 @@ class InteractiveIndoorScene(StaticIndoorScene):
                 body_id_to_name[body_id] = name
         self.body_id_to_name = body_id_to_name
 
+        self.quality_check = None
+        self.body_collision_set = set()
+        self.link_collision_set = set()
+        if self.scene_quality_check == "off":
+            return self.quality_check
+
+        cache_path = self.get_scene_quality_cache_path(body_ids, fixed_body_ids)
+        if self.scene_quality_check != "sync":
+            result = load_json(cache_path)
+            if result is not None:
+                return self.apply_scene_quality_result(result)
+
         # collect body ids for overlapped bboxes (e.g. tables and chairs,
         # sofas and coffee tables)
         overlapped_body_ids = []
@@ -614,96 +736,48 @@ class InteractiveIndoorScene(StaticIndoorScene):
                 for obj2_body_id in self.objects_by_name[obj2_name].get_body_ids():
                     overlapped_body_ids.append((obj1_body_id, obj2_body_id))
 
-        # cache pybullet initial state
-        state_id = p.saveState()
-
-        # check if these overlapping bboxes have collision
-        p.stepSimulation()
-        for body_a, body_b in overlapped_body_ids:
-            has_collision = self.check_collision(body_a=body_a, body_b=body_b)
-            quality_check = quality_check and (not has_collision)
-            if has_collision:
-                body_body_collision.append((body_a, body_b))
-
-        # check if fixed, articulated objects can extend their joints
-        # without collision with other fixed objects
         joint_collision_allowed = int(len(body_ids) * self.link_collision_tolerance)
-        joint_collision_so_far = 0
-        for body_id in fixed_body_ids:
-            joint_quality = True
-            for joint_id in range(p.getNumJoints(body_id)):
-                j_low, j_high = p.getJointInfo(body_id, joint_id)[8:10]
-                j_type = p.getJointInfo(body_id, joint_id)[2]
-                if j_type not in [p.JOINT_REVOLUTE, p.JOINT_PRISMATIC]:
-                    continue
-                # this is the continuous joint (e.g. wheels for office chairs)
-                if j_low >= j_high:
-                    continue
-
-                # usually j_low and j_high includes j_default = 0.0
-                # if not, set j_default to be j_low
-                j_default = 0.0
-                if not (j_low <= j_default <= j_high):
-                    j_default = j_low
-
-                # check three joint positions, 0%, 33% and 66%
-                j_range = j_high - j_low
-                j_low_perc = j_range * 0.33 + j_low
-                j_high_perc = j_range * 0.66 + j_low
-
-                # check if j_default has collision
-                restoreState(state_id)
-                p.resetJointState(body_id, joint_id, j_default)
-                p.stepSimulation()
-                has_collision = self.check_collision(body_a=body_id, link_a=joint_id, fixed_body_ids=fixed_body_ids)
-                joint_quality = joint_quality and (not has_collision)
-
-                # check if j_low_perc has collision
-                restoreState(state_id)
-                p.resetJointState(body_id, joint_id, j_low_perc)
-                p.stepSimulation()
-                has_collision = self.check_collision(body_a=body_id, link_a=joint_id, fixed_body_ids=fixed_body_ids)
-                joint_quality = joint_quality and (not has_collision)
-
-                # check if j_high_perc has collision
-                restoreState(state_id)
-                p.resetJointState(body_id, joint_id, j_high_perc)
-                p.stepSimulation()
-                has_collision = self.check_collision(body_a=body_id, link_a=joint_id, fixed_body_ids=fixed_body_ids)
-                joint_quality = joint_quality and (not has_collision)
-
-            if not joint_quality:
-                joint_collision_so_far += 1
-                body_link_collision.append(body_id)
-
-        quality_check = quality_check and (joint_collision_so_far <= joint_collision_allowed)
 
-        # restore state to the initial state before testing collision
-        restoreState(state_id)
-        p.removeState(state_id)
-
-        self.quality_check = quality_check
-
-        self.body_collision_set = set()
-        for body_a, body_b in body_body_collision:
-            log.warning(
-                "scene quality check: {} and {} has collision.".format(
-                    body_id_to_name[body_a],
-                    body_id_to_name[body_b],
-                )
+        if self.scene_quality_check == "background":
+            physics_params = p.getPhysicsEngineParameters()
+            ctx = multiprocessing.get_context("spawn")
+            self.scene_quality_process = ctx.Process(
+                target=_background_scene_quality_check,
+                args=(
+                    self.get_scene_quality_snapshot(body_ids),
+                    overlapped_body_ids,
+                    fixed_body_ids,
+                    joint_collision_allowed,
+                    body_id_to_name,
+                    physics_params["fixedTimeStep"],
+                    physics_params["gravityAccelerationZ"],
+                    self.merge_fixed_links,
+                    cache_path,
+                ),
+                daemon=True,
             )
-            self.body_collision_set.add(body_id_to_name[body_a])
-            self.body_collision_set.add(body_id_to_name[body_b])
+            self.scene_quality_process.start()
+            log.info("Running the scene quality check of {} in the background".format(self.scene_id))
+            return self.quality_check
 
-        self.link_collision_set = set()
-        for body_id in body_link_collision:
-            log.warning(
-                "scene quality check: {} has joint that cannot extend for >66%.".format(
-                    body_id_to_name[body_id],
-                )
-            )
-            self.link_collision_set.add(body_id_to_name[body_id])
+        result = _scene_quality_result(
+            *_compute_scene_quality(overlapped_body_ids, fixed_body_ids, joint_collision_allowed), body_id_to_name
+        )
+        atomic_save_json(cache_path, result)
+        return self.apply_scene_quality_result(result)
 
+    def apply_scene_quality_result(self, result):
+        """
+        Log the warnings of a scene quality check result and store it
+
+        :param result: dictionary with the quality_check flag, the body_collisions pairs of object names and the
+            link_collisions object names
+        :return: whether scene passes quality check
+        """
+        _log_scene_quality_result(result)
+        self.quality_check = result["quality_check"]
+        self.body_collision_set = set(name for pair in result["body_collisions"] for name in pair)
+        self.link_collision_set = set(result["link_collisions"])
         return self.quality_check
 
     def _set_first_n_objects(self, first_n_objects):
@@ -842,7 +916,7 @@ class InteractiveIndoorScene(StaticIndoorScene):
         """
         return self.open_all_objs_by_category("door", mode="max")
 
-    def restore_object_states_single_object(self, obj, obj_kin_state):
+    def restore_object_states_single_object(self, obj, obj_kin_state, kinematic=True):
         # If the object isn't loaded, skip
         if not obj.loaded:
             return
@@ -851,6 +925,13 @@ class InteractiveIndoorScene(StaticIndoorScene):
         if not obj_kin_state:
             return
 
+        if kinematic:
+            self.restore_kinematic_state_single_object(obj, obj_kin_state)
+
+        if obj_kin_state["non_kinematic_states"] is not None:
+            obj.load_state(obj_kin_state["non_kinematic_states"])
+
+    def restore_kinematic_state_single_object(self, obj, obj_kin_state):
         if obj_kin_state["base_poses"] is not None:
             obj.set_poses(obj_kin_state["base_poses"])
         else:
@@ -875,52 +956,79 @@ class InteractiveIndoorScene(StaticIndoorScene):
             }
             obj.set_joint_states(zero_joint_states)
 
-        if obj_kin_state["non_kinematic_states"] is not None:
-            obj.load_state(obj_kin_state["non_kinematic_states"])
-
-    def restore_object_states(self, object_states):
+    def restore_object_states(self, object_states, kinematic=True):
+        """
+        :param object_states: object states by object name, see self.object_states
+        :param kinematic: whether to restore the poses, velocities and joint states, otherwise only the
+            non-kinematic states (e.g. when the pybullet state is restored from a file afterwards)
+        """
         for obj_name, obj in self.objects_by_name.items():
             if not isinstance(obj, ObjectMultiplexer):
-                self.restore_object_states_single_object(obj, object_states[obj_name])
+                self.restore_object_states_single_object(obj, object_states[obj_name], kinematic)
             else:
                 for sub_obj in obj._multiplexed_objects:
                     if isinstance(sub_obj, ObjectGrouper):
                         for obj_part in sub_obj.objects:
-                            self.restore_object_states_single_object(obj_part, object_states[obj_part.name])
+                            self.restore_object_states_single_object(obj_part, object_states[obj_part.name], kinematic)
                     else:
-                        self.restore_object_states_single_object(sub_obj, object_states[sub_obj.name])
+                        self.restore_object_states_single_object(sub_obj, object_states[sub_obj.name], kinematic)
 
     def _load(self, simulator):
         """
         Load all scene objects into pybullet
         """
-        # Load all the objects
-        body_ids = []
-        fixed_body_ids = []
-        for int_object in self.objects_by_name:
-            obj = self.objects_by_name[int_object]
-            new_ids = obj.load(simulator)
-            for id in new_ids:
-                self.objects_by_id[id] = obj
-            body_ids += new_ids
-
-            # Only URDFObject has the attribute is_fixed
-            if isinstance(obj, URDFObject):
-                fixed_body_ids += [body_id for body_id, is_fixed in zip(obj.get_body_ids(), obj.is_fixed) if is_fixed]
-
-        # disable collision between the fixed links of the fixed objects
-        for i in range(len(fixed_body_ids)):
-            for j in range(i + 1, len(fixed_body_ids)):
-                p.setCollisionFilterPair(fixed_body_ids[i], fixed_body_ids[j], -1, -1, enableCollision=0)
-
-        # Load the traversability map
-        maps_path = os.path.join(self.scene_dir, "layout")
-        if self.build_graph:
-            self.load_trav_map(maps_path)
-
-        self.restore_object_states(self.object_states)
-        if self.pybullet_filename is not None:
-            restoreState(fileName=self.pybullet_filename)
+        snapshot = None
+        if self.snapshot_path is not None:
+            snapshot = SceneSnapshot.load(self.snapshot_path, self.get_snapshot_key())
+            if simulator.renderer is not None:
+                simulator.renderer.mesh_snapshot = snapshot
+                simulator.renderer.mesh_records = []
+
+        try:
+            # Load all the objects
+            body_ids = []
+            fixed_body_ids = []
+            for int_object in self.objects_by_name:
+                obj = self.objects_by_name[int_object]
+                new_ids = obj.load(simulator)
+                for id in new_ids:
+                    self.objects_by_id[id] = obj
+                body_ids += new_ids
+
+                # Only URDFObject has the attribute is_fixed
+                if isinstance(obj, URDFObject):
+                    fixed_body_ids += [
+                        body_id for body_id, is_fixed in zip(obj.get_body_ids(), obj.is_fixed) if is_fixed
+                    ]
+                    # disable collision between the base links of the fixed objects
+                    self.collision_groups.add_object(obj)
+
+            # Load the traversability map
+            maps_path = os.path.join(self.scene_dir, "layout")
+            if self.build_graph:
+                self.load_trav_map(maps_path)
+
+            if snapshot is not None and snapshot.matches_objects(self.get_snapshot_objects()):
+                # the snapshot state already has the object states and the optional pybullet file applied
+                snapshot.restore_state()
+                self.restore_object_states(self.object_states, kinematic=False)
+            else:
+                if snapshot is not None:
+                    log.warning(
+                        "Scene snapshot {} has different bodies, restoring the object states".format(snapshot.path)
+                    )
+                self.restore_object_states(self.object_states)
+                if self.pybullet_filename is not None:
+                    restoreState(fileName=self.pybullet_filename)
+                if self.snapshot_path is not None:
+                    SceneSnapshot.save(
+                        self.snapshot_path, self.get_snapshot_key(), simulator.renderer, self.get_snapshot_objects()
+                    )
+        finally:
+            # release the memory-mapped vertex data and stop recording the meshes loaded later
+            if simulator.renderer is not None:
+                simulator.renderer.mesh_snapshot = None
+                simulator.renderer.mesh_records = None
 
         self.check_scene_quality(body_ids, fixed_body_ids)
 
@@ -967,8 +1075,7 @@ class InteractiveIndoorScene(StaticIndoorScene):
             return None, None
 
         sem_id = self.room_sem_name_to_sem_id[room_type]
-        valid_idx = np.array(np.where(self.room_sem_map == sem_id))
-        random_point_map = valid_idx[:, np.random.randint(valid_idx.shape[1])]
+        random_point_map = self.room_sem_index.sample_pixel(sem_id)
 
         x, y = self.seg_map_to_world(random_point_map)
         # assume only 1 floor
@@ -988,8 +1095,7 @@ class InteractiveIndoorScene(StaticIndoorScene):
             return None, None
 
         ins_id = self.room_ins_name_to_ins_id[room_instance]
-        valid_idx = np.array(np.where(self.room_ins_map == ins_id))
-        random_point_map = valid_idx[:, np.random.randint(valid_idx.shape[1])]
+        random_point_map = self.room_ins_index.sample_pixel(ins_id)
 
         x, y = self.seg_map_to_world(random_point_map)
         # assume only 1 floor
@@ -1008,13 +1114,9 @@ class InteractiveIndoorScene(StaticIndoorScene):
             return None, None
 
         ins_id = self.room_ins_name_to_ins_id[room_instance]
-        valid_idx = np.array(np.where(self.room_ins_map == ins_id))
-        u_min = np.min(valid_idx[0])
-        u_max = np.max(valid_idx[0])
-        v_min = np.min(valid_idx[1])
-        v_max = np.max(valid_idx[1])
-        x_a, y_a = self.seg_map_to_world(np.array([u_min, v_min]))
-        x_b, y_b = self.seg_map_to_world(np.array([u_max, v_max]))
+        uv_min, uv_max = self.room_ins_index.get_aabb(ins_id)
+        x_a, y_a = self.seg_map_to_world(uv_min)
+        x_b, y_b = self.seg_map_to_world(uv_max)
         x_min = np.min([x_a, x_b])
         x_max = np.max([x_a, x_b])
         y_min = np.min([y_a, y_b])
@@ -1360,3 +1462,176 @@ class InteractiveIndoorScene(StaticIndoorScene):
             return scene_tree, snapshot_id
         else:
             return scene_tree
+
+
+def _check_collision(body_a, body_b=None, link_a=None, fixed_body_ids=None):
+    """
+    Helper function to check for collision for scene quality
+    """
+    if body_b is None:
+        assert link_a is not None
+        pts = p.getContactPoints(bodyA=body_a, linkIndexA=link_a)
+    else:
+        assert body_b is not None
+        pts = p.getContactPoints(bodyA=body_a, bodyB=body_b)
+
+    # contactDistance < 0 means actual penetration
+    pts = [elem for elem in pts if elem[8] < 0.0]
+
+    # only count collision with fixed body ids if provided
+    if fixed_body_ids is not None:
+        pts = [elem for elem in pts if elem[2] in fixed_body_ids]
+
+    return len(pts) > 0
+
+
+def _compute_scene_quality(overlapped_body_ids, fixed_body_ids, joint_collision_allowed):
+    """
+    Run the scene quality check in the current pybullet client, whose state is left unchanged
+
+    :param overlapped_body_ids: pairs of body ids of objects with overlapping bounding boxes
+    :param fixed_body_ids: body ids of all fixed scene objects
+    :param joint_collision_allowed: number of fixed objects allowed to have joints that cannot extend
+    :return: whether the scene passes the check, the colliding pairs of body ids and the body ids of the fixed
+        objects whose joints cannot extend
+    """
+    quality_check = True
+
+    body_body_collision = []
+    body_link_collision = []
+
+    # cache pybullet initial state
+    state_id = p.saveState()
+
+    # check if these overlapping bboxes have collision
+    p.stepSimulation()
+    for body_a, body_b in overlapped_body_ids:
+        has_collision = _check_collision(body_a=body_a, body_b=body_b)
+        quality_check = quality_check and (not has_collision)
+        if has_collision:
+            body_body_collision.append((body_a, body_b))
+
+    # check if fixed, articulated objects can extend their joints
+    # without collision with other fixed objects
+    joint_collision_so_far = 0
+    for body_id in fixed_body_ids:
+        joint_quality = True
+        for joint_id in range(p.getNumJoints(body_id)):
+            j_low, j_high = p.getJointInfo(body_id, joint_id)[8:10]
+            j_type = p.getJointInfo(body_id, joint_id)[2]
+            if j_type not in [p.JOINT_REVOLUTE, p.JOINT_PRISMATIC]:
+                continue
+            # this is the continuous joint (e.g. wheels for office chairs)
+            if j_low >= j_high:
+                continue
+
+            # usually j_low and j_high includes j_default = 0.0
+            # if not, set j_default to be j_low
+            j_default = 0.0
+            if not (j_low <= j_default <= j_high):
+                j_default = j_low
+
+            # check three joint positions, 0%, 33% and 66%
+            j_range = j_high - j_low
+            j_low_perc = j_range * 0.33 + j_low
+            j_high_perc = j_range * 0.66 + j_low
+
+            for j_pos in [j_default, j_low_perc, j_high_perc]:
+                restoreState(state_id)
+                p.resetJointState(body_id, joint_id, j_pos)
+                p.stepSimulation()
+                has_collision = _check_collision(body_a=body_id, link_a=joint_id, fixed_body_ids=fixed_body_ids)
+                joint_quality = joint_quality and (not has_collision)
+
+        if not joint_quality:
+            joint_collision_so_far += 1
+            body_link_collision.append(body_id)
+
+    quality_check = quality_check and (joint_collision_so_far <= joint_collision_allowed)
+
+    # restore state to the initial state before testing collision
+    restoreState(state_id)
+    p.removeState(state_id)
+
+    return quality_check, body_body_collision, body_link_collision
+
+
+def _scene_quality_result(quality_check, body_body_collision, body_link_collision, body_id_to_name):
+    """
+    :return: scene quality check result with object names instead of body ids, as stored in the cache
+    """
+    return {
+        "quality_check": bool(quality_check),
+        "body_collisions": [
+            [body_id_to_name[body_a], body_id_to_name[body_b]] for body_a, body_b in body_body_collision
+        ],
+        "link_collisions": [body_id_to_name[body_id] for body_id in body_link_collision],
+    }
+
+
+def _log_scene_quality_result(result):
+    for name_a, name_b in result["body_collisions"]:
+        log.warning("scene quality check: {} and {} has collision.".format(name_a, name_b))
+    for name in result["link_collisions"]:
+        log.warning("scene quality check: {} has joint that cannot extend for >66%.".format(name))
+
+
+def _background_scene_quality_check(
+    bodies,
+    overlapped_body_ids,
+    fixed_body_ids,
+    joint_collision_allowed,
+    body_id_to_name,
+    physics_timestep,
+    gravity,
+    merge_fixed_links,
+    cache_path,
+):
+    """
+    Run the scene quality check in a new pybullet client, log its warnings and cache its result.
+    Only the bodies of the URDF objects are loaded, in the state captured by get_scene_quality_snapshot.
+    """
+    p.connect(p.DIRECT)
+    try:
+        p.setTimeStep(physics_timestep)
+        p.setGravity(0, 0, gravity)
+        flags = p.URDF_ENABLE_SLEEPING | p.URDF_IGNORE_VISUAL_SHAPES
+        if merge_fixed_links:
+            flags |= p.URDF_MERGE_FIXED_LINKS
+
+        new_body_ids = {}
+        for body in bodies:
+            body_id = p.loadURDF(body["urdf_path"], flags=flags, useFixedBase=body["is_fixed"])
+            p.changeDynamics(body_id, -1, activationState=p.ACTIVATION_STATE_ENABLE_SLEEPING)
+            p.resetBasePositionAndOrientation(body_id, body["pos"], body["orn"])
+            for j, j_pos in enumerate(body["joint_positions"]):
+                p.resetJointState(body_id, j, j_pos)
+                if p.getJointInfo(body_id, j)[2] in [p.JOINT_REVOLUTE, p.JOINT_PRISMATIC]:
+                    p.setJointMotorControl2(
+                        body_id, j, p.VELOCITY_CONTROL, targetVelocity=0.0, force=body["joint_friction"]
+                    )
+            new_body_ids[body["body_id"]] = body_id
+
+        # bodies that are not loaded (e.g. robots) are left out of the check
+        overlapped_body_ids = [
+            (new_body_ids[body_a], new_body_ids[body_b])
+            for body_a, body_b in overlapped_body_ids
+            if body_a in new_body_ids and body_b in new_body_ids
+        ]
+        fixed_body_ids = [new_body_ids[body_id] for body_id in fixed_body_ids if body_id in new_body_ids]
+        collision_groups = CollisionGroupManager()
+        for body in bodies:
+            if body["is_fixed"]:
+                collision_groups.add_fixed_body(new_body_ids[body["body_id"]], body["collision_group"])
+
+        new_body_id_to_name = {
+            new_body_ids[body_id]: name for body_id, name in body_id_to_name.items() if body_id in new_body_ids
+        }
+        result = _scene_quality_result(
+            *_compute_scene_quality(overlapped_body_ids, fixed_body_ids, joint_collision_allowed), new_body_id_to_name
+        )
+    finally:
+        p.disconnect()
+
+    _log_scene_quality_result(result)
+    atomic_save_json(cache_path, result)
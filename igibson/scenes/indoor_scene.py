@@ -3,18 +3,23 @@ import os
 import pickle
 import sys
 from abc import ABCMeta
+from collections import OrderedDict
 
 import cv2
-import networkx as nx
 import numpy as np
 from future.utils import with_metaclass
 from PIL import Image
+from scipy.sparse import csr_matrix
 
 from igibson.scenes.scene_base import Scene
-from igibson.utils.utils import l2_distance
+from igibson.utils.cache_utils import atomic_save_npz, get_cache_dir, hash_key, load_npz
+from igibson.utils.geodesic_utils import GeodesicDistanceField, TraversabilityGrid, largest_connected_component
 
 log = logging.getLogger(__name__)
 
+# Bump whenever the layout of the cached traversability graphs changes
+TRAV_GRAPH_CACHE_VERSION = 1
+
 
 class IndoorScene(with_metaclass(ABCMeta, Scene)):
     """
@@ -57,6 +62,10 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         self.waypoint_interval = int(waypoint_resolution / trav_map_resolution)
         self.mesh_body_id = None
         self.floor_heights = [0.0]
+        # Geodesic distance fields of the most recent targets, keyed by floor and target cell
+        self.max_cached_geodesic_fields = 8
+        self.floor_trav_grid = {}
+        self.geodesic_fields = OrderedDict()
 
     def load_trav_map(self, maps_path):
         """
@@ -70,6 +79,8 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
 
         self.floor_map = []
         self.floor_graph = []
+        self.floor_trav_grid = {}
+        self.geodesic_fields = OrderedDict()
         for floor in range(len(self.floor_heights)):
             if self.trav_map_type == "with_obj_no_door":
                 # for this project Sonicverse, we will not render any doors in the trav map
@@ -112,10 +123,12 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
             # cv2.imwrite("/viscam/u/li2053/iGibson-dev/igibson/agents/savi_rt/trav_map_f.png", trav_map.astype(np.uint8))
             self.floor_map.append(trav_map)
 
-    # TODO: refactor into C++ for speedup
     def build_trav_graph(self, maps_path, floor, trav_map):
         """
-        Build traversibility graph and only take the largest connected component
+        Build traversibility graph and only take the largest connected component.
+        The graph is a TraversabilityGrid (CSR adjacency over the traversable cells). The pruned map and the graph
+        are cached on disk per scene, floor and traversability map settings, so reloading a scene does not build
+        them again.
 
         :param maps_path: String with the path to the folder containing the traversability maps
         :param floor: floor number
@@ -123,32 +136,40 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         """
 
         log.debug("Building traversable graph")
-        g = nx.Graph()
-        for i in range(self.trav_map_size):
-            for j in range(self.trav_map_size):
-                if trav_map[i, j] == 0:
-                    continue
-                g.add_node((i, j))
-                # 8-connected graph
-                neighbors = [(i - 1, j - 1), (i, j - 1), (i + 1, j - 1), (i - 1, j)]
-                for n in neighbors:
-                    if 0 <= n[0] < self.trav_map_size and 0 <= n[1] < self.trav_map_size and trav_map[n[0], n[1]] > 0:
-                        g.add_edge(n, (i, j), weight=l2_distance(n, (i, j)))
-
-        # only take the largest connected component
-        largest_cc = max(nx.connected_components(g), key=len)
-        g = g.subgraph(largest_cc).copy()
+        # the key includes the resized and eroded map, so edited map images invalidate the entry
+        cache_path = os.path.join(
+            get_cache_dir("trav_graphs"),
+            "{}_{}_{}.npz".format(
+                self.scene_id,
+                floor,
+                hash_key(
+                    TRAV_GRAPH_CACHE_VERSION,
+                    self.scene_id,
+                    floor,
+                    self.trav_map_resolution,
+                    self.trav_map_erosion,
+                    self.trav_map_type,
+                    trav_map,
+                ),
+            ),
+        )
+        cached = load_npz(cache_path)
+        if cached is not None and cached["trav_map"].shape == trav_map.shape:
+            trav_map[:, :] = cached["trav_map"]
+            num_nodes = np.count_nonzero(trav_map == 255)
+            graph = csr_matrix((cached["data"], cached["indices"], cached["indptr"]), shape=(num_nodes, num_nodes))
+            g = TraversabilityGrid(trav_map, graph=graph)
+        else:
+            # only take the largest connected component
+            # This overwrites the traversability map loaded before, only the cells of the component remain traversable
+            largest_connected_component(trav_map)
+            g = TraversabilityGrid(trav_map)
+            atomic_save_npz(
+                cache_path, trav_map=trav_map, indptr=g.graph.indptr, indices=g.graph.indices, data=g.graph.data
+            )
 
         self.floor_graph.append(g)
-
-        # update trav_map accordingly
-        # This overwrites the traversability map loaded before
-        # It sets everything to zero, then only sets to one the points where we have graph nodes
-        # Dangerous! if the traversability graph is not computed from the loaded map but from a file, it could overwrite
-        # it silently.
-        trav_map[:, :] = 0
-        for node in g.nodes:
-            trav_map[node[0], node[1]] = 255
+        self.floor_trav_grid[floor] = g
 
     def get_random_point(self, floor=None):
         """
@@ -218,42 +239,85 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         :param floor: floor number
         :param world_xy: 2D location in world reference frame (metric)
         """
-        map_xy = tuple(self.world_to_map(world_xy))
+        map_xy = self.world_to_map(world_xy)
         g = self.floor_graph[floor]
         return g.has_node(map_xy)
 
+    def world_to_map_continuous(self, xy):
+        """
+        Transforms 2D points in world (simulator) reference frame into continuous map coordinates
+
+        :param xy: (2,) or (N, 2) locations in world reference frame (metric)
+        :return: locations in map reference frame, world_to_map truncates them to cells
+        """
+        xy = np.asarray(xy, dtype=np.float64)
+        return np.flip(xy / self.trav_map_resolution + self.trav_map_size / 2.0, axis=-1)
+
+    def get_trav_grid(self, floor):
+        """
+        Get the sparse 8-connected graph of the traversable cells of a floor, built from the map if the scene was
+        loaded without build_graph
+
+        :param floor: floor number
+        :return: TraversabilityGrid
+        """
+        if floor not in self.floor_trav_grid:
+            self.floor_trav_grid[floor] = TraversabilityGrid(self.floor_map[floor])
+        return self.floor_trav_grid[floor]
+
+    def get_geodesic_field(self, floor, target_world):
+        """
+        Get the geodesic distance field of a target: the distance from every cell of the floor to the target,
+        computed with a single Dijkstra pass the first time the target is queried (e.g. at episode reset)
+
+        :param floor: floor number
+        :param target_world: 2D target location in world reference frame (metric)
+        :return: GeodesicDistanceField
+        """
+        target_map = self.world_to_map(target_world[:2])
+        key = (floor, tuple(target_map))
+        field = self.geodesic_fields.get(key)
+        if field is None:
+            field = GeodesicDistanceField(self.get_trav_grid(floor), target_map)
+            self.geodesic_fields[key] = field
+            if len(self.geodesic_fields) > self.max_cached_geodesic_fields:
+                self.geodesic_fields.popitem(last=False)
+        else:
+            self.geodesic_fields.move_to_end(key)
+        return field
+
+    def get_geodesic_distance(self, floor, source_world, target_world):
+        """
+        Get the geodesic distance from one point to another point with a lookup in the distance field of the target
+
+        :param floor: floor number
+        :param source_world: 2D source location in world reference frame (metric)
+        :param target_world: 2D target location in world reference frame (metric)
+        :return: geodesic distance
+        """
+        # the graph keeps only the largest connected component, so every traversable cell reaches the target
+        assert self.build_graph, "cannot get geodesic distance without building the graph"
+        field = self.get_geodesic_field(floor, target_world)
+        return field.get_distance(self.world_to_map_continuous(source_world[:2])) * self.trav_map_resolution
+
     def get_shortest_path(self, floor, source_world, target_world, entire_path=False):
         """
         Get the shortest path from one point to another point.
-        If any of the given point is not in the graph, add it to the graph and
-        create an edge between it to its closest node.
+        If any of the given point is not in the graph, it is connected to its closest node.
+        The path follows the distance field of the target, so only the first query for a target runs a graph search.
 
         :param floor: floor number
         :param source_world: 2D source location in world reference frame (metric)
         :param target_world: 2D target location in world reference frame (metric)
         :param entire_path: whether to return the entire path
         """
-        # call every step to calculate the geodesic potential
         assert self.build_graph, "cannot get shortest path without building the graph"
-        source_map = tuple(self.world_to_map(source_world))
-        target_map = tuple(self.world_to_map(target_world))
-
-        g = self.floor_graph[floor]
-
-        if not g.has_node(target_map):
-            nodes = np.array(g.nodes)
-            closest_node = tuple(nodes[np.argmin(np.linalg.norm(nodes - target_map, axis=1))])
-            g.add_edge(closest_node, target_map, weight=l2_distance(closest_node, target_map))
-
-        if not g.has_node(source_map):
-            nodes = np.array(g.nodes)
-            closest_node = tuple(nodes[np.argmin(np.linalg.norm(nodes - source_map, axis=1))])
-            g.add_edge(closest_node, source_map, weight=l2_distance(closest_node, source_map))
-
-        path_map = np.array(nx.astar_path(g, source_map, target_map, heuristic=l2_distance))
+        source_map = self.world_to_map(source_world[:2])
+        field = self.get_geodesic_field(floor, target_world)
+        geodesic_distance = self.get_geodesic_distance(floor, source_world, target_world)
 
-        path_world = self.map_to_world(path_map)
-        geodesic_distance = np.sum(np.linalg.norm(path_world[1:] - path_world[:-1], axis=1))
+        max_cells = None if entire_path else (self.num_waypoints - 1) * self.waypoint_interval + 1
+        path_world = self.map_to_world(field.get_path(source_map, max_cells=max_cells))
         path_world = path_world[:: self.waypoint_interval]
 
         if not entire_path:
@@ -6,6 +6,7 @@ from future.utils import with_metaclass
 from igibson.objects.particles import Particle
 from igibson.objects.visual_marker import VisualMarker
 from igibson.robots.robot_base import BaseRobot
+from igibson.utils.collision_utils import CollisionGroupManager
 
 log = logging.getLogger(__name__)
 
@@ -21,6 +22,7 @@ class Scene(with_metaclass(ABCMeta)):
         self.build_graph = False  # Indicates if a graph for shortest path has been built
         self.floor_body_ids = []  # List of ids of the floor_heights
         self.robots = []
+        self.collision_groups = CollisionGroupManager()
 
     @abstractmethod
     def _load(self, simulator):
@@ -106,6 +108,7 @@ class Scene(with_metaclass(ABCMeta)):
         body_ids = None
         if self.loaded:
             body_ids = obj.load(simulator)
+            self.collision_groups.add_object(obj)
 
         self._add_object(obj)
 
@@ -146,6 +149,18 @@ class Scene(with_metaclass(ABCMeta)):
         """
         raise NotImplementedError()
 
+    def get_geodesic_distance(self, floor, source_world, target_world):
+        """
+        Query the geodesic distance between two points in the given floor.
+
+        :param floor: floor to compute the geodesic distance in
+        :param source_world: initial location in world reference frame
+        :param target_world: target location in world reference frame
+        :return: geodesic distance
+        """
+        _, geodesic_distance = self.get_shortest_path(floor, source_world, target_world)
+        return geodesic_distance
+
     def get_floor_height(self, floor=0):
         """
         Get the height of the given floor.
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+from igibson.agents.savi.utils.dataset import MAP_SIZE
+from igibson.sensors.sensor_base import BaseSensor
+from igibson.utils.mesh_util import ortho
+
+DEFAULT_FLOORPLAN_MAP_DIR = "/viscam/u/wangzz/avGibson/data/ig_dataset/scenes/resized_sem/"
+
+# BGR colors of the dynamic overlay of the top-down map
+TRAJECTORY_COLOR = (0, 160, 0)
+GOAL_COLOR = (0, 0, 255)
+ROBOT_COLOR = (255, 0, 0)
+
+
+class MapSensor(BaseSensor):
+    """
+    Top-down map and floorplan map sensor.
+    The static top-down background of the scene is rendered once with an orthographic camera, without the robots and
+    the task markers, and the floorplan is loaded once per scene. Every step only the dynamic overlay (trajectory, goal
+    and robot pose) is drawn: the trajectory incrementally into a persistent layer, the goal and the robot onto a copy.
+    """
+
+    def __init__(self, env, modalities):
+        super(MapSensor, self).__init__(env)
+        self.modalities = modalities
+        self.robot_radius = self.config.get("top_down_robot_radius", 0.2)
+        self.p_range = MAP_SIZE[env.scene_id] / 200.0
+        # with dual resolution video the simulator renders at policy resolution, the map keeps the video resolution
+        self.resolution = (env.image_width_video, env.image_height_video) if env.dual_resolution_video else None
+        self.background = None
+        self.trajectory_layer = None
+        self.last_pixel = None
+
+        if "floorplan_map" in self.modalities:
+            floorplan_map_dir = self.config.get("floorplan_map_dir", DEFAULT_FLOORPLAN_MAP_DIR)
+            self.floorplan_map = np.array(Image.open(floorplan_map_dir + env.scene_id + ".png"))
+
+    def invalidate(self):
+        """
+        Render the top-down background again at the next reading, e.g. after the textures of the scene changed
+        """
+        self.background = None
+        self.trajectory_layer = None
+
+    def reset(self, env):
+        """
+        Clear the trajectory of the previous episode
+
+        :param env: environment instance
+        """
+        self.trajectory_layer = None
+        self.last_pixel = None
+
+    def render_background(self, env):
+        """
+        Render the scene from above with an orthographic camera, hiding the robots and the task markers
+
+        :param env: environment instance
+        :return: BGR uint8 top-down image of the scene, with a white background
+        """
+        renderer = env.simulator.renderer
+        camera_pose = np.array([0, 0, 4.0])
+        view_direction = np.array([0, 0, -1])
+        renderer.set_camera(camera_pose, camera_pose + view_direction, [0, 1, 0])
+        hidden = []
+        for robot in env.robots:
+            hidden.extend(robot.renderer_instances)
+        for name in ("initial_pos_vis_obj", "target_pos_vis_obj", "target_obj"):
+            obj = getattr(env.task, name, None)
+            if obj is not None:
+                hidden.extend(obj.renderer_instances)
+
+        prevP = renderer.P.copy()
+        prev_resolution = renderer.width, renderer.height
+        renderer.P = ortho(-self.p_range, self.p_range, -self.p_range, self.p_range, -10, 20.0)
+        try:
+            if self.resolution is not None:
+                renderer.set_resolution(*self.resolution)
+            frame, three_d = renderer.render(modes=("rgb", "3d"), hidden=hidden)
+        finally:
+            renderer.set_resolution(*prev_resolution)
+            renderer.P = prevP
+
+        depth = -three_d[:, :, 2]
+        frame[depth == 0] = 1.0
+        return (frame[:, :, 0:3][:, :, ::-1] * 255).astype(np.uint8)
+
+    def world_to_pixel(self, xy):
+        """
+        :param xy: world coordinates [x, y]
+        :return: (column, row) of the top-down map pixel
+        """
+        height, width = self.background.shape[:2]
+        col = (xy[0] + self.p_range) / (2 * self.p_range) * width
+        row = (self.p_range - xy[1]) / (2 * self.p_range) * height
+        return int(round(col)), int(round(row))
+
+    def get_top_down(self, env):
+        """
+        :param env: environment instance
+        :return: top-down map with the trajectory, the goal and the robot pose drawn over the cached background
+        """
+        if self.background is None:
+            self.background = self.render_background(env)
+        if self.trajectory_layer is None:
+            self.trajectory_layer = self.background.copy()
+
+        robot = env.robots[0]
+        pixel = self.world_to_pixel(robot.get_position()[:2])
+        if self.last_pixel is not None:
+            cv2.line(self.trajectory_layer, self.last_pixel, pixel, TRAJECTORY_COLOR, 2)
+        self.last_pixel = pixel
+
+        top_down = self.trajectory_layer.copy()
+        radius = max(int(round(self.robot_radius / (2 * self.p_range) * top_down.shape[1])), 1)
+        target_pos = getattr(env.task, "target_pos", None)
+        if target_pos is not None:
+            cv2.circle(top_down, self.world_to_pixel(target_pos[:2]), radius, GOAL_COLOR, -1)
+        yaw = robot.get_rpy()[2]
+        heading = (int(round(pixel[0] + 2 * radius * np.cos(yaw))), int(round(pixel[1] - 2 * radius * np.sin(yaw))))
+        cv2.circle(top_down, pixel, radius, ROBOT_COLOR, -1)
+        cv2.line(top_down, pixel, heading, ROBOT_COLOR, 2)
+        return top_down
+
+    def get_obs(self, env):
+        """
+        Get map sensor reading
+
+        :return: map sensor reading
+        """
+        obs = {}
+        if "top_down" in self.modalities:
+            obs["top_down"] = self.get_top_down(env)
+        if "floorplan_map" in self.modalities:
+            obs["floorplan_map"] = self.floorplan_map
+        return obs
@@ -19,6 +19,7 @@ from igibson.scenes.scene_base import Scene
 from igibson.utils.assets_utils import get_ig_avg_category_specs
 from igibson.utils.constants import PYBULLET_BASE_LINK_INDEX, PyBulletSleepState, SimulatorMode
 from igibson.utils.mesh_util import quat2rotmat, xyz2mat, xyzw2wxyz
+from igibson.utils.utils import increment_pybullet_state_version
 
 log = logging.getLogger(__name__)
 
@@ -392,6 +393,7 @@ class Simulator:
                     scale=np.array(dimensions),
                     texture_scale=texture_scale,
                     overwrite_material=overwrite_material,
+                    use_snapshot=not softbody,
                 )
                 visual_object = len(self.renderer.visual_objects) - 1
                 if caching_allowed:
@@ -454,6 +456,7 @@ class Simulator:
         """
         for _ in range(self.physics_timestep_num):
             p.stepSimulation()
+        increment_pybullet_state_version()
         self.sync()
 
     def sync(self, force_sync=False):
@@ -14,6 +14,7 @@ from igibson.robots.behavior_robot import BODY_ANGULAR_VELOCITY, BODY_LINEAR_VEL
 from igibson.robots.manipulation_robot import IsGraspingState
 from igibson.robots.robot_base import BaseRobot
 from igibson.simulator import Simulator
+from igibson.utils.utils import increment_pybullet_state_version
 from igibson.utils.vr_utils import VR_CONTROLLERS, VR_DEVICES, VrData, calc_offset, calc_z_rot_from_right
 
 log = logging.getLogger(__name__)
@@ -234,6 +235,7 @@ class SimulatorVR(Simulator):
         physics_start_time = time.perf_counter()
         for _ in range(self.physics_timestep_num):
             p.stepSimulation()
+        increment_pybullet_state_version()
         physics_dur = time.perf_counter() - physics_start_time
 
         non_physics_start_time = time.perf_counter()
@@ -28,7 +28,10 @@ class AudioGoalNavTask(PointNavRandomTask):
         #set the source height to be the same in the real world
         self.target_obj.set_position(self.target_pos)
         audio_obj_id = self.target_obj.get_body_ids()[0]
-        env.audio_system.registerSource(audio_obj_id, self.config['audio_to_play'], enabled=True)
+        audio_file = self.config['audio_to_play']
+        if self.episode is not None and self.episode["audio_file"]:
+            audio_file = str(self.episode["audio_file"])
+        env.audio_system.registerSource(audio_obj_id, audio_file, enabled=True)
         env.audio_system.setSourceRepeat(audio_obj_id)
 
     def load_target(self, env):
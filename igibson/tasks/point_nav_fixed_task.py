@@ -111,8 +111,9 @@ class PointNavFixedTask(BaseTask):
         :param env: environment instance
         :return: geodesic distance to the target position
         """
-        _, geodesic_dist = self.get_shortest_path(env)
-        return geodesic_dist
+        # a lookup in the distance field of the target, computed once per target
+        source = env.robots[0].get_position()[:2]
+        return env.scene.get_geodesic_distance(self.floor_num, source, self.target_pos[:2])
 
     def get_l2_potential(self, env):
         """
@@ -4,6 +4,7 @@ import numpy as np
 import pybullet as p
 
 from igibson.tasks.point_nav_fixed_task import PointNavFixedTask
+from igibson.utils.episode_sampling_utils import EpisodeDataset, EpisodeDatasetReader, PointNavEpisodeSampler
 from igibson.utils.utils import l2_distance, restoreState
 
 log = logging.getLogger(__name__)
@@ -19,14 +20,69 @@ class PointNavRandomTask(PointNavFixedTask):
         super(PointNavRandomTask, self).__init__(env)
         self.target_dist_min = self.config.get("target_dist_min", 1.0)
         self.target_dist_max = self.config.get("target_dist_max", 10.0)
+        # sample pairs from the traversability maps and check collisions without stepping the simulator
+        self.fast_reset = self.config.get("fast_reset", True)
+        self.episode_sampler = None
+        # play pre-generated episodes instead of sampling them, see igibson/utils/generate_episodes.py
+        episode_dataset = self.config.get("episode_dataset", None)
+        self.episode_dataset = EpisodeDataset.load(episode_dataset) if episode_dataset is not None else None
+        self.episode_reader = None
+        self.episode = None
+
+    def get_episode_reader(self, env):
+        """
+        Get the reader of the episodes of the current scene in the episode dataset
+
+        :param env: environment instance
+        :return: EpisodeDatasetReader
+        """
+        scene_id = env.config["scene_id"]
+        if self.episode_reader is None or self.episode_reader.scene_id != scene_id:
+            self.episode_reader = EpisodeDatasetReader(
+                self.episode_dataset,
+                scene_id,
+                shuffle=self.config.get("episode_dataset_shuffle", False),
+                seed=self.config.get("episode_dataset_seed", None),
+            )
+        return self.episode_reader
+
+    def get_episode_sampler(self, env):
+        """
+        Get the episode sampler of the current scene, None if the scene has no traversability maps
+
+        :param env: environment instance
+        :return: PointNavEpisodeSampler
+        """
+        if not hasattr(env.scene, "floor_map"):
+            return None
+        if self.episode_sampler is None or self.episode_sampler.scene is not env.scene:
+            self.episode_sampler = PointNavEpisodeSampler(env.scene, self.target_dist_min, self.target_dist_max)
+        return self.episode_sampler
 
-    def sample_initial_pose_and_target_pos(self, env):
+    def sample_initial_pose_and_target_pos(self, env, new_target=True):
         """
         Sample robot initial pose and target position
 
         :param env: environment instance
+        :param new_target: whether to draw a new target, otherwise only a new initial pose for the target of the
+            previous call. Only the traversability map sampler of fast_reset keeps the target
         :return: initial pose and target position
         """
+        sampler = self.get_episode_sampler(env) if self.fast_reset else None
+        if sampler is not None:
+            sample = sampler.sample(
+                self.floor_num,
+                new_target=new_target,
+                is_valid_target=lambda pos: env.test_valid_position(env.robots[0], pos, step_physics=False),
+            )
+            if sample is not None:
+                initial_pos, target_pos = sample
+                initial_orn = np.array([0, 0, np.random.uniform(0, np.pi * 2)])
+                log.debug("Sampled initial pose: {}, {}".format(initial_pos, initial_orn))
+                log.debug("Sampled target position: {}".format(target_pos))
+                return initial_pos, initial_orn, target_pos
+            log.warning("Failed to sample initial and target positions from the traversability map")
+
         _, initial_pos = env.scene.get_random_point(floor=self.floor_num)
         max_trials = 100
         dist = 0.0
@@ -49,11 +105,15 @@ class PointNavRandomTask(PointNavFixedTask):
 
     def reset_scene(self, env):
         """
-        Task-specific scene reset: get a random floor number first
+        Task-specific scene reset: get a random floor number first, or the next episode of the episode dataset
 
         :param env: environment instance
         """
-        self.floor_num = env.scene.get_random_floor()
+        if self.episode_dataset is not None:
+            self.episode = self.get_episode_reader(env).next()
+            self.floor_num = int(self.episode["floor"])
+        else:
+            self.floor_num = env.scene.get_random_floor()
         super(PointNavRandomTask, self).reset_scene(env)
 
     def reset_agent(self, env):
@@ -63,26 +123,50 @@ class PointNavRandomTask(PointNavFixedTask):
 
         :param env: environment instance
         """
+        if self.episode is not None:
+            # episodes of the dataset were sampled on the traversability map of the scene, they are played as is
+            self.target_pos = self.episode["target_pos"].astype(np.float64)
+            self.initial_pos = self.episode["initial_pos"].astype(np.float64)
+            self.initial_orn = self.episode["initial_orn"].astype(np.float64)
+            super(PointNavRandomTask, self).reset_agent(env)
+            return
+
         reset_success = False
         max_trials = 100
 
-        # cache pybullet state
-        # TODO: p.saveState takes a few seconds, need to speed up
-        state_id = p.saveState()
-        for i in range(max_trials):
-            initial_pos, initial_orn, target_pos = self.sample_initial_pose_and_target_pos(env)
-            reset_success = env.test_valid_position(
-                env.robots[0], initial_pos, initial_orn
-            ) and env.test_valid_position(env.robots[0], target_pos)
-            restoreState(state_id)
-            if reset_success:
-                break
+        if self.fast_reset:
+            # Collisions are checked without stepping the simulator, so there is no state to restore. The target
+            # is only redrawn when the robot does not fit there; otherwise, the next trial only draws a new initial
+            # position for the same target
+            new_target = True
+            for i in range(max_trials):
+                initial_pos, initial_orn, target_pos = self.sample_initial_pose_and_target_pos(
+                    env, new_target=new_target
+                )
+                target_valid = env.test_valid_position(env.robots[0], target_pos, step_physics=False)
+                reset_success = target_valid and env.test_valid_position(
+                    env.robots[0], initial_pos, initial_orn, step_physics=False
+                )
+                if reset_success:
+                    break
+                new_target = not target_valid
+        else:
+            # cache pybullet state
+            # TODO: p.saveState takes a few seconds, need to speed up
+            state_id = p.saveState()
+            for i in range(max_trials):
+                initial_pos, initial_orn, target_pos = self.sample_initial_pose_and_target_pos(env)
+                reset_success = env.test_valid_position(
+                    env.robots[0], initial_pos, initial_orn
+                ) and env.test_valid_position(env.robots[0], target_pos)
+                restoreState(state_id)
+                if reset_success:
+                    break
+            p.removeState(state_id)
 
         if not reset_success:
             log.warning("WARNING: Failed to reset robot without collision")
 
-        p.removeState(state_id)
-
         self.target_pos = target_pos
         self.initial_pos = initial_pos
         self.initial_orn = initial_orn
@@ -40,14 +40,17 @@ class ReachingRandomTask(PointNavRandomTask):
         """
         return self.get_l2_potential(env)
 
-    def sample_initial_pose_and_target_pos(self, env):
+    def sample_initial_pose_and_target_pos(self, env, new_target=True):
         """
         Sample robot initial pose and target position
 
         :param env: environment instance
+        :param new_target: whether to draw a new target, see PointNavRandomTask.sample_initial_pose_and_target_pos
         :return: initial pose and target position
         """
-        initial_pos, initial_orn, target_pos = super(ReachingRandomTask, self).sample_initial_pose_and_target_pos(env)
+        initial_pos, initial_orn, target_pos = super(ReachingRandomTask, self).sample_initial_pose_and_target_pos(
+            env, new_target=new_target
+        )
         target_pos[2] += np.random.uniform(self.target_height_range[0], self.target_height_range[1])
         return initial_pos, initial_orn, target_pos
 
@@ -0,0 +1,196 @@
+"""
+Helpers for the on-disk caches of derived data (baked audio probes, processed meshes, graphs, ...).
+All caches live under igibson.cache_path and can be deleted at any time.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+import igibson
+
+log = logging.getLogger(__name__)
+
+
+def get_cache_dir(*subdirs):
+    """
+    Get (and create) a directory inside the iGibson cache
+
+    :param subdirs: path components relative to igibson.cache_path
+    :return: absolute path to the cache directory
+    """
+    cache_dir = os.path.join(igibson.cache_path, *subdirs)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def hash_key(*parts):
+    """
+    Compute a stable content hash for a cache key.
+    Numpy arrays are hashed by dtype, shape and raw bytes; everything else through its JSON representation.
+
+    :param parts: values that together identify the cached data
+    :return: hex digest string
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            h.update(str(part.dtype).encode())
+            h.update(str(part.shape).encode())
+            h.update(part.tobytes())
+        elif isinstance(part, bytes):
+            h.update(part)
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        # separator so that ("ab", "c") and ("a", "bc") do not collide
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _atomic_write(path, suffix, mode, write_fn):
+    """
+    Write a file atomically: write_fn writes to a temporary file in the same directory, which then replaces path, so
+    that concurrent workers never observe a partially written cache entry
+
+    :param path: destination path
+    :param suffix: suffix of the temporary file
+    :param mode: mode the temporary file is opened with, "w" or "wb"
+    :param write_fn: function writing the data to the open file object
+    """
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=suffix)
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _load(path, read_fn, errors=(IOError, ValueError)):
+    """
+    Read a cache entry written by one of the atomic_save_* functions
+
+    :param path: path to the cache entry
+    :param read_fn: function reading the entry from its path
+    :param errors: exceptions raised by read_fn for an unreadable entry
+    :return: result of read_fn, or None if the entry does not exist or is unreadable
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_fn(path)
+    except errors as e:
+        log.warning("Ignoring corrupted cache entry {}: {}".format(path, e))
+        return None
+
+
+def atomic_publish_dir(tmp_dir, dest_dir, is_complete=None):
+    """
+    Move a directory written in full at tmp_dir into place at dest_dir, so that concurrent workers never observe a
+    partially written cache entry. An existing entry at dest_dir is moved aside atomically before it is deleted.
+    tmp_dir is deleted if it is not published.
+
+    :param tmp_dir: directory holding the new entry, in the same file system as dest_dir
+    :param dest_dir: destination directory
+    :param is_complete: function of a directory returning whether it holds a complete entry. A complete entry already
+        at dest_dir is kept, since other processes may be reading it. If None, any existing entry is replaced
+    :return: whether tmp_dir was published at dest_dir
+    """
+    try:
+        if is_complete is not None and is_complete(dest_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+        if os.path.exists(dest_dir):
+            stale_dir = tempfile.mkdtemp(
+                dir=os.path.dirname(os.path.abspath(dest_dir)), prefix=os.path.basename(dest_dir) + ".stale"
+            )
+            os.rename(dest_dir, os.path.join(stale_dir, os.path.basename(dest_dir)))
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        # fails if another process moved its entry into place in the meantime
+        os.rename(tmp_dir, dest_dir)
+        return True
+    except OSError as e:
+        log.warning("Could not publish the cache entry {}: {}".format(dest_dir, e))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def atomic_save_npz(path, **arrays):
+    """
+    Save arrays to an .npz file atomically
+
+    :param path: destination path, should end with .npz
+    :param arrays: arrays to store
+    """
+    _atomic_write(path, ".tmp.npz", "wb", lambda f: np.savez(f, **arrays))
+
+
+def load_npz(path):
+    """
+    Load a cache entry written by atomic_save_npz
+
+    :param path: path to the .npz file
+    :return: dictionary of arrays, or None if the entry does not exist or is unreadable
+    """
+    return _load(path, _read_npz, errors=(IOError, ValueError, EOFError, zipfile.BadZipFile))
+
+
+def atomic_save_npy(path, array):
+    """
+    Save an array to an .npy file atomically
+
+    :param path: destination path, should end with .npy
+    :param array: array to store
+    """
+    _atomic_write(path, ".tmp.npy", "wb", lambda f: np.save(f, array))
+
+
+def load_npy(path, mmap_mode=None):
+    """
+    Load a cache entry written by atomic_save_npy
+
+    :param path: path to the .npy file
+    :param mmap_mode: memory-map mode passed to np.load, e.g. "r"
+    :return: array, or None if the entry does not exist or is unreadable
+    """
+    return _load(path, lambda path: np.load(path, mmap_mode=mmap_mode, allow_pickle=False))
+
+
+def atomic_save_json(path, data):
+    """
+    Save a JSON document atomically
+
+    :param path: destination path, should end with .json
+    :param data: JSON serializable data
+    """
+    _atomic_write(path, ".tmp.json", "w", lambda f: json.dump(data, f))
+
+
+def load_json(path):
+    """
+    Load a cache entry written by atomic_save_json
+
+    :param path: path to the .json file
+    :return: loaded data, or None if the entry does not exist or is unreadable
+    """
+    return _load(path, _read_json)
@@ -0,0 +1,96 @@
+"""
+Collision filtering between the bodies of a scene.
+"""
+import pybullet as p
+
+from igibson.utils.constants import DEFAULT_COLLISION_GROUP, FIXED_BODY_COLLISION_GROUP, get_collision_group_mask
+
+
+class CollisionGroupManager(object):
+    """
+    Disables the collisions between the base links of fixed bodies with pybullet collision groups instead of one
+    collision filter pair per pair of fixed bodies.
+    The base link of a fixed body in the default collision group is moved to FIXED_BODY_COLLISION_GROUP, whose mask
+    excludes that group, so registering a body costs a single call whatever the number of fixed bodies. Fixed bodies
+    in a special collision group (e.g. floors, which some robots do not collide with) keep it, and their collisions
+    with the other fixed bodies are disabled pair by pair. Per-pair exceptions take precedence over the groups, as
+    pybullet collision filter pairs do over group masks.
+    """
+
+    def __init__(self):
+        self.fixed_body_ids = set()
+        # fixed bodies that keep their special collision group
+        self.special_fixed_body_ids = []
+        # (body_a, body_b) with body_a < body_b -> whether their base links collide
+        self.pair_exceptions = {}
+
+    def is_fixed(self, body_id):
+        """
+        :param body_id: pybullet body id
+        :return: whether the body is registered as fixed
+        """
+        return body_id in self.fixed_body_ids
+
+    def add_fixed_body(self, body_id, collision_group=1 << DEFAULT_COLLISION_GROUP):
+        """
+        Register a fixed body, disabling the collisions between its base link and the base links of the other fixed
+        bodies
+
+        :param body_id: pybullet body id
+        :param collision_group: collision group bitvector of the body
+        """
+        if self.is_fixed(body_id):
+            return
+        if collision_group == 1 << DEFAULT_COLLISION_GROUP:
+            p.setCollisionFilterGroupMask(
+                body_id,
+                -1,
+                1 << FIXED_BODY_COLLISION_GROUP,
+                get_collision_group_mask([FIXED_BODY_COLLISION_GROUP]),
+            )
+            pair_body_ids = self.special_fixed_body_ids
+        else:
+            pair_body_ids = self.fixed_body_ids
+            self.special_fixed_body_ids.append(body_id)
+        for other_body_id in pair_body_ids:
+            if self.get_pair_key(body_id, other_body_id) not in self.pair_exceptions:
+                p.setCollisionFilterPair(body_id, other_body_id, -1, -1, enableCollision=0)
+        self.fixed_body_ids.add(body_id)
+
+    def add_object(self, obj):
+        """
+        Register the fixed bodies of an object, as given by its is_fixed attribute (e.g. URDFObject)
+
+        :param obj: loaded object
+        """
+        for body_id, is_fixed in zip(obj.get_body_ids(), getattr(obj, "is_fixed", [])):
+            if is_fixed:
+                self.add_fixed_body(body_id, obj.collision_group)
+
+    @staticmethod
+    def get_pair_key(body_a, body_b):
+        return (body_a, body_b) if body_a < body_b else (body_b, body_a)
+
+    def set_pair_collision(self, body_a, body_b, enable):
+        """
+        Enable or disable the collisions between the base links of two bodies, overriding their groups
+
+        :param body_a: pybullet body id
+        :param body_b: pybullet body id
+        :param enable: whether the base links collide
+        """
+        self.pair_exceptions[self.get_pair_key(body_a, body_b)] = bool(enable)
+        p.setCollisionFilterPair(body_a, body_b, -1, -1, enableCollision=int(enable))
+
+    def clear_pair_collision(self, body_a, body_b):
+        """
+        Remove the exception of a pair of bodies, so that the groups decide again whether they collide
+
+        :param body_a: pybullet body id
+        :param body_b: pybullet body id
+        """
+        if self.pair_exceptions.pop(self.get_pair_key(body_a, body_b), None) is None:
+            return
+        # pybullet cannot remove a filter pair, it is set to the result of the groups
+        enable = not (self.is_fixed(body_a) and self.is_fixed(body_b))
+        p.setCollisionFilterPair(body_a, body_b, -1, -1, enableCollision=int(enable))
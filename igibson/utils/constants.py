@@ -50,6 +50,8 @@ SPECIAL_COLLISION_GROUPS = {
     "floors": 6,
     "carpet": 7,
 }
+# Group of the base links of the fixed scene bodies, which do not collide with each other
+FIXED_BODY_COLLISION_GROUP = 8
 
 
 def get_collision_group_mask(groups_to_exclude=[]):
@@ -0,0 +1,220 @@
+"""
+Sampling of navigation episodes over the traversability maps of a scene, and pre-generated episode sets.
+"""
+import numpy as np
+
+from igibson.utils.cache_utils import atomic_save_npz
+
+
+class PointNavEpisodeSampler(object):
+    """
+    Samples (initial position, target position) pairs whose distance is within a range.
+    The valid cells of every floor are taken once from its eroded traversability map. A target cell is drawn uniformly,
+    and initial cells uniformly among the valid cells within range of it, read from the geodesic distance field of the
+    target. That field is the one the task uses for its rewards (cached by the scene, see
+    IndoorScene.get_geodesic_field), so an episode costs one graph search instead of one per rejected pair, and the
+    initial cells within range of the current target are kept for the following trials.
+    """
+
+    def __init__(self, scene, target_dist_min, target_dist_max):
+        """
+        :param scene: IndoorScene with loaded traversability maps
+        :param target_dist_min: minimum distance between the initial and target positions, in meters
+        :param target_dist_max: maximum distance between the initial and target positions, in meters
+        """
+        self.scene = scene
+        self.target_dist_min = target_dist_min
+        self.target_dist_max = target_dist_max
+        self.floor_cells = {}
+        # floor, target cell and the valid cells within range of it, for the trials of the current episode
+        self.target = None
+
+    def get_valid_cells(self, floor):
+        """
+        :param floor: floor number
+        :return: (N, 2) traversable cells of the floor
+        """
+        if floor not in self.floor_cells:
+            self.floor_cells[floor] = np.argwhere(self.scene.floor_map[floor] == 255)
+        return self.floor_cells[floor]
+
+    def get_distances(self, floor, target_cell, cells):
+        """
+        :param floor: floor number
+        :param target_cell: target cell in map coordinates
+        :param cells: (N, 2) cells in map coordinates
+        :return: (N,) geodesic distances of the cells to the target if the scene has a traversability graph,
+            euclidean distances otherwise, in meters
+        """
+        if self.scene.build_graph:
+            field = self.scene.get_geodesic_field(floor, self.scene.map_to_world(target_cell))
+            distances = field.distance[cells[:, 0], cells[:, 1]]
+        else:
+            distances = np.linalg.norm(cells - target_cell, axis=1)
+        return distances * self.scene.trav_map_resolution
+
+    def get_position(self, floor, cell):
+        """
+        :param floor: floor number
+        :param cell: cell in map coordinates
+        :return: position [x, y, z] of the cell on the floor
+        """
+        return np.append(self.scene.map_to_world(cell), self.scene.floor_heights[floor])
+
+    def sample_target(self, floor, is_valid_target=None, max_trials=100, max_searches=10):
+        """
+        Draw a new target cell that has valid cells within range.
+        Candidate targets are checked with is_valid_target before their distance field is computed, so the graph
+        search only runs for targets that can be used.
+
+        :param floor: floor number
+        :param is_valid_target: function of a target position [x, y, z] returning whether it can be used, e.g.
+            whether the robot fits there. All the valid cells can be used if None
+        :param max_trials: number of targets to draw
+        :param max_searches: number of distance fields to compute
+        :return: whether a target was found
+        """
+        cells = self.get_valid_cells(floor)
+        self.target = None
+        if len(cells) == 0:
+            return False
+        num_searches = 0
+        for _ in range(max_trials):
+            target_cell = cells[np.random.randint(len(cells))]
+            if is_valid_target is not None and not is_valid_target(self.get_position(floor, target_cell)):
+                continue
+            if num_searches == max_searches:
+                return False
+            num_searches += 1
+            distances = self.get_distances(floor, target_cell, cells)
+            in_range = (distances > self.target_dist_min) & (distances < self.target_dist_max)
+            if np.any(in_range):
+                self.target = (floor, target_cell, cells[in_range])
+                return True
+        return False
+
+    def sample(self, floor, new_target=True, is_valid_target=None):
+        """
+        Sample the initial and target positions of an episode
+
+        :param floor: floor number
+        :param new_target: whether to draw a new target, otherwise only a new initial position for the target of the
+            previous call
+        :param is_valid_target: function of a target position [x, y, z] returning whether it can be used, see
+            sample_target
+        :return: initial position and target position [x, y, z], or None if no pair within range was found
+        """
+        if new_target or self.target is None or self.target[0] != floor:
+            if not self.sample_target(floor, is_valid_target=is_valid_target):
+                return None
+        _, target_cell, initial_cells = self.target
+        initial_cell = initial_cells[np.random.randint(len(initial_cells))]
+        return self.get_position(floor, initial_cell), self.get_position(floor, target_cell)
+
+
+class EpisodeDataset(object):
+    """
+    Set of pre-generated navigation episodes, stored column by column in a .npz file so that a whole set loads with
+    a few array reads and any episode is an index lookup
+    """
+
+    # column name, dtype and per-episode shape
+    COLUMNS = (
+        ("scene_id", np.str_, ()),
+        ("floor", np.int16, ()),
+        ("initial_pos", np.float32, (3,)),
+        ("initial_orn", np.float32, (3,)),
+        ("target_pos", np.float32, (3,)),
+        ("geodesic_distance", np.float32, ()),
+        ("audio_file", np.str_, ()),
+    )
+
+    def __init__(self, columns):
+        """
+        :param columns: dictionary from column name to array with one row per episode
+        """
+        self.columns = {}
+        for name, dtype, shape in self.COLUMNS:
+            self.columns[name] = np.asarray(columns[name], dtype=dtype).reshape((-1,) + shape)
+        lengths = set(len(column) for column in self.columns.values())
+        if len(lengths) > 1:
+            raise ValueError("Episode dataset columns have different lengths: {}".format(sorted(lengths)))
+        self.scene_indices = {}
+
+    def __len__(self):
+        return len(self.columns["floor"])
+
+    def __getitem__(self, index):
+        """
+        :param index: episode index
+        :return: dictionary from column name to the value of the episode
+        """
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def get_scene_indices(self, scene_id):
+        """
+        :param scene_id: scene id
+        :return: indices of the episodes of the scene, in order
+        """
+        if scene_id not in self.scene_indices:
+            self.scene_indices[scene_id] = np.flatnonzero(self.columns["scene_id"] == scene_id)
+        return self.scene_indices[scene_id]
+
+    @classmethod
+    def concatenate(cls, datasets):
+        """
+        :param datasets: list of EpisodeDataset
+        :return: EpisodeDataset with the episodes of all the datasets, in order
+        """
+        return cls(
+            {name: np.concatenate([dataset.columns[name] for dataset in datasets]) for name, _, _ in cls.COLUMNS}
+        )
+
+    def save(self, path):
+        """
+        :param path: path of the .npz file
+        """
+        atomic_save_npz(path, **self.columns)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: path of the .npz file
+        :return: EpisodeDataset
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+
+class EpisodeDatasetReader(object):
+    """
+    Plays the episodes of a scene from an EpisodeDataset, in order or shuffled, looping over them
+    """
+
+    def __init__(self, dataset, scene_id, shuffle=False, seed=None):
+        """
+        :param dataset: EpisodeDataset
+        :param scene_id: scene id
+        :param shuffle: whether to shuffle the episodes every time all of them have been played
+        :param seed: seed of the shuffling, for reproducible orders
+        """
+        self.dataset = dataset
+        self.scene_id = scene_id
+        self.indices = dataset.get_scene_indices(scene_id)
+        if len(self.indices) == 0:
+            raise ValueError("No episode of scene {} in the episode dataset".format(scene_id))
+        self.shuffle = shuffle
+        self.rng = np.random.RandomState(seed)
+        self.order = self.indices
+        self.cursor = len(self.indices)
+
+    def next(self):
+        """
+        :return: dictionary from column name to the value of the next episode
+        """
+        if self.cursor >= len(self.order):
+            self.order = self.rng.permutation(self.indices) if self.shuffle else self.indices
+            self.cursor = 0
+        episode = self.dataset[self.order[self.cursor]]
+        self.cursor += 1
+        return episode
@@ -0,0 +1,133 @@
+"""
+Pre-generate point navigation episodes for a set of scenes, to be played by the navigation tasks with the
+episode_dataset config option instead of sampling them at every reset.
+Scenes are processed in parallel; only their traversability maps are loaded, no simulator is needed.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+
+from igibson.scenes.gibson_indoor_scene import StaticIndoorScene
+from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
+from igibson.utils.assets_utils import get_scene_path
+from igibson.utils.episode_sampling_utils import EpisodeDataset, PointNavEpisodeSampler
+from igibson.utils.utils import parse_config
+
+log = logging.getLogger(__name__)
+
+
+def load_scene_trav_maps(config, scene_id):
+    """
+    Create the scene of an environment config and load its traversability maps, without loading it into a simulator
+
+    :param config: environment config
+    :param scene_id: scene id
+    :return: IndoorScene with loaded traversability maps
+    """
+    # the traversability graph keeps the largest connected component, so that every episode is feasible
+    kwargs = dict(
+        build_graph=True,
+        trav_map_resolution=config.get("trav_map_resolution", 0.1),
+        trav_map_erosion=config.get("trav_map_erosion", 2),
+    )
+    if config["scene"] == "gibson":
+        scene = StaticIndoorScene(scene_id, **kwargs)
+        scene.load_floor_metadata()
+        scene.load_trav_map(get_scene_path(scene_id))
+    elif config["scene"] == "igibson":
+        scene = InteractiveIndoorScene(scene_id, trav_map_type=config.get("trav_map_type", "with_obj"), **kwargs)
+        scene.load_trav_map(os.path.join(scene.scene_dir, "layout"))
+    else:
+        raise ValueError("Episodes can only be generated for gibson and igibson scenes, not {}".format(config["scene"]))
+    return scene
+
+
+def generate_scene_episodes(config, scene_id, num_episodes, seed, audio_files=None):
+    """
+    Generate the episodes of one scene
+
+    :param config: environment config
+    :param scene_id: scene id
+    :param num_episodes: number of episodes
+    :param seed: random seed
+    :param audio_files: audio files to draw the source of every episode from, None for no source
+    :return: EpisodeDataset
+    """
+    np.random.seed(seed)
+    scene = load_scene_trav_maps(config, scene_id)
+    sampler = PointNavEpisodeSampler(scene, config.get("target_dist_min", 1.0), config.get("target_dist_max", 10.0))
+
+    columns = {name: [] for name, _, _ in EpisodeDataset.COLUMNS}
+    for _ in range(num_episodes):
+        floor = np.random.randint(len(scene.floor_heights))
+        sample = sampler.sample(floor)
+        if sample is None:
+            log.warning("Failed to sample an episode on floor {} of {}".format(floor, scene_id))
+            continue
+        initial_pos, target_pos = sample
+        columns["scene_id"].append(scene_id)
+        columns["floor"].append(floor)
+        columns["initial_pos"].append(initial_pos)
+        columns["initial_orn"].append([0, 0, np.random.uniform(0, np.pi * 2)])
+        columns["target_pos"].append(target_pos)
+        columns["geodesic_distance"].append(scene.get_geodesic_distance(floor, initial_pos[:2], target_pos[:2]))
+        columns["audio_file"].append(np.random.choice(audio_files) if audio_files else "")
+    return EpisodeDataset(columns)
+
+
+def _generate_scene_episodes(args):
+    return generate_scene_episodes(*args)
+
+
+def generate_episodes(config, scene_ids, num_episodes, seed=0, audio_files=None, num_workers=1, shard_size=250):
+    """
+    Generate the episodes of several scenes in parallel.
+    The episodes of every scene are split into shards generated by different processes. Every shard gets its own
+    seed derived from @seed, so the episodes do not depend on the number of processes.
+
+    :param config: environment config
+    :param scene_ids: scene ids
+    :param num_episodes: number of episodes per scene
+    :param seed: random seed
+    :param audio_files: audio files to draw the source of every episode from, None for no source
+    :param num_workers: number of processes
+    :param shard_size: number of episodes generated by a process at once
+    :return: EpisodeDataset with the episodes of all the scenes, in the order of scene_ids
+    """
+    jobs = []
+    for scene_id in scene_ids:
+        for start in range(0, num_episodes, shard_size):
+            num_shard_episodes = min(shard_size, num_episodes - start)
+            jobs.append((config, scene_id, num_shard_episodes, seed + len(jobs), audio_files))
+    if num_workers > 1:
+        with multiprocessing.Pool(num_workers) as pool:
+            datasets = pool.map(_generate_scene_episodes, jobs)
+    else:
+        datasets = [_generate_scene_episodes(job) for job in jobs]
+    return EpisodeDataset.concatenate(datasets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate point navigation episodes")
+    parser.add_argument("config", type=str, help="Environment config file")
+    parser.add_argument("output", type=str, help="Output .npz file")
+    parser.add_argument("--scenes", type=str, nargs="+", help="Scene ids, defaults to the scene of the config")
+    parser.add_argument("--num_episodes", type=int, default=1000, help="Number of episodes per scene")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--audio_files", type=str, nargs="+", help="Audio files of the sources of the episodes")
+    parser.add_argument("--num_workers", type=int, default=multiprocessing.cpu_count(), help="Number of processes")
+    args = parser.parse_args()
+
+    config = parse_config(args.config)
+    scene_ids = args.scenes if args.scenes else [config["scene_id"]]
+    dataset = generate_episodes(config, scene_ids, args.num_episodes, args.seed, args.audio_files, args.num_workers)
+    dataset.save(args.output)
+    log.info("Saved {} episodes to {}".format(len(dataset), args.output))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
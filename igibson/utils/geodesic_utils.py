@@ -0,0 +1,180 @@
+"""
+Geodesic distances over traversability maps.
+The traversable cells of a floor form an 8-connected grid graph, stored as a scipy sparse matrix, and distances to a
+goal are computed for every cell at once with a single Dijkstra pass, so that per-step queries are array lookups.
+"""
+import numpy as np
+from scipy.ndimage import distance_transform_edt, label
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Half of the 8-connected neighborhood, the other half is covered by symmetry
+GRID_NEIGHBOR_OFFSETS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class TraversabilityGrid(object):
+    """
+    8-connected graph over the traversable cells of a traversability map, with edges weighted by their length in cells.
+    The graph is never modified by queries: points off the graph are snapped to their closest traversable cell with a
+    lookup table computed once per map.
+    """
+
+    def __init__(self, trav_map, graph=None):
+        """
+        :param trav_map: traversability map, traversable cells are 255
+        :param graph: CSR adjacency of the traversable cells, in row-major order, e.g. loaded from a cache.
+            Built from the map if not given
+        """
+        self.size = trav_map.shape[0]
+        self.traversable = trav_map == 255
+        self.node_cells = np.argwhere(self.traversable)
+        self.node_index = np.full(trav_map.shape, -1, dtype=np.int64)
+        self.node_index[self.traversable] = np.arange(len(self.node_cells))
+        self._nearest_cells = None
+        if graph is not None:
+            self.graph = graph
+            return
+
+        rows, cols, weights = [], [], []
+        height, width = trav_map.shape
+        for di, dj in GRID_NEIGHBOR_OFFSETS:
+            # cells (i, j) and (i + di, j + dj) both traversable, for j + dj inside the map
+            j_start, j_end = max(0, -dj), width - max(0, dj)
+            src = self.node_index[: height - di, j_start:j_end]
+            dst = self.node_index[di:, j_start + dj : j_end + dj]
+            valid = (src >= 0) & (dst >= 0)
+            rows.append(src[valid])
+            cols.append(dst[valid])
+            weights.append(np.full(np.count_nonzero(valid), np.hypot(di, dj)))
+        rows, cols, weights = np.concatenate(rows), np.concatenate(cols), np.concatenate(weights)
+        num_nodes = len(self.node_cells)
+        self.graph = csr_matrix(
+            (np.concatenate([weights, weights]), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(num_nodes, num_nodes),
+        )
+
+    def has_node(self, cell):
+        """
+        :param cell: cell in map coordinates
+        :return: whether the cell is a node of the graph
+        """
+        i, j = cell
+        return 0 <= i < self.size and 0 <= j < self.size and bool(self.traversable[i, j])
+
+    def nearest_node_cells(self, cells):
+        """
+        Snap cells (possibly outside of the map) to the closest traversable cell
+
+        :param cells: (N, 2) integer cells
+        :return: (N, 2) closest traversable cells
+        """
+        if self._nearest_cells is None:
+            # for every cell, the indices of the closest traversable cell
+            self._nearest_cells = distance_transform_edt(~self.traversable, return_distances=False, return_indices=True)
+        cells = np.clip(np.asarray(cells, dtype=np.int64).reshape(-1, 2), 0, self.size - 1)
+        return self._nearest_cells[:, cells[:, 0], cells[:, 1]].T
+
+
+class GeodesicDistanceField(object):
+    """
+    Geodesic distance (in cells) from every cell of a floor to a target cell, computed with one Dijkstra pass.
+    Like the traversability graph queries, a target or a query point off the graph is connected to its closest
+    traversable cell by a straight segment.
+    """
+
+    def __init__(self, grid, target_cell):
+        """
+        :param grid: TraversabilityGrid of the floor
+        :param target_cell: target cell in map coordinates
+        """
+        self.grid = grid
+        self.target_cell = np.asarray(target_cell, dtype=np.int64)
+        self.target_node_cell = grid.nearest_node_cells(self.target_cell)[0]
+        target_offset = np.linalg.norm(self.target_node_cell - self.target_cell)
+
+        target_node = grid.node_index[tuple(self.target_node_cell)]
+        node_distance, self.predecessors = dijkstra(grid.graph, indices=target_node, return_predecessors=True)
+        self.distance = np.full(grid.traversable.shape, np.inf)
+        self.distance[grid.traversable] = node_distance + target_offset
+
+    def get_distance(self, map_xy):
+        """
+        Geodesic distance of continuous map coordinates, bilinearly interpolated between the traversable corners of
+        the cell containing them. Points whose cell corners are all off the graph are connected to the closest
+        traversable cell.
+
+        :param map_xy: (2,) or (N, 2) continuous map coordinates
+        :return: distance or (N,) distances in cells
+        """
+        map_xy = np.asarray(map_xy, dtype=np.float64)
+        points = map_xy.reshape(-1, 2)
+        size = self.grid.size
+        corner = np.floor(points).astype(np.int64)
+        frac = points - corner
+        weighted_sum = np.zeros(len(points))
+        weight_sum = np.zeros(len(points))
+        for di in (0, 1):
+            for dj in (0, 1):
+                i, j = corner[:, 0] + di, corner[:, 1] + dj
+                inside = (i >= 0) & (i < size) & (j >= 0) & (j < size)
+                corner_distance = np.full(len(points), np.inf)
+                corner_distance[inside] = self.distance[i[inside], j[inside]]
+                weight = (frac[:, 0] if di else 1 - frac[:, 0]) * (frac[:, 1] if dj else 1 - frac[:, 1])
+                finite = np.isfinite(corner_distance)
+                weighted_sum[finite] += weight[finite] * corner_distance[finite]
+                weight_sum[finite] += weight[finite]
+
+        distances = np.empty(len(points))
+        covered = weight_sum > 0
+        distances[covered] = weighted_sum[covered] / weight_sum[covered]
+        if not np.all(covered):
+            # off the graph: straight segment to the closest traversable cell
+            off_points = points[~covered]
+            off_cells = np.floor(off_points).astype(np.int64)
+            node_cells = self.grid.nearest_node_cells(off_cells)
+            off_distances = self.distance[node_cells[:, 0], node_cells[:, 1]] + np.linalg.norm(
+                node_cells - off_points, axis=1
+            )
+            # a point in the cell of an off-graph target reaches it directly
+            in_target_cell = np.all(off_cells == self.target_cell, axis=1)
+            off_distances[in_target_cell] = np.linalg.norm(off_points[in_target_cell] - self.target_cell, axis=1)
+            distances[~covered] = off_distances
+        return distances if map_xy.ndim > 1 else distances[0]
+
+    def get_path(self, source_cell, max_cells=None):
+        """
+        Shortest path from a cell to the target, following the Dijkstra predecessors
+
+        :param source_cell: source cell in map coordinates
+        :param max_cells: stop after this many cells, None for the entire path
+        :return: (M, 2) cells of the path, from the source to the target
+        """
+        source_cell = np.asarray(source_cell, dtype=np.int64)
+        if np.array_equal(source_cell, self.target_cell):
+            return source_cell[None]
+        path = [source_cell]
+        node_cell = self.grid.nearest_node_cells(source_cell)[0]
+        if not np.array_equal(node_cell, source_cell):
+            path.append(node_cell)
+        node = self.grid.node_index[tuple(node_cell)]
+        while self.predecessors[node] >= 0 and (max_cells is None or len(path) < max_cells):
+            node = self.predecessors[node]
+            path.append(self.grid.node_cells[node])
+        if self.predecessors[node] < 0 and not np.array_equal(path[-1], self.target_cell):
+            path.append(self.target_cell)
+        return np.array(path)
+
+
+def largest_connected_component(trav_map):
+    """
+    Keep only the largest 8-connected component of the traversable cells of a traversability map
+
+    :param trav_map: traversability map, traversable cells are 255. Modified in place
+    """
+    labels, num_components = label(trav_map == 255, structure=np.ones((3, 3)))
+    if num_components == 0:
+        return
+    # on ties, the component found first in row-major order
+    largest = np.argmax(np.bincount(labels.ravel())[1:]) + 1
+    trav_map[:, :] = 0
+    trav_map[labels == largest] = 255
@@ -0,0 +1,172 @@
+"""
+Fast-load snapshots of loaded scenes.
+A cold scene load parses every OBJ with tinyobjloader and computes the per-vertex tangent frames of every shape before
+uploading them to the renderer, then restores the state of every object one pybullet call at a time. A snapshot
+stores the result of that work in a directory, so that a new process loading the same scene skips it:
+
+- vertex_data.npy: the packed vertex arrays of all the meshes loaded by the renderer, memory-mapped at restore
+- info.json: format version, key of the scene, materials and shape table of every mesh, metadata of the objects,
+  number of bodies in the pybullet client
+- state.bullet: pybullet state of the scene right after loading
+
+The traversability graphs, the acoustic meshes, the processed object URDFs and the scene quality check results
+already have on-disk caches keyed by their inputs, so they are not duplicated in the snapshot.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pybullet as p
+
+from igibson.utils.cache_utils import atomic_publish_dir, hash_key
+from igibson.utils.utils import increment_pybullet_state_version
+
+log = logging.getLogger(__name__)
+
+# Bump to invalidate the existing snapshots
+SCENE_SNAPSHOT_VERSION = 2
+
+
+def get_mesh_key(obj_path, scale, transform_orn, transform_pos):
+    """
+    Key of the vertex data of an OBJ file loaded in the renderer with a given scale and transform
+
+    :param obj_path: path of obj file
+    :param scale: scale
+    :param transform_orn: rotation quaternion, convention xyzw, or None
+    :param transform_pos: translation, or None
+    :return: hex digest string
+    """
+    stat = os.stat(obj_path)
+    return hash_key(
+        os.path.abspath(obj_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        np.asarray(scale, dtype=np.float64),
+        None if transform_orn is None else np.asarray(transform_orn, dtype=np.float64),
+        None if transform_pos is None else np.asarray(transform_pos, dtype=np.float64),
+    )
+
+
+class SceneSnapshot(object):
+    """
+    Read side of a scene snapshot directory
+    """
+
+    def __init__(self, path):
+        """
+        :param path: snapshot directory
+        """
+        self.path = path
+        with open(os.path.join(path, "info.json"), "r") as f:
+            self.info = json.load(f)
+        self.vertex_data = np.load(os.path.join(path, "vertex_data.npy"), mmap_mode="r")
+        self.meshes = {mesh["key"]: mesh for mesh in self.info["meshes"]}
+        self.state_filename = os.path.join(path, "state.bullet")
+
+    @classmethod
+    def load(cls, path, scene_key):
+        """
+        :param path: snapshot directory
+        :param scene_key: key of the scene to load, see InteractiveIndoorScene.get_snapshot_key
+        :return: SceneSnapshot, or None if there is no snapshot of this scene at path
+        """
+        if not os.path.isfile(os.path.join(path, "info.json")):
+            return None
+        try:
+            snapshot = cls(path)
+        except (IOError, ValueError) as e:
+            log.warning("Ignoring corrupted scene snapshot {}: {}".format(path, e))
+            return None
+        if snapshot.info["version"] != SCENE_SNAPSHOT_VERSION or snapshot.info["scene_key"] != scene_key:
+            log.warning("Ignoring scene snapshot {} of a different scene or version".format(path))
+            return None
+        return snapshot
+
+    def get_mesh(self, key):
+        """
+        :param key: mesh key, see get_mesh_key
+        :return: materials and shapes of the mesh in the format of MeshRenderer.parse_object, or None if the mesh is
+            not in the snapshot. The vertex data of the shapes are read-only views of the memory-mapped array
+        """
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            return None
+        shapes = [
+            {
+                "name": name,
+                "material_id": material_id,
+                "vertex_data": self.vertex_data[start:end],
+                "shape": None,
+            }
+            for name, material_id, start, end in mesh["shapes"]
+        ]
+        return mesh["materials"], shapes
+
+    def matches_objects(self, objects):
+        """
+        :param objects: metadata of the loaded objects, see save
+        :return: whether the snapshot was taken with the same objects and body ids, and with no other bodies in the
+            pybullet client, so its state can be restored. The state file applies to the whole world
+        """
+        return self.info["num_bodies"] == p.getNumBodies() and self.info["objects"] == json.loads(json.dumps(objects))
+
+    def restore_state(self):
+        """
+        Restore the pybullet state of the snapshot
+        """
+        p.restoreState(fileName=self.state_filename)
+        increment_pybullet_state_version()
+
+    @staticmethod
+    def save(path, scene_key, renderer, objects):
+        """
+        Save a snapshot of the current pybullet state and of the meshes loaded by the renderer.
+        The snapshot is written to a temporary directory and moved into place, so that concurrent workers never read
+        a partial snapshot; a snapshot of a different scene or version already at path is replaced.
+
+        :param path: snapshot directory
+        :param scene_key: key of the loaded scene, see InteractiveIndoorScene.get_snapshot_key
+        :param renderer: MeshRenderer the scene is loaded in, recording the loaded meshes in mesh_records, or None
+        :param objects: JSON serializable metadata of the loaded objects, e.g. their body ids
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(path) + ".tmp")
+        try:
+            meshes = {}
+            vertex_data = []
+            num_vertices = 0
+            for record in renderer.mesh_records or [] if renderer is not None else []:
+                if record["key"] in meshes:
+                    continue
+                shapes = []
+                for name, material_id, vertex_data_index in record["shapes"]:
+                    data = renderer.vertex_data[vertex_data_index]
+                    shapes.append((name, material_id, num_vertices, num_vertices + len(data)))
+                    vertex_data.append(data)
+                    num_vertices += len(data)
+                meshes[record["key"]] = {"key": record["key"], "materials": record["materials"], "shapes": shapes}
+            vertex_data = np.concatenate(vertex_data) if vertex_data else np.zeros((0, 14), dtype=np.float32)
+            np.save(os.path.join(tmp_path, "vertex_data.npy"), vertex_data.astype(np.float32))
+            p.saveBullet(os.path.join(tmp_path, "state.bullet"))
+            info = {
+                "version": SCENE_SNAPSHOT_VERSION,
+                "scene_key": scene_key,
+                "meshes": list(meshes.values()),
+                "objects": objects,
+                "num_bodies": p.getNumBodies(),
+            }
+            with open(os.path.join(tmp_path, "info.json"), "w") as f:
+                json.dump(info, f)
+        except OSError as e:
+            log.warning("Could not save the scene snapshot {}: {}".format(path, e))
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        atomic_publish_dir(tmp_path, path)
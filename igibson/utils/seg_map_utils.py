@@ -0,0 +1,57 @@
+"""
+Lookup tables over segmentation maps.
+"""
+import numpy as np
+
+
+class LabelMapIndex(object):
+    """
+    Pixels of every label of an integer label map (e.g. the room segmentation of a scene), grouped once with a single
+    stable argsort so that listing, sampling or bounding the pixels of a label is an index lookup instead of a scan of
+    the whole map. Within a label the pixels are in row-major order, as returned by np.where.
+    """
+
+    def __init__(self, label_map):
+        """
+        :param label_map: 2D map of non-negative integer labels
+        """
+        self.shape = label_map.shape
+        flat = label_map.ravel()
+        order = np.argsort(flat, kind="stable")
+        counts = np.bincount(flat)
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+        self.pixels = np.stack(np.unravel_index(order, self.shape), axis=1).astype(np.int32)
+        self.labels = np.flatnonzero(counts)
+
+        # every label spans [start, next start) of self.pixels, empty labels are skipped by reduceat
+        label_starts = self.starts[self.labels]
+        self.aabb_min = np.stack([np.minimum.reduceat(self.pixels[:, i], label_starts) for i in range(2)], axis=1)
+        self.aabb_max = np.stack([np.maximum.reduceat(self.pixels[:, i], label_starts) for i in range(2)], axis=1)
+        self.label_to_aabb_idx = {label: i for i, label in enumerate(self.labels)}
+
+    def get_pixels(self, label):
+        """
+        :param label: label
+        :return: (N, 2) pixels of the label, in row-major order
+        """
+        if label < 0 or label >= len(self.starts) - 1:
+            return self.pixels[:0]
+        return self.pixels[self.starts[label] : self.starts[label + 1]]
+
+    def sample_pixel(self, label):
+        """
+        :param label: label
+        :return: (2,) pixel drawn uniformly among the pixels of the label
+        """
+        pixels = self.get_pixels(label)
+        return pixels[np.random.randint(len(pixels))]
+
+    def get_aabb(self, label):
+        """
+        :param label: label
+        :return: (2,) lowest and (2,) highest pixel coordinates of the label, or None if it has no pixel
+        """
+        if label not in self.label_to_aabb_idx:
+            return None
+        idx = self.label_to_aabb_idx[label]
+        return self.aabb_min[idx], self.aabb_max[idx]
@@ -250,6 +250,29 @@ def brighten_texture(input_filename, output_filename, brightness=1):
 
 # Other
 
+# Incremented whenever iGibson changes the pybullet state (physics steps, state restores), see
+# get_pybullet_state_version
+_pybullet_state_version = 0
+
+
+def get_pybullet_state_version():
+    """
+    Version of the pybullet state, to invalidate caches of values read from pybullet (e.g. joint states).
+    Code that changes the pybullet state directly, e.g. with p.stepSimulation or p.resetJointState, must call
+    increment_pybullet_state_version afterwards
+
+    :return: int, version of the pybullet state
+    """
+    return _pybullet_state_version
+
+
+def increment_pybullet_state_version():
+    """
+    Invalidate the caches of values read from pybullet, after a change of the pybullet state
+    """
+    global _pybullet_state_version
+    _pybullet_state_version += 1
+
 
 def restoreState(*args, **kwargs):
     """Restore to a given pybullet state, with a mitigation for a known sleep state restore bug.
@@ -264,7 +287,9 @@ def restoreState(*args, **kwargs):
         p.resetBasePositionAndOrientation(
             body_id, *p.getBasePositionAndOrientation(body_id), physicsClientId=kwargs.get("physicsClientId", 0)
         )
-    return p.restoreState(*args, **kwargs)
+    result = p.restoreState(*args, **kwargs)
+    increment_pybullet_state_version()
+    return result
 
 
 def let_user_pick(options, print_intro=True, selection="user"):
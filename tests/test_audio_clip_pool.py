@@ -0,0 +1,45 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from igibson.audio.clip_pool import AudioClipPool, AudioClipReader
+from igibson.utils.cache_utils import atomic_save_npy
+
+
+def test_audio_clip_pool_looped_reads(tmp_path):
+    samples = (np.arange(1000) % 300 - 150).astype(np.int16)
+    wav_path = str(tmp_path / "clip.wav")
+    with wave.open(wav_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(44100)
+        wav.writeframes(samples.tobytes())
+
+    pool = AudioClipPool(cache_dir=str(tmp_path))
+    clip = pool.get(wav_path)
+    assert pool.get(wav_path) is clip
+    assert clip.sample_rate == 44100 and clip.num_channels == 1
+
+    # a second pool memory-maps the decoded clip from the disk cache
+    cached_clip = AudioClipPool(cache_dir=str(tmp_path)).get(wav_path)
+    assert np.array_equal(cached_clip.samples, samples)
+
+    reader = AudioClipReader(cached_clip)
+    looped = np.concatenate([reader.read_looped(441) for _ in range(10)])
+    assert np.array_equal(looped, np.tile(samples, 5)[:4410])
+
+    reader.rewind()
+    assert [reader.read(700).size for _ in range(3)] == [700, 300, 0]
+
+
+def test_audio_clip_cache_failed_write(tmp_path, monkeypatch):
+    def failing_save(f, array):
+        f.write(b"partial")
+        raise IOError("disk full")
+
+    monkeypatch.setattr(np, "save", failing_save)
+    with pytest.raises(IOError):
+        atomic_save_npy(str(tmp_path / "clip.npy"), np.zeros(10, dtype=np.int16))
+    assert os.listdir(str(tmp_path)) == []
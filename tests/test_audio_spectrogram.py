@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import librosa
+import numpy as np
+import pytest
+from skimage.measure import block_reduce
+
+from igibson.audio.streaming_spectrogram import StreamingSpectrogram
+
+
+def full_window_spectrogram(window):
+    spectrogram_per_channel = []
+    for signal in window:
+        stft = np.abs(librosa.stft(signal, n_fft=512, hop_length=160, win_length=400))
+        stft = block_reduce(stft, block_size=(2, 2), func=np.mean)
+        spectrogram_per_channel.append(np.log1p(stft))
+    return np.stack(spectrogram_per_channel, axis=-1)
+
+
+def check_streaming_spectrogram(frames_per_buf, window_len, num_steps=20):
+    rng = np.random.RandomState(0)
+    streaming = StreamingSpectrogram(2, window_len)
+    window = np.zeros((2, window_len))
+    for _ in range(num_steps):
+        block = rng.uniform(-1.0, 1.0, size=(2, frames_per_buf))
+        # the window of the full recompute in AudioSystem.get_spectrogram
+        window = np.append(window[:, frames_per_buf:], block, axis=1)
+        streaming.push(block)
+        assert np.array_equal(streaming.window, window)
+        assert np.allclose(streaming.compute(), full_window_spectrogram(window))
+
+
+def check_hop_aligned_streaming_spectrogram(frames_per_buf, window_len, num_steps=20):
+    rng = np.random.RandomState(0)
+    streaming = StreamingSpectrogram(2, window_len, hop_aligned=True)
+    stream = np.zeros((2, window_len))
+    for _ in range(num_steps):
+        block = rng.uniform(-1.0, 1.0, size=(2, frames_per_buf))
+        stream = np.concatenate([stream, block], axis=1)
+        streaming.push(block)
+        # the window ends at the last multiple of the hop length, the leftover samples wait for the next push
+        window_end = stream.shape[1] - (stream.shape[1] - window_len) % 160
+        window = stream[:, window_end - window_len : window_end]
+        assert np.array_equal(streaming.window, window)
+        assert np.allclose(streaming.compute(), full_window_spectrogram(window))
+
+
+def count_computed_columns(monkeypatch, streaming):
+    computed = []
+    rfft = np.fft.rfft
+
+    def counting_rfft(a, *args, **kwargs):
+        computed.append(a.shape[-2])
+        return rfft(a, *args, **kwargs)
+
+    monkeypatch.setattr(np.fft, "rfft", counting_rfft)
+    streaming.compute()
+    monkeypatch.setattr(np.fft, "rfft", rfft)
+    return sum(computed)
+
+
+def test_streaming_spectrogram_unaligned_hop():
+    # 10Hz rendering at 44.1kHz, the default setup
+    check_streaming_spectrogram(4410, 13230)
+
+
+def test_streaming_spectrogram_aligned_hop():
+    check_streaming_spectrogram(1600, 13230)
+
+
+def test_hop_aligned_streaming_spectrogram():
+    check_hop_aligned_streaming_spectrogram(4410, 13230)
+    check_hop_aligned_streaming_spectrogram(1600, 13230)
+
+
+def test_audio_system_streaming_spectrogram():
+    audio_system = pytest.importorskip("igibson.audio.audio_system")
+    rng = np.random.RandomState(0)
+    # 10Hz rendering at 44.1kHz, the pushes are not multiples of the hop length
+    baseline = SimpleNamespace(
+        framesPerBuf=4410, window_by_channel=np.zeros((2, 13230)), streaming_spectrogram=None, is_Sim2Real=False
+    )
+    streaming = SimpleNamespace(
+        framesPerBuf=4410, streaming_spectrogram=StreamingSpectrogram(2, 13230), is_Sim2Real=False
+    )
+    for _ in range(10):
+        baseline.curr_audio_by_channel = streaming.curr_audio_by_channel = rng.uniform(-1.0, 1.0, size=(2, 4410))
+        expected = audio_system.AudioSystem.get_spectrogram(baseline)
+        assert np.allclose(audio_system.AudioSystem.get_spectrogram(streaming), expected)
+
+
+def test_streaming_spectrogram_reuses_columns_on_whole_hops(monkeypatch):
+    streaming = StreamingSpectrogram(2, 13230)
+    rng = np.random.RandomState(0)
+    for _ in range(3):
+        streaming.push(rng.uniform(-1.0, 1.0, size=(2, 1600)))
+        streaming.compute()
+    streaming.push(rng.uniform(-1.0, 1.0, size=(2, 1600)))
+    # the window advanced by 10 hops, only the frames touching new samples or the padded edges are computed
+    assert count_computed_columns(monkeypatch, streaming) <= 10 + 2 * 2
+    streaming.push(rng.uniform(-1.0, 1.0, size=(2, 4410)))
+    # not a whole number of hops, the whole window is transformed
+    assert count_computed_columns(monkeypatch, streaming) == streaming.num_frames
+
+
+def test_hop_aligned_streaming_spectrogram_appends_new_columns(monkeypatch):
+    streaming = StreamingSpectrogram(2, 13230, hop_aligned=True)
+    rng = np.random.RandomState(0)
+    for _ in range(3):
+        streaming.push(rng.uniform(-1.0, 1.0, size=(2, 4410)))
+        streaming.compute()
+    streaming.push(rng.uniform(-1.0, 1.0, size=(2, 4410)))
+    # the window advanced by 27 or 28 hops, only the frames touching new samples or the padded edges are computed
+    assert count_computed_columns(monkeypatch, streaming) <= 28 + 2 * 2
+    # nothing new to compute until the next push
+    assert count_computed_columns(monkeypatch, streaming) == 0
+
+
+def test_streaming_spectrogram_invalidate():
+    streaming = StreamingSpectrogram(2, 4410)
+    streaming.push(np.ones((2, 800)))
+    streaming.compute()
+    streaming.window[:] *= 0.5
+    streaming.invalidate()
+    assert np.allclose(streaming.compute(), full_window_spectrogram(streaming.window.copy()))
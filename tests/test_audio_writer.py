@@ -0,0 +1,38 @@
+import numpy as np
+import soundfile as sf
+
+from igibson.audio.audio_writer import StreamingAudioWriter
+
+
+def test_streaming_audio_writer_rotation(tmp_path):
+    rng = np.random.RandomState(0)
+    # more blocks than the pool holds, so blocks are recycled
+    blocks = rng.randint(-3000, 3000, size=(20, 2 * 441)).astype(np.int16)
+    writer = StreamingAudioWriter(44100, num_channels=2, block_frames=441, num_blocks=4)
+    paths = [str(tmp_path / "episode_{}.wav".format(episode)) for episode in range(2)]
+    for path in paths:
+        writer.open(path)
+        for block in blocks:
+            writer.write(block)
+        writer.close_file(wait=False)
+    writer.close()
+
+    for path in paths:
+        audio, sample_rate = sf.read(path, dtype="int16")
+        assert sample_rate == 44100
+        assert np.array_equal(audio, blocks.reshape(-1, 2))
+
+
+def test_streaming_audio_writer_wait_for_background_close(tmp_path):
+    block = np.arange(2 * 441, dtype=np.int16)
+    writer = StreamingAudioWriter(44100, num_channels=2, block_frames=441, num_blocks=4)
+    path = str(tmp_path / "episode.wav")
+    writer.open(path)
+    for _ in range(10):
+        writer.write(block)
+    writer.close_file(wait=False)
+    # joins the file finished in the background
+    writer.close_file(wait=True)
+    audio, _ = sf.read(path, dtype="int16")
+    assert np.array_equal(audio, np.tile(block, 10).reshape(-1, 2))
+    writer.close()
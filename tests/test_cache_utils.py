@@ -0,0 +1,42 @@
+import os
+
+from igibson.utils.cache_utils import atomic_publish_dir
+
+
+def write_entry(path, content):
+    os.makedirs(path)
+    with open(os.path.join(path, "data.txt"), "w") as f:
+        f.write(content)
+
+
+def read_entry(path):
+    with open(os.path.join(path, "data.txt"), "r") as f:
+        return f.read()
+
+
+def is_complete(path):
+    return os.path.isfile(os.path.join(path, "data.txt"))
+
+
+def test_atomic_publish_dir(tmp_path):
+    dest = str(tmp_path / "entry")
+    write_entry(str(tmp_path / "tmp1"), "first")
+    assert atomic_publish_dir(str(tmp_path / "tmp1"), dest, is_complete)
+    assert read_entry(dest) == "first"
+
+    # a complete entry is kept, other processes may be reading it
+    write_entry(str(tmp_path / "tmp2"), "second")
+    assert not atomic_publish_dir(str(tmp_path / "tmp2"), dest, is_complete)
+    assert read_entry(dest) == "first"
+
+    # an incomplete entry is replaced
+    os.remove(os.path.join(dest, "data.txt"))
+    write_entry(str(tmp_path / "tmp3"), "third")
+    assert atomic_publish_dir(str(tmp_path / "tmp3"), dest, is_complete)
+    assert read_entry(dest) == "third"
+
+    # without is_complete, any entry is replaced
+    write_entry(str(tmp_path / "tmp4"), "fourth")
+    assert atomic_publish_dir(str(tmp_path / "tmp4"), dest)
+    assert read_entry(dest) == "fourth"
+    assert sorted(os.listdir(str(tmp_path))) == ["entry"]
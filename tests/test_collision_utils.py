@@ -0,0 +1,38 @@
+import os
+
+import pybullet as p
+import pybullet_data
+
+from igibson.utils.collision_utils import CollisionGroupManager
+from igibson.utils.constants import SPECIAL_COLLISION_GROUPS
+
+
+def count_contacts(body_a, body_b):
+    p.performCollisionDetection()
+    return len(p.getContactPoints(bodyA=body_a, bodyB=body_b))
+
+
+def test_collision_group_manager():
+    p.connect(p.DIRECT)
+    cube = os.path.join(pybullet_data.getDataPath(), "cube_small.urdf")
+    # overlapping cubes: three fixed, one of them in the floors group, and a free one
+    fixed_a = p.loadURDF(cube, [0, 0, 0.5], useFixedBase=True)
+    fixed_b = p.loadURDF(cube, [0.01, 0, 0.5], useFixedBase=True)
+    floor = p.loadURDF(cube, [0.02, 0, 0.5], useFixedBase=True)
+    free = p.loadURDF(cube, [0.03, 0, 0.5])
+
+    manager = CollisionGroupManager()
+    manager.add_fixed_body(fixed_a)
+    manager.add_fixed_body(floor, 1 << SPECIAL_COLLISION_GROUPS["floors"])
+    manager.add_fixed_body(fixed_b)
+    assert count_contacts(fixed_a, fixed_b) == 0
+    assert count_contacts(fixed_a, floor) == 0
+    assert count_contacts(fixed_b, floor) == 0
+    assert count_contacts(fixed_a, free) > 0
+
+    manager.set_pair_collision(fixed_a, fixed_b, True)
+    assert count_contacts(fixed_a, fixed_b) > 0
+    manager.clear_pair_collision(fixed_a, fixed_b)
+    assert count_contacts(fixed_a, fixed_b) == 0
+
+    p.disconnect()
@@ -0,0 +1,83 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from igibson.utils.episode_sampling_utils import EpisodeDataset, EpisodeDatasetReader, PointNavEpisodeSampler
+from igibson.utils.geodesic_utils import GeodesicDistanceField, TraversabilityGrid
+
+
+def make_dataset(scene_id, num_episodes):
+    return EpisodeDataset(
+        {
+            "scene_id": [scene_id] * num_episodes,
+            "floor": np.zeros(num_episodes),
+            "initial_pos": np.random.rand(num_episodes, 3),
+            "initial_orn": np.random.rand(num_episodes, 3),
+            "target_pos": np.random.rand(num_episodes, 3),
+            "geodesic_distance": np.arange(num_episodes),
+            "audio_file": ["{}.wav".format(i) for i in range(num_episodes)],
+        }
+    )
+
+
+def test_episode_dataset_roundtrip_and_reader(tmpdir):
+    dataset = EpisodeDataset.concatenate([make_dataset("Rs", 5), make_dataset("Ihlen_0", 3)])
+    path = os.path.join(str(tmpdir), "episodes.npz")
+    dataset.save(path)
+    loaded = EpisodeDataset.load(path)
+    assert len(loaded) == 8
+    for name, column in dataset.columns.items():
+        assert np.array_equal(loaded.columns[name], column)
+
+    reader = EpisodeDatasetReader(loaded, "Ihlen_0")
+    distances = [reader.next()["geodesic_distance"] for _ in range(6)]
+    assert distances == [0, 1, 2, 0, 1, 2]
+
+    orders = []
+    for _ in range(2):
+        reader = EpisodeDatasetReader(loaded, "Rs", shuffle=True, seed=3)
+        orders.append([reader.next()["audio_file"] for _ in range(5)])
+    assert orders[0] == orders[1] and sorted(orders[0]) == ["{}.wav".format(i) for i in range(5)]
+
+
+def make_scene(trav_map, searched_targets):
+    grid = TraversabilityGrid(trav_map)
+
+    def get_geodesic_field(floor, target_world):
+        target_cell = tuple(int(x) for x in target_world)
+        searched_targets.append(target_cell)
+        return GeodesicDistanceField(grid, target_cell)
+
+    return SimpleNamespace(
+        floor_map=[trav_map],
+        floor_heights=[0.0],
+        trav_map_resolution=1.0,
+        build_graph=True,
+        map_to_world=lambda cell: np.asarray(cell, dtype=np.float64),
+        get_geodesic_field=get_geodesic_field,
+    )
+
+
+def test_point_nav_episode_sampler():
+    np.random.seed(0)
+    trav_map = np.zeros((20, 20), dtype=np.uint8)
+    trav_map[2:18, 2:18] = 255
+    searched_targets = []
+    sampler = PointNavEpisodeSampler(make_scene(trav_map, searched_targets), 2.0, 5.0)
+
+    # the distance field is only computed for the targets passing the check
+    checked_targets = []
+
+    def is_valid_target(pos):
+        checked_targets.append(tuple(pos[:2].astype(int)))
+        return pos[0] >= 10
+
+    initial_pos, target_pos = sampler.sample(0, is_valid_target=is_valid_target)
+    assert target_pos[0] >= 10
+    assert searched_targets == [checked_targets[-1]] == [tuple(target_pos[:2].astype(int))]
+    assert 2.0 < np.linalg.norm(initial_pos - target_pos) < 5.0 * np.sqrt(2)
+
+    # keeping the target draws a new initial position for the same target
+    _, same_target_pos = sampler.sample(0, new_target=False)
+    assert np.array_equal(same_target_pos, target_pos) and len(searched_targets) == 1
@@ -0,0 +1,73 @@
+import networkx as nx
+import numpy as np
+
+from igibson.utils.geodesic_utils import GeodesicDistanceField, TraversabilityGrid, largest_connected_component
+from igibson.utils.utils import l2_distance
+
+
+def test_geodesic_field_matches_astar():
+    rng = np.random.RandomState(0)
+    size = 40
+    trav_map = np.where(rng.rand(size, size) > 0.25, 255, 0).astype(np.uint8)
+
+    g = nx.Graph()
+    for i, j in np.argwhere(trav_map == 255):
+        g.add_node((i, j))
+        for n in [(i - 1, j - 1), (i, j - 1), (i + 1, j - 1), (i - 1, j)]:
+            if 0 <= n[0] < size and 0 <= n[1] < size and trav_map[n] == 255:
+                g.add_edge(n, (i, j), weight=l2_distance(n, (i, j)))
+    largest_cc = max(nx.connected_components(g), key=len)
+    trav_map[:, :] = 0
+    for node in largest_cc:
+        trav_map[node] = 255
+    nodes = list(largest_cc)
+
+    grid = TraversabilityGrid(trav_map)
+    for _ in range(3):
+        target = nodes[rng.randint(len(nodes))]
+        field = GeodesicDistanceField(grid, target)
+        for _ in range(10):
+            source = nodes[rng.randint(len(nodes))]
+            expected = nx.astar_path_length(g, source, target, heuristic=l2_distance)
+            assert np.isclose(field.get_distance(np.array(source, dtype=float)), expected)
+            path = field.get_path(source)
+            assert tuple(path[0]) == tuple(source) and tuple(path[-1]) == tuple(target)
+            assert np.isclose(np.sum(np.linalg.norm(np.diff(path, axis=0), axis=1)), expected)
+
+
+def test_largest_connected_component_matches_networkx():
+    rng = np.random.RandomState(1)
+    size = 40
+    trav_map = np.where(rng.rand(size, size) > 0.4, 255, 0).astype(np.uint8)
+
+    g = nx.Graph()
+    for i, j in np.argwhere(trav_map == 255):
+        g.add_node((i, j))
+        for n in [(i - 1, j - 1), (i, j - 1), (i + 1, j - 1), (i - 1, j)]:
+            if 0 <= n[0] < size and 0 <= n[1] < size and trav_map[n] == 255:
+                g.add_edge(n, (i, j))
+    largest_cc = max(nx.connected_components(g), key=len)
+
+    largest_connected_component(trav_map)
+    assert set(map(tuple, np.argwhere(trav_map == 255))) == largest_cc
+    grid = TraversabilityGrid(trav_map)
+    assert grid.graph.nnz == 2 * g.subgraph(largest_cc).number_of_edges()
+    node = next(iter(largest_cc))
+    assert grid.has_node(node) and not grid.has_node((-1, 0)) and not grid.has_node((size, 0))
+
+
+def test_off_graph_queries_do_not_modify_graph():
+    trav_map = np.zeros((20, 20), dtype=np.uint8)
+    trav_map[5:15, 5:15] = 255
+    grid = TraversabilityGrid(trav_map)
+    graph = grid.graph.copy()
+
+    field = GeodesicDistanceField(grid, (2, 10))
+    assert np.isclose(field.get_distance(np.array([2.0, 10.0])), 0.0)
+    assert np.array_equal(field.get_path((2, 10)), [[2, 10]])
+    for source in [(0, 0), (19, 19), (10, 10), (2, 12)]:
+        path = field.get_path(source)
+        assert tuple(path[0]) == source and tuple(path[-1]) == (2, 10)
+        path_length = np.sum(np.linalg.norm(np.diff(path, axis=0), axis=1))
+        assert np.isclose(field.get_distance(np.array(source, dtype=float)), path_length)
+    assert (grid.graph != graph).nnz == 0
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 
+import os
 import time
 
+import igibson
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
 from igibson.simulator import Simulator
 
@@ -22,3 +24,18 @@ def test_import_igsdf():
         print("Frequency: ", 1 / (end - start))
 
     s.disconnect()
+
+
+def test_scene_quality_check_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(igibson, "cache_path", str(tmp_path))
+    results = []
+    for _ in range(2):
+        scene = InteractiveIndoorScene("Rs_int", load_object_categories=["bottom_cabinet", "sofa", "coffee_table"])
+        s = Simulator(mode="headless", image_width=128, image_height=128, device_idx=0)
+        s.import_scene(scene)
+        results.append((scene.quality_check, scene.body_collision_set, scene.link_collision_set))
+        s.disconnect()
+
+    # the second load takes the result from the cache
+    assert results[0] == results[1]
+    assert len(os.listdir(os.path.join(str(tmp_path), "scene_quality"))) == 1
@@ -1,9 +1,11 @@
 import os
 
+import numpy as np
 import pybullet as p
+import trimesh
 
 import igibson
-from igibson.objects.articulated_object import ArticulatedObject, RBOObject
+from igibson.objects.articulated_object import ArticulatedObject, RBOObject, URDFObject
 from igibson.objects.cube import Cube
 from igibson.objects.ycb_object import YCBObject
 from igibson.robots.turtlebot import Turtlebot
@@ -107,3 +109,55 @@ def test_import_box():
     for i in range(100):
         s.step()
     s.disconnect()
+
+
+def test_urdf_object_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(igibson, "cache_path", str(tmp_path / "cache"))
+    model_path = tmp_path / "model"
+    (model_path / "shape").mkdir(parents=True)
+    trimesh.creation.box([0.2, 0.2, 0.2]).export(str(model_path / "shape" / "box.obj"))
+    # a lid attached with a floating joint, split into its own URDF
+    (model_path / "box.urdf").write_text(
+        """<?xml version="1.0" ?>
+<robot name="box">
+  <link name="base_link">
+    <collision><geometry><mesh filename="shape/box.obj"/></geometry></collision>
+  </link>
+  <link name="lid">
+    <collision><origin xyz="0 0 0.1"/><geometry><mesh filename="shape/box.obj"/></geometry></collision>
+  </link>
+  <joint name="lid_joint" type="floating">
+    <origin xyz="0 0 0.5"/><parent link="base_link"/><child link="lid"/>
+  </joint>
+</robot>
+"""
+    )
+    (model_path / "misc").mkdir()
+    (model_path / "misc" / "bbox.json").write_text('{"min": [-0.1, -0.1, -0.1], "max": [0.1, 0.1, 0.1]}')
+
+    def load(use_urdf_cache):
+        return URDFObject(
+            str(model_path / "box.urdf"),
+            name="box_1",
+            category="box",
+            model_path=str(model_path),
+            bounding_box=np.array([0.4, 0.4, 0.4]),
+            use_urdf_cache=use_urdf_cache,
+            scene_instance_folder=str(tmp_path / "scene_instance"),
+        )
+
+    reference = load(False)
+    first = load(True)
+    second = load(True)
+    assert second.urdf_paths == first.urdf_paths
+    assert os.path.dirname(first.urdf_paths[0]).startswith(igibson.cache_path)
+    for obj in [first, second]:
+        assert obj.main_body == reference.main_body
+        assert obj.is_fixed == reference.is_fixed
+        for path, reference_path in zip(obj.urdf_paths, reference.urdf_paths):
+            with open(path) as f, open(reference_path) as reference_f:
+                assert f.read() == reference_f.read()
+        for (pos, orn), (reference_pos, reference_orn) in zip(obj.local_transforms, reference.local_transforms):
+            assert np.allclose(pos, reference_pos) and np.allclose(orn, reference_orn)
+        for name, scale in reference.scales_in_link_frame.items():
+            assert np.allclose(obj.scales_in_link_frame[name], scale)
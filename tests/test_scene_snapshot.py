@@ -0,0 +1,43 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.utils.scene_snapshot import SceneSnapshot
+
+
+def test_scene_snapshot(tmp_path):
+    p.connect(p.DIRECT)
+    body_id = p.loadURDF(os.path.join(pybullet_data.getDataPath(), "cube_small.urdf"), [0, 0, 1])
+    # renderer with one mesh of two shapes loaded
+    vertex_data = [np.random.rand(3, 14).astype(np.float32), np.random.rand(6, 14).astype(np.float32)]
+    materials = [{"name": "a", "diffuse": [1.0, 0.0, 0.0], "diffuse_texname": ""}]
+    renderer = SimpleNamespace(
+        vertex_data=vertex_data,
+        mesh_records=[{"key": "mesh", "materials": materials, "shapes": [("s0", 0, 0), ("s1", -1, 1)]}],
+    )
+    path = str(tmp_path / "snapshot")
+    SceneSnapshot.save(path, "scene", renderer, {"cube": [body_id]})
+    assert SceneSnapshot.load(path, "other_scene") is None
+
+    snapshot = SceneSnapshot.load(path, "scene")
+    assert snapshot.get_mesh("other_mesh") is None
+    loaded_materials, shapes = snapshot.get_mesh("mesh")
+    assert loaded_materials == materials
+    assert [(shape["name"], shape["material_id"]) for shape in shapes] == [("s0", 0), ("s1", -1)]
+    for shape, data in zip(shapes, vertex_data):
+        assert np.array_equal(shape["vertex_data"], data)
+
+    assert snapshot.matches_objects({"cube": [body_id]})
+    assert not snapshot.matches_objects({"cube": [body_id + 1]})
+    # the state file applies to the whole world, so another body in the client prevents restoring it
+    other_body_id = p.loadURDF(os.path.join(pybullet_data.getDataPath(), "cube_small.urdf"), [0, 0, 2])
+    assert not snapshot.matches_objects({"cube": [body_id]})
+    p.removeBody(other_body_id)
+    assert snapshot.matches_objects({"cube": [body_id]})
+    p.resetBasePositionAndOrientation(body_id, [1, 1, 1], [0, 0, 0, 1])
+    snapshot.restore_state()
+    assert np.allclose(p.getBasePositionAndOrientation(body_id)[0], [0, 0, 1])
+    p.disconnect()
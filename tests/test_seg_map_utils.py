@@ -0,0 +1,26 @@
+import numpy as np
+
+from igibson.utils.seg_map_utils import LabelMapIndex
+
+
+def test_label_map_index():
+    label_map = np.random.RandomState(0).randint(0, 5, size=(40, 30)).astype(np.uint8)
+    label_map[label_map == 3] = 2
+    index = LabelMapIndex(label_map)
+
+    assert list(index.labels) == [0, 1, 2, 4]
+    for label in range(7):
+        valid_idx = np.array(np.where(label_map == label))
+        assert np.array_equal(index.get_pixels(label), valid_idx.T)
+        if valid_idx.shape[1] == 0:
+            assert index.get_aabb(label) is None
+            continue
+        aabb_min, aabb_max = index.get_aabb(label)
+        assert np.array_equal(aabb_min, valid_idx.min(axis=1))
+        assert np.array_equal(aabb_max, valid_idx.max(axis=1))
+
+        # same draw as indexing the np.where result with the same seed
+        np.random.seed(1)
+        expected = valid_idx[:, np.random.randint(valid_idx.shape[1])]
+        np.random.seed(1)
+        assert np.array_equal(index.sample_pixel(label), expected)